@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics import rollup
+from analytics.models import BookingDailyStats
+
+
+class Command(BaseCommand):
+    help = 'Verify the BookingDailyStats rollup against the bookings table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--show', type=int, default=20,
+                            help='How many mismatching rows to print.')
+
+    def handle(self, *args, **options):
+        expected = rollup.compute_stats()
+        stored = (
+            row for row in BookingDailyStats.objects.order_by('vehicle_id', 'day').values_list(
+                'vehicle_id', 'day', *rollup.STAT_FIELDS
+            ).iterator()
+            # Rows whose bookings were all cancelled or deleted
+            if any(row[2:])
+        )
+
+        # Merge the two (vehicle_id, day)-ordered streams
+        mismatches = checked = 0
+        want, have = next(expected, None), next(stored, None)
+        while want or have:
+            checked += 1
+            if have is None or (want is not None and want[:2] < have[:2]):
+                key, found, wanted, want = want[:2], None, want[2:], next(expected, None)
+            elif want is None or have[:2] < want[:2]:
+                key, found, wanted, have = have[:2], have[2:], None, next(stored, None)
+            else:
+                key, found, wanted = want[:2], have[2:], want[2:]
+                want, have = next(expected, None), next(stored, None)
+            if found != wanted:
+                mismatches += 1
+                if mismatches <= options['show']:
+                    self.stdout.write(f'vehicle {key[0]} on {key[1]}: stored {found}, expected {wanted}')
+
+        if mismatches:
+            raise CommandError(
+                f'{mismatches} of {checked} daily stats rows differ from the bookings; '
+                'run rebuild_booking_stats to repair them.'
+            )
+        self.stdout.write(self.style.SUCCESS(f'All {checked} daily stats rows match the bookings'))
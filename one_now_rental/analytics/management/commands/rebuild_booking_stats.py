@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from analytics import rollup
+from analytics.models import BookingDailyStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the BookingDailyStats rollup from the bookings table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per bulk insert and per bookings fetch.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fields = ('vehicle_id', 'day', *rollup.STAT_FIELDS)
+        created, batch = 0, []
+
+        with transaction.atomic():
+            BookingDailyStats.objects.all().delete()
+            for row in rollup.compute_stats(chunk_size=batch_size):
+                batch.append(BookingDailyStats(**dict(zip(fields, row))))
+                if len(batch) == batch_size:
+                    BookingDailyStats.objects.bulk_create(batch)
+                    created, batch = created + len(batch), []
+            BookingDailyStats.objects.bulk_create(batch)
+            created += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} daily stats rows'))
@@ -0,0 +1,28 @@
+from django.db import models
+from vehicles.models import Vehicle
+
+
+class BookingDailyStats(models.Model):
+    """
+    Booking totals per vehicle per day, maintained incrementally by
+    ``analytics.signals`` and recomputed by ``manage.py rebuild_booking_stats``.
+    """
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    # Bookings starting on this day: revenue of the confirmed/completed ones,
+    # how many there are in total and how many of them are cancelled
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    bookings = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+    # Bookings covering this day: pending/confirmed ones, and
+    # confirmed/completed ones (the booked vehicle-days)
+    active_bookings = models.IntegerField(default=0)
+    booked_days = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vehicle', 'day'], name='booking_daily_stats_vehicle_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle_id} {self.day}"
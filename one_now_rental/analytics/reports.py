@@ -0,0 +1,145 @@
+"""
+Host analytics read from the ``BookingDailyStats`` rollup.
+
+Revenue, booking counts and cancellations belong to the day a booking
+starts. Booked days are the rented days of confirmed and completed bookings
+that fall inside the range, so a booking spanning two weeks counts toward
+both. ``host_report`` runs three aggregate queries over at most
+vehicles x days rollup rows, however many bookings there are.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DateField, FilteredRelation, Q, Sum
+from django.db.models.functions import Trunc
+
+from vehicles.models import Vehicle
+from .models import BookingDailyStats
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def periods(start, end, granularity):
+    """Start dates of the periods covering [start, end)."""
+    current = period_start(start, granularity)
+    result = []
+    while current < end:
+        result.append(current)
+        current = next_period(current, granularity)
+    return result
+
+
+def percentage(part, whole):
+    return round(100 * part / whole, 2) if whole else 0.0
+
+
+def _totals(prefix=''):
+    return {
+        'revenue': Sum(f'{prefix}revenue', default=Decimal('0')),
+        'booking_count': Sum(f'{prefix}bookings', default=0),
+        'cancellation_count': Sum(f'{prefix}cancellations', default=0),
+        'booked': Sum(f'{prefix}booked_days', default=0),
+    }
+
+
+def _metrics(row, capacity_days):
+    return {
+        'revenue': row['revenue'],
+        'bookings': row['booking_count'],
+        'cancellations': row['cancellation_count'],
+        'cancellation_rate': percentage(row['cancellation_count'], row['booking_count']),
+        'booked_days': row['booked'],
+        'utilization': percentage(row['booked'], capacity_days),
+    }
+
+
+def host_report(user, start, end, granularity):
+    """
+    Revenue, booked days, utilization and cancellation rate for ``user``'s
+    fleet over [start, end): overall, per period, per vehicle and per
+    vehicle type.
+    """
+    range_days = (end - start).days
+    fleet = Vehicle.objects.filter(owner=user).annotate(
+        stats=FilteredRelation('daily_stats', condition=Q(
+            daily_stats__day__gte=start, daily_stats__day__lt=end
+        ))
+    )
+
+    vehicles = [
+        {
+            'id': row['id'],
+            'plate_number': row['plate_number'],
+            'make': row['make'],
+            'model': row['model'],
+            'vehicle_type': row['vehicle_type'],
+            **_metrics(row, range_days),
+        }
+        for row in fleet.values('id', 'plate_number', 'make', 'model', 'vehicle_type').annotate(
+            **_totals('stats__')
+        ).order_by('id')
+    ]
+
+    type_rows = list(
+        fleet.values('vehicle_type').annotate(
+            vehicle_count=Count('id', distinct=True), **_totals('stats__')
+        ).order_by('vehicle_type')
+    )
+    vehicle_types = [
+        {
+            'vehicle_type': row['vehicle_type'],
+            'vehicles': row['vehicle_count'],
+            **_metrics(row, row['vehicle_count'] * range_days),
+        }
+        for row in type_rows
+    ]
+
+    fleet_size = sum(row['vehicle_count'] for row in type_rows)
+    summary = {
+        'vehicles': fleet_size,
+        **_metrics({
+            key: sum((row[key] for row in type_rows), Decimal('0') if key == 'revenue' else 0)
+            for key in _totals()
+        }, fleet_size * range_days),
+    }
+
+    by_period = {
+        row['period']: row
+        for row in BookingDailyStats.objects.filter(
+            vehicle__owner=user, day__gte=start, day__lt=end
+        ).annotate(
+            period=Trunc('day', granularity, output_field=DateField())
+        ).values('period').annotate(**_totals()).order_by()
+    }
+    empty = {'revenue': Decimal('0'), 'booking_count': 0, 'cancellation_count': 0, 'booked': 0}
+    timeline = []
+    for period in periods(start, end, granularity):
+        # The first and last periods may extend past the requested range
+        days = (min(next_period(period, granularity), end) - max(period, start)).days
+        timeline.append({
+            'period': period,
+            **_metrics(by_period.get(period, empty), fleet_size * days),
+        })
+
+    return {
+        'summary': summary,
+        'timeline': timeline,
+        'vehicles': vehicles,
+        'vehicle_types': vehicle_types,
+    }
@@ -0,0 +1,102 @@
+"""
+Incremental maintenance of ``BookingDailyStats``.
+
+A booking contributes to the row of its start day (revenue, bookings,
+cancellations) and to the rows of every day it covers (active bookings,
+booked days). A change is applied as the difference between the old and new
+contributions, added to the rows in place with an upsert, so concurrent
+writers never overwrite each other's counts.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from itertools import groupby
+
+from django.db import connection, transaction
+
+from bookings.models import Booking
+from .models import BookingDailyStats
+
+STAT_FIELDS = ('revenue', 'bookings', 'cancellations', 'active_bookings', 'booked_days')
+STATE_FIELDS = ('vehicle_id', 'start_date', 'end_date', 'status', 'total_amount')
+UPSERT_BATCH_SIZE = 500
+
+
+def booking_state(booking):
+    return tuple(getattr(booking, field) for field in STATE_FIELDS)
+
+
+def _zero():
+    return [Decimal('0'), 0, 0, 0, 0]
+
+
+def add_contribution(deltas, state, sign=1):
+    """Add ``sign`` times one booking's contribution to ``deltas``, keyed by (vehicle_id, day)."""
+    vehicle_id, start_date, end_date, status, total_amount = state
+    earning = status in Booking.EARNING_STATUSES
+    first = deltas[(vehicle_id, start_date)]
+    if earning:
+        first[0] += sign * Decimal(total_amount)
+    first[1] += sign
+    first[2] += sign * (status == 'cancelled')
+
+    active = sign * (status in Booking.ACTIVE_STATUSES)
+    booked = sign * earning
+    if active or booked:
+        day = start_date
+        while day < end_date:
+            delta = deltas[(vehicle_id, day)]
+            delta[3] += active
+            delta[4] += booked
+            day += timedelta(days=1)
+
+
+def record_changes(previous=(), current=()):
+    """
+    Move the rollup from the ``previous`` states of some bookings to their
+    ``current`` ones. Inserts pass only ``current``; deletes only ``previous``.
+    """
+    deltas = defaultdict(_zero)
+    for state in previous:
+        add_contribution(deltas, state, -1)
+    for state in current:
+        add_contribution(deltas, state, 1)
+    rows = [(vehicle_id, day, *delta) for (vehicle_id, day), delta in deltas.items() if any(delta)]
+    if rows:
+        _upsert(rows)
+
+
+def _upsert(rows):
+    """INSERT ... ON CONFLICT DO UPDATE adding to the existing counters (SQLite and PostgreSQL)."""
+    meta = BookingDailyStats._meta
+    quote = connection.ops.quote_name
+    table = quote(meta.db_table)
+    columns = [meta.get_field('vehicle').column, 'day', *STAT_FIELDS]
+    updates = ', '.join(f'{quote(name)} = {table}.{quote(name)} + excluded.{quote(name)}' for name in STAT_FIELDS)
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[offset:offset + UPSERT_BATCH_SIZE]
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(quote(column) for column in columns)}) '
+                f'VALUES {", ".join([placeholders] * len(batch))} '
+                f'ON CONFLICT ({quote(columns[0])}, {quote("day")}) DO UPDATE SET {updates}',
+                [value for row in batch for value in row],
+            )
+
+
+def compute_stats(chunk_size=5000):
+    """
+    Yield ``(vehicle_id, day, *STAT_FIELDS)`` tuples recomputed from the
+    bookings, ordered by vehicle and day. Only one vehicle's days are held
+    in memory at a time.
+    """
+    states = Booking.objects.order_by('vehicle_id').values_list(*STATE_FIELDS).iterator(chunk_size=chunk_size)
+    for _, vehicle_states in groupby(states, key=lambda state: state[0]):
+        deltas = defaultdict(_zero)
+        for state in vehicle_states:
+            add_contribution(deltas, state)
+        for (vehicle_id, day), delta in sorted(deltas.items()):
+            if any(delta):
+                yield (vehicle_id, day, *delta)
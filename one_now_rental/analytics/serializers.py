@@ -0,0 +1,76 @@
+from rest_framework import serializers
+from datetime import date, timedelta
+from .reports import GRANULARITIES
+
+# Longest range accepted per granularity, in days
+MAX_RANGE_DAYS = {'day': 366, 'week': 5 * 366, 'month': 5 * 366}
+
+
+class HostAnalyticsQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the host analytics endpoint. ``from`` and ``to`` are
+    inclusive and default to the last 30 days.
+    """
+    from_ = serializers.DateField(required=False)
+    to = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default='day')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # ``from`` is a keyword, so it cannot be declared directly
+        fields['from'] = fields.pop('from_')
+        return fields
+
+    def validate(self, attrs):
+        attrs.setdefault('to', date.today())
+        attrs.setdefault('from', attrs['to'] - timedelta(days=29))
+
+        if attrs['from'] > attrs['to']:
+            raise serializers.ValidationError({
+                'to': 'End date must not be before start date.'
+            })
+
+        limit = MAX_RANGE_DAYS[attrs['granularity']]
+        if (attrs['to'] - attrs['from']).days >= limit:
+            raise serializers.ValidationError({
+                'from': f'Ranges are limited to {limit} days at {attrs["granularity"]} granularity.'
+            })
+
+        return attrs
+
+
+class MetricsSerializer(serializers.Serializer):
+    revenue = serializers.DecimalField(max_digits=None, decimal_places=2)
+    bookings = serializers.IntegerField()
+    cancellations = serializers.IntegerField()
+    cancellation_rate = serializers.FloatField()
+    booked_days = serializers.IntegerField()
+    utilization = serializers.FloatField()
+
+
+class SummarySerializer(MetricsSerializer):
+    vehicles = serializers.IntegerField()
+
+
+class PeriodSerializer(MetricsSerializer):
+    period = serializers.DateField()
+
+
+class VehicleMetricsSerializer(MetricsSerializer):
+    id = serializers.IntegerField()
+    plate_number = serializers.CharField()
+    make = serializers.CharField()
+    model = serializers.CharField()
+    vehicle_type = serializers.CharField()
+
+
+class VehicleTypeMetricsSerializer(MetricsSerializer):
+    vehicle_type = serializers.CharField()
+    vehicles = serializers.IntegerField()
+
+
+class HostAnalyticsSerializer(serializers.Serializer):
+    summary = SummarySerializer()
+    timeline = PeriodSerializer(many=True)
+    vehicles = VehicleMetricsSerializer(many=True)
+    vehicle_types = VehicleTypeMetricsSerializer(many=True)
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bookings.models import Booking
+from bookings.signals import bookings_changed, previous_state
+from . import rollup
+
+
+@receiver(post_save, sender=Booking)
+def update_daily_stats(sender, instance, **kwargs):
+    previous = previous_state(instance, rollup.STATE_FIELDS)
+    rollup.record_changes(
+        previous=[previous] if previous else [],
+        current=[rollup.booking_state(instance)],
+    )
+
+
+@receiver(post_delete, sender=Booking)
+def remove_daily_stats(sender, instance, **kwargs):
+    rollup.record_changes(previous=[rollup.booking_state(instance)])
+
+
+@receiver(bookings_changed, sender=Booking)
+def update_bulk_daily_stats(sender, bookings, previous=(), **kwargs):
+    rollup.record_changes(
+        previous=[rollup.booking_state(booking) for booking in previous],
+        current=[rollup.booking_state(booking) for booking in bookings],
+    )
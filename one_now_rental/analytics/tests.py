@@ -0,0 +1,297 @@
+import io
+import random
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from bookings.models import Booking
+from bookings.signals import bookings_changed
+from vehicles.models import Vehicle
+from .models import BookingDailyStats
+from .reports import next_period, periods
+
+User = get_user_model()
+
+
+class HostAnalyticsTestCase(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host',
+            email='host@example.com',
+            password='testpass123',
+            user_type='host'
+        )
+        other_host = User.objects.create_user(
+            username='otherhost',
+            email='otherhost@example.com',
+            password='testpass123',
+            user_type='host'
+        )
+        self.renter = User.objects.create_user(
+            username='renter',
+            email='renter@example.com',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.host)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        self.vehicles = [
+            Vehicle.objects.create(owner=owner, make='Toyota', model='Camry', year=2020,
+                                   plate_number=f'AN{i}', vehicle_type=vehicle_type, daily_rate=40 + i)
+            for i, (owner, vehicle_type) in enumerate([
+                (self.host, 'sedan'), (self.host, 'sedan'), (self.host, 'suv'), (other_host, 'suv'),
+            ])
+        ]
+        self.analytics_url = reverse('host-analytics')
+        self.origin = date(2025, 3, 1)
+
+    def seed_bookings(self, count=120, seed=7):
+        rng = random.Random(seed)
+        statuses = ['pending', 'confirmed', 'cancelled', 'completed']
+        bookings = []
+        for _ in range(count):
+            vehicle = rng.choice(self.vehicles)
+            start = self.origin + timedelta(days=rng.randint(-20, 110))
+            days = rng.randint(1, 12)
+            bookings.append(Booking(
+                renter=self.renter,
+                vehicle=vehicle,
+                start_date=start,
+                end_date=start + timedelta(days=days),
+                total_amount=vehicle.daily_rate * days,
+                status=rng.choice(statuses),
+            ))
+        Booking.objects.bulk_create(bookings)
+        bookings_changed.send(sender=Booking, bookings=bookings)
+
+    def expected_report(self, start, end, granularity):
+        """Brute-force the report day by day in Python"""
+        fleet = [vehicle for vehicle in self.vehicles if vehicle.owner_id == self.host.id]
+        buckets = periods(start, end, granularity)
+        totals = {key: defaultdict(lambda: [Decimal('0'), 0, 0, 0]) for key in ('period', 'vehicle', 'type')}
+
+        for booking in Booking.objects.filter(vehicle__in=fleet):
+            earning = booking.status in Booking.EARNING_STATUSES
+            keys = {'vehicle': booking.vehicle_id, 'type': booking.vehicle.vehicle_type}
+            if start <= booking.start_date < end:
+                period = max(bucket for bucket in buckets if bucket <= booking.start_date)
+                for kind, key in [('period', period), *keys.items()]:
+                    totals[kind][key][0] += booking.total_amount if earning else 0
+                    totals[kind][key][1] += 1
+                    totals[kind][key][2] += booking.status == 'cancelled'
+            day = booking.start_date
+            while earning and day < booking.end_date:
+                if start <= day < end:
+                    period = max(bucket for bucket in buckets if bucket <= day)
+                    for kind, key in [('period', period), *keys.items()]:
+                        totals[kind][key][3] += 1
+                day += timedelta(days=1)
+        return fleet, buckets, totals
+
+    def assertMetrics(self, data, totals, capacity):
+        revenue, bookings, cancellations, booked = totals
+        self.assertEqual(Decimal(data['revenue']), revenue)
+        self.assertEqual(data['bookings'], bookings)
+        self.assertEqual(data['cancellations'], cancellations)
+        self.assertEqual(data['booked_days'], booked)
+        self.assertAlmostEqual(data['utilization'], round(100 * booked / capacity, 2))
+
+    def test_report_matches_brute_force(self):
+        """Test every metric against a day-by-day Python computation"""
+        self.seed_bookings()
+        start, to = self.origin, self.origin + timedelta(days=74)
+        end = to + timedelta(days=1)
+        for granularity in ('day', 'week', 'month'):
+            response = self.client.get(self.analytics_url, {
+                'from': start.isoformat(), 'to': to.isoformat(), 'granularity': granularity,
+            })
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            fleet, buckets, totals = self.expected_report(start, end, granularity)
+            range_days = (end - start).days
+
+            timeline = response.data['timeline']
+            self.assertEqual([row['period'] for row in timeline], [bucket.isoformat() for bucket in buckets])
+            for row, bucket in zip(timeline, buckets):
+                days = (min(next_period(bucket, granularity), end) - max(bucket, start)).days
+                self.assertMetrics(row, totals['period'][bucket], len(fleet) * days)
+
+            self.assertEqual([row['id'] for row in response.data['vehicles']], [v.id for v in fleet])
+            for row in response.data['vehicles']:
+                self.assertMetrics(row, totals['vehicle'][row['id']], range_days)
+
+            types = {row['vehicle_type']: row for row in response.data['vehicle_types']}
+            self.assertEqual(types['sedan']['vehicles'], 2)
+            self.assertEqual(set(types), {'sedan', 'suv'})
+            for vehicle_type, row in types.items():
+                self.assertMetrics(row, totals['type'][vehicle_type], row['vehicles'] * range_days)
+
+            summary = response.data['summary']
+            self.assertEqual(summary['vehicles'], 3)
+            self.assertEqual(summary['booked_days'], sum(row['booked_days'] for row in timeline))
+            self.assertEqual(summary['bookings'], sum(row['bookings'] for row in timeline))
+            self.assertEqual(Decimal(summary['revenue']), sum(Decimal(row['revenue']) for row in timeline))
+
+    def test_query_count_does_not_grow_with_bookings(self):
+        """Test that the report is a fixed number of aggregate queries"""
+        params = {'from': self.origin.isoformat(), 'to': (self.origin + timedelta(days=60)).isoformat()}
+        # JWT user lookup and three aggregate queries
+        with self.assertNumQueries(4):
+            self.client.get(self.analytics_url, params)
+        self.seed_bookings(count=300)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.analytics_url, params)
+        self.assertGreater(response.data['summary']['bookings'], 0)
+
+    def test_cancellation_rate(self):
+        """Test the cancellation rate of bookings starting in the range"""
+        # bulk_create, since save() rejects past dates
+        bookings = Booking.objects.bulk_create([
+            Booking(renter=self.renter, vehicle=self.vehicles[0],
+                    start_date=self.origin + timedelta(days=3 * i),
+                    end_date=self.origin + timedelta(days=3 * i + 2),
+                    total_amount=80, status=status_)
+            for i, status_ in enumerate(['cancelled', 'confirmed', 'completed', 'cancelled'])
+        ])
+        bookings_changed.send(sender=Booking, bookings=bookings)
+        response = self.client.get(self.analytics_url, {
+            'from': self.origin.isoformat(), 'to': (self.origin + timedelta(days=30)).isoformat(),
+        })
+        self.assertEqual(response.data['summary']['cancellation_rate'], 50.0)
+        self.assertEqual(response.data['summary']['revenue'], '160.00')
+        self.assertEqual(response.data['summary']['booked_days'], 4)
+
+    def test_defaults_and_invalid_parameters(self):
+        """Test the default range and rejected parameters"""
+        response = self.client.get(self.analytics_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['to'], date.today())
+        self.assertEqual(len(response.data['timeline']), 30)
+
+        for params in ({'from': '2025-03-10', 'to': '2025-03-01'},
+                       {'from': '2023-01-01', 'to': '2025-01-01'},
+                       {'granularity': 'year'}):
+            response = self.client.get(self.analytics_url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data['error'], 'Analytics query failed')
+
+
+class BookingDailyStatsTestCase(APITestCase):
+    def setUp(self):
+        owner = User.objects.create_user(
+            username='host',
+            email='host@example.com',
+            password='testpass123',
+            user_type='host'
+        )
+        self.renter = User.objects.create_user(
+            username='renter',
+            email='renter@example.com',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.renter)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.vehicle = Vehicle.objects.create(owner=owner, make='Toyota', model='Camry', year=2020,
+                                              plate_number='ROLL1', daily_rate=50)
+        self.start = date.today() + timedelta(days=2)
+
+    def stats(self):
+        return {
+            row['day']: (row['revenue'], row['bookings'], row['cancellations'],
+                         row['active_bookings'], row['booked_days'])
+            for row in BookingDailyStats.objects.filter(vehicle=self.vehicle).values()
+            if row['bookings'] or row['active_bookings'] or row['booked_days']
+        }
+
+    def days(self, count, offset=0):
+        return [self.start + timedelta(days=offset + i) for i in range(count)]
+
+    def test_rollup_follows_create_and_status_transitions(self):
+        """Test that creating and updating a booking keeps the rollup in step"""
+        response = self.client.post(reverse('booking-list-create'), {
+            'vehicle': self.vehicle.id,
+            'start_date': self.start,
+            'end_date': self.start + timedelta(days=3),
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        first, *rest = self.days(3)
+        self.assertEqual(self.stats(), {first: (0, 1, 0, 1, 0), **{day: (0, 0, 0, 1, 0) for day in rest}})
+
+        detail_url = reverse('booking-detail', kwargs={'pk': response.data['booking']['id']})
+        self.client.patch(detail_url, {'status': 'confirmed'})
+        self.assertEqual(self.stats(), {first: (150, 1, 0, 1, 1), **{day: (0, 0, 0, 1, 1) for day in rest}})
+
+        self.client.patch(detail_url, {'status': 'cancelled'})
+        self.assertEqual(self.stats(), {first: (0, 1, 1, 0, 0)})
+        call_command('check_booking_stats', stdout=io.StringIO())
+
+    def test_rollup_follows_bulk_creates_and_deletes(self):
+        """Test the bulk endpoint and deletes against the rollup"""
+        response = self.client.post(reverse('booking-bulk-create'), {'bookings': [
+            {'vehicle': self.vehicle.id, 'start_date': day, 'end_date': day + timedelta(days=2)}
+            for day in self.days(2, offset=0)[::2] + self.days(1, offset=5)
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(self.stats()), 4)
+
+        Booking.objects.get(start_date=self.start).delete()
+        self.assertEqual(sorted(self.stats()), self.days(2, offset=5))
+        call_command('check_booking_stats', stdout=io.StringIO())
+
+    def test_check_detects_drift_and_rebuild_repairs_it(self):
+        """Test the consistency checker and the rebuild command"""
+        Booking.objects.create(renter=self.renter, vehicle=self.vehicle, status='confirmed',
+                               start_date=self.start, end_date=self.start + timedelta(days=4))
+        expected = self.stats()
+        # Writes that bypass the signals leave the rollup behind
+        Booking.objects.update(status='completed', total_amount=123)
+
+        with self.assertRaisesMessage(CommandError, '4 of 4 daily stats rows differ'):
+            call_command('check_booking_stats', stdout=io.StringIO())
+
+        out = io.StringIO()
+        call_command('rebuild_booking_stats', stdout=out)
+        self.assertIn('Rebuilt 4 daily stats rows', out.getvalue())
+        expected[self.start] = (123, 1, 0, 0, 1)
+        expected.update({day: (0, 0, 0, 0, 1) for day in self.days(3, offset=1)})
+        self.assertEqual(self.stats(), expected)
+        call_command('check_booking_stats', stdout=io.StringIO())
+
+
+class BookingDailyStatsConcurrencyTestCase(TransactionTestCase):
+    def test_concurrent_status_changes(self):
+        """Test that concurrent PATCHes of one booking each start from the other's result"""
+        owner = User.objects.create(username='host', email='host@example.com', user_type='host')
+        renter = User.objects.create(username='renter', email='renter@example.com')
+        vehicle = Vehicle.objects.create(owner=owner, make='Toyota', model='Camry', year=2020,
+                                         plate_number='ROLL2', daily_rate=50)
+        start = date.today() + timedelta(days=2)
+        booking = Booking.objects.create(renter=renter, vehicle=vehicle, start_date=start,
+                                         end_date=start + timedelta(days=3))
+        url = reverse('booking-detail', kwargs={'pk': booking.pk})
+
+        for statuses in (['confirmed'] * 4, ['cancelled', 'confirmed', 'pending', 'completed']):
+            barrier = threading.Barrier(len(statuses))
+
+            def patch(new_status):
+                client = APIClient()
+                client.force_authenticate(renter)
+                barrier.wait()
+                try:
+                    client.patch(url, {'status': new_status})
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=patch, args=(new_status,)) for new_status in statuses]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            call_command('check_booking_stats', stdout=io.StringIO())
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('analytics/host/', views.HostAnalyticsView.as_view(), name='host-analytics'),
+]
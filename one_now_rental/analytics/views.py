@@ -0,0 +1,33 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from datetime import timedelta
+from .reports import host_report
+from .serializers import HostAnalyticsQuerySerializer, HostAnalyticsSerializer
+
+
+class HostAnalyticsView(APIView):
+    """
+    Revenue, booked days, utilization % and cancellation rate of the user's
+    fleet, overall and per period, vehicle and vehicle type.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = HostAnalyticsQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({
+                'error': 'Analytics query failed',
+                'details': params.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        query = params.validated_data
+        report = host_report(
+            request.user, query['from'], query['to'] + timedelta(days=1), query['granularity']
+        )
+        return Response({
+            'from': query['from'],
+            'to': query['to'],
+            'granularity': query['granularity'],
+            **HostAnalyticsSerializer(report).data,
+        })
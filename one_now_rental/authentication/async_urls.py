@@ -0,0 +1,7 @@
+from django.urls import path
+from .async_views import AsyncRegisterView, AsyncLoginView
+
+urlpatterns = [
+    path('register/', AsyncRegisterView.as_view(), name='register'),
+    path('login/', AsyncLoginView.as_view(), name='login'),
+]
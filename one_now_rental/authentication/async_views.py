@@ -0,0 +1,101 @@
+"""
+Async register and login, served in place of the DRF views under ASGI.
+
+The request, validation and responses match ``RegisterView`` and
+``LoginView``. Logins go through ``aauthenticate()``, whose
+``PooledModelBackend`` hashes on the bounded pool in
+``authentication.hashers``, so a login surge queues there instead of
+blocking the event loop. Registration saves through the serializer on a
+thread, as ``RegisterView`` does.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, serializers, status
+
+from one_now_rental.throttling import AuthThrottle
+
+from .serializers import LoginCredentialsSerializer, UserRegistrationSerializer
+from .views import auth_payload
+
+
+def request_data(request):
+    """JSON or form body, as DRF's default parsers would read it."""
+    if request.content_type == 'application/json':
+        return json.loads(request.body or b'{}')
+    return request.POST
+
+
+def error_response(error, details):
+    return JsonResponse({'error': error, 'details': details}, status=status.HTTP_400_BAD_REQUEST)
+
+
+async def throttled_response(request):
+    """The 429 ``AuthThrottle`` answers with in the DRF views, or None if the request may proceed."""
+    throttle = AuthThrottle()
+    if await throttle.aallow_request(request, None):
+        return None
+    exc = exceptions.Throttled(throttle.wait())
+    return JsonResponse({'detail': exc.detail}, status=exc.status_code,
+                        headers={'Retry-After': '%d' % exc.wait})
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncRegisterView(View):
+    http_method_names = ['post']
+
+    async def post(self, request):
+        """Register a new user"""
+        throttled = await throttled_response(request)
+        if throttled is not None:
+            return throttled
+        try:
+            data = request_data(request)
+        except ValueError as exc:
+            return error_response('Registration failed', {'non_field_errors': [f'JSON parse error - {exc}']})
+        serializer = UserRegistrationSerializer(data=data)
+        # Uniqueness checks and password validators
+        if not await sync_to_async(serializer.is_valid)():
+            return error_response('Registration failed', serializer.errors)
+
+        try:
+            # Hashes the password, and turns a lost uniqueness race into errors
+            user = await sync_to_async(serializer.save)()
+        except serializers.ValidationError as exc:
+            return error_response('Registration failed', exc.detail)
+        return JsonResponse({
+            'message': 'User registered successfully',
+            **auth_payload(user)
+        }, status=status.HTTP_201_CREATED)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(View):
+    http_method_names = ['post']
+
+    async def post(self, request):
+        """Login user and return JWT token"""
+        throttled = await throttled_response(request)
+        if throttled is not None:
+            return throttled
+        try:
+            data = request_data(request)
+        except ValueError as exc:
+            return error_response('Login failed', {'non_field_errors': [f'JSON parse error - {exc}']})
+        serializer = LoginCredentialsSerializer(data=data)
+        if not serializer.is_valid():
+            return error_response('Login failed', serializer.errors)
+
+        credentials = serializer.validated_data
+        user = await aauthenticate(request, username=credentials['username'], password=credentials['password'])
+        if user is not None:
+            return JsonResponse({
+                'message': 'Login successful',
+                **auth_payload(user)
+            }, status=status.HTTP_200_OK)
+        return error_response('Login failed', {'non_field_errors': ['Invalid credentials.']})
@@ -0,0 +1,108 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .hashers import acheck_password, amake_password
+from .models import ClaimsUser, User
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    Django's ``ModelBackend`` whose ``aauthenticate()`` hashes on the pool
+    in ``authentication.hashers``; Django's own hashes on the event loop.
+    """
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await User._default_manager.aget_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as wrong passwords
+            await amake_password(password)
+            return None
+        if await acheck_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """
+    simplejwt's ``JWTAuthentication`` plus ``aauthenticate()``, which the
+    async views in ``one_now_rental.async_views`` await instead of running
+    ``authenticate()`` on a thread.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """``get_user()`` with the user row read through the async ORM."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the token's claims instead of loading
+    the user on every request.
+
+    ``request.user`` is a ``ClaimsUser`` holding the id and ``user_type``
+    from the token; other fields load on first access. Since the row is not
+    read, a deactivated user or a changed ``user_type`` takes effect only
+    once the access token expires.
+
+    Opt in by listing it in ``DEFAULT_AUTHENTICATION_CLASSES`` in place of
+    ``JWTAuthentication``.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        # simplejwt writes the claim as a string; compare like a loaded pk
+        try:
+            claims = {'id': ClaimsUser._meta.pk.to_python(user_id)}
+        except ValidationError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        if 'user_type' in validated_token:
+            claims['user_type'] = validated_token['user_type']
+        return ClaimsUser.from_claims(claims, using=router.db_for_read(ClaimsUser))
+
+    async def aget_user(self, validated_token):
+        # Nothing to read
+        return self.get_user(validated_token)
@@ -0,0 +1,57 @@
+"""
+Password hashing cost and the pool that async views hash on.
+
+``TunedPBKDF2PasswordHasher`` reads its iteration count from
+``settings.PASSWORD_HASH_ITERATIONS``. Hashes made with any other count
+fail ``must_update``, so Django rehashes them on the next successful login.
+
+``amake_password`` and ``acheck_password`` run the hash on a bounded
+thread pool of ``settings.PASSWORD_HASH_WORKERS`` threads, which keeps
+PBKDF2 off the event loop. hashlib releases the GIL while it hashes, so
+the threads hash in parallel.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password, verify_password
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash'
+            )
+        return _executor
+
+
+async def _offload(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), fn, *args)
+
+
+async def amake_password(password):
+    return await _offload(make_password, password)
+
+
+async def acheck_password(user, password):
+    """
+    Check ``password`` against ``user``'s hash on the pool, rehashing and
+    saving it when the hasher settings have changed.
+    """
+    is_correct, must_update = await _offload(verify_password, password, user.password)
+    if is_correct and must_update:
+        user.password = await amake_password(password)
+        await user.asave(update_fields=['password'])
+    return is_correct
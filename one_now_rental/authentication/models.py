@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 
 class User(AbstractUser):
     USER_TYPES = [
@@ -13,5 +17,52 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Columns __str__ reads, so related querysets can load users narrowly
+    STR_FIELDS = ('username', 'user_type')
+
+    class Meta:
+        constraints = [
+            # Case-insensitive, and indexed for the registration check
+            models.UniqueConstraint(Lower('email'), condition=~Q(email=''), name='user_email_ci_unique'),
+        ]
+
     def __str__(self):
-        return f"{self.username} ({self.user_type})"
\ No newline at end of file
+        return f"{self.username} ({self.user_type})"
+
+# Cache key of the row ClaimsUser falls back to; dropped whenever the user is saved
+CLAIMS_USER_CACHE_KEY = 'claimsuser:{}'
+
+
+class ClaimsUser(User):
+    """
+    A user built from access token claims by ``ClaimsJWTAuthentication``.
+
+    Only the claimed fields (``id`` and ``user_type``) are loaded; the rest
+    are deferred. Reading one fetches the whole row once, through the cache
+    for ``settings.CLAIMS_USER_CACHE_TIMEOUT`` seconds, instead of querying
+    per field. The password hash is never cached.
+    """
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, claims, using='default'):
+        names = [name for name in ('id', 'user_type') if name in claims]
+        return cls.from_db(using, names, [claims[name] for name in names])
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is None or from_queryset is not None or 'password' in fields or not deferred.issuperset(fields):
+            return super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+        key = CLAIMS_USER_CACHE_KEY.format(self.pk)
+        row = cache.get(key)
+        if row is None:
+            names = [field.attname for field in self._meta.concrete_fields if field.attname != 'password']
+            row = User.objects.using(using or self._state.db).filter(pk=self.pk).values(*names).first()
+            if row is None:
+                raise self.DoesNotExist('User matching the token no longer exists.')
+            cache.set(key, row, settings.CLAIMS_USER_CACHE_TIMEOUT)
+        for name in deferred:
+            if name in row:
+                setattr(self, name, row[name])
@@ -1,8 +1,32 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
 from .models import User
 
+
+def taken_fields(username, email):
+    """
+    Errors for whichever of ``username`` and ``email`` (case-insensitively)
+    already belong to a user, in a single query on their unique indexes.
+    Blank emails are never taken.
+    """
+    email = email.lower()
+    # Repeats the partial index's condition so the planner can use it
+    matches = User.objects.alias(email_lower=Lower('email')).filter(
+        Q(username=username) | Q(email_lower=email) & ~Q(email='')
+    ).values_list('username', Lower('email'))
+    errors = {}
+    for taken_username, taken_email in matches:
+        if taken_username == username:
+            errors['username'] = ['Username already exists.']
+        if email and taken_email == email:
+            errors['email'] = ['Email already exists.']
+    return errors
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True,
@@ -19,12 +43,17 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'password', 'password_confirm', 
                  'first_name', 'last_name', 'user_type', 'phone', 'address']
         extra_kwargs = {
+            # validate() checks username and email together in one query
+            'username': {'validators': [User.username_validator]},
             'email': {'required': True},
             'first_name': {'required': True},
             'last_name': {'required': True},
         }
 
     def validate(self, attrs):
+        taken = taken_fields(attrs['username'], attrs['email'])
+        if taken:
+            raise serializers.ValidationError(taken)
         if attrs['password'] != attrs['password_confirm']:
             raise serializers.ValidationError({
                 'password_confirm': 'Passwords do not match.'
@@ -32,24 +61,30 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return attrs
 
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError('Email already exists.')
-        return value
+        return User.objects.normalize_email(value)
 
-    def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError('Username already exists.')
-        return value
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            # Lost a race with another registration for the same username or email
+            taken = taken_fields(self.validated_data['username'], self.validated_data['email'])
+            if not taken:
+                raise
+            raise serializers.ValidationError(taken)
 
     def create(self, validated_data):
         validated_data.pop('password_confirm')
         user = User.objects.create_user(**validated_data)
         return user
 
-class UserLoginSerializer(serializers.Serializer):
+class LoginCredentialsSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(style={'input_type': 'password'})
 
+
+class UserLoginSerializer(LoginCredentialsSerializer):
     def validate(self, attrs):
         username = attrs.get('username')
         password = attrs.get('password')
@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CLAIMS_USER_CACHE_KEY
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender='authentication.ClaimsUser')
+def forget_claims_user(sender, instance, **kwargs):
+    cache.delete(CLAIMS_USER_CACHE_KEY.format(instance.pk))
@@ -1,9 +1,33 @@
-from django.test import TestCase
-from django.contrib.auth import get_user_model
-from django.urls import reverse
-from rest_framework.test import APITestCase
+import threading
+from datetime import date, timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+
+from django.test import TestCase, tag
+from django.conf import settings
+from django.contrib.auth import aauthenticate, get_user_model
+from django.contrib.auth.hashers import make_password, verify_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from rest_framework.test import APIRequestFactory, APITestCase
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from bookings.models import Booking
+from bookings.views import BookingBulkCreateView, BookingListCreateView
+from vehicles.models import Vehicle
+from vehicles.views import VehicleListCreateView
+from one_now_rental.asgi import ASGI_URLCONF
+from one_now_rental.throttling import CacheBucketStore, LocalBucketStore
+from .async_views import AsyncLoginView
+from .backends import ClaimsJWTAuthentication
+from .models import ClaimsUser
+from .serializers import UserRegistrationSerializer, taken_fields
 
 User = get_user_model()
 
@@ -36,6 +60,34 @@ class AuthenticationTestCase(APITestCase):
         response = self.client.post(self.register_url, self.user_data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
+    def test_user_registration_duplicate_email_other_case(self):
+        """Test that email uniqueness ignores case"""
+        User.objects.create_user(username='existing', email='test@example.com', password='pass123')
+        data = dict(self.user_data, email='Test@EXAMPLE.com')
+        with self.assertNumQueries(1):
+            self.assertFalse(UserRegistrationSerializer(data=data).is_valid())
+        response = self.client.post(self.register_url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['details'], {'email': ['Email already exists.']})
+
+    def test_blank_emails_are_never_taken(self):
+        """Test that a user without an email does not make a blank email taken"""
+        User.objects.create_user(username='noemail', email='', password='pass123')
+        self.assertEqual(taken_fields('noemail', ''), {'username': ['Username already exists.']})
+        self.assertEqual(taken_fields('other', ''), {})
+
+    def test_user_registration_race_is_validation_error(self):
+        """Test that a duplicate slipping past the check fails validation instead of erroring"""
+        User.objects.create_user(username='testrenter', email='other@example.com', password='pass123')
+        with mock.patch('authentication.serializers.taken_fields', wraps=taken_fields,
+                        side_effect=[{}, mock.DEFAULT]):
+            response = self.client.post(self.register_url, self.user_data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {
+            'error': 'Registration failed',
+            'details': {'username': ['Username already exists.']},
+        })
+
     def test_user_registration_password_mismatch(self):
         
         data = self.user_data.copy()
@@ -79,4 +131,351 @@ class AuthenticationTestCase(APITestCase):
         data['password'] = '123'
         data['password_confirm'] = '123'
         response = self.client.post(self.register_url, data)
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ClaimsJWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testhost',
+            email='host@example.com',
+            password='testpass123',
+            user_type='host'
+        )
+        Vehicle.objects.create(owner=self.user, make='Toyota', model='Camry', year=2020,
+                               plate_number='CLAIM1', daily_rate=50)
+
+    def login(self):
+        response = self.client.post(reverse('login'), {'username': 'testhost', 'password': 'testpass123'})
+        return response.data['tokens']['access']
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        user, _ = ClaimsJWTAuthentication().authenticate(request)
+        return user
+
+    def test_login_token_carries_user_type(self):
+        """Test that login and register embed user_type in the access token"""
+        self.assertEqual(AccessToken(self.login()).get('user_type'), 'host')
+
+    def test_list_without_user_query(self):
+        """Test that the vehicle list authenticates without reading the user row"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login()}')
+        url = reverse('vehicle-list-create')
+        for auth_class, reads_user in ((JWTAuthentication, True), (ClaimsJWTAuthentication, False)):
+            cache.clear()
+            with mock.patch.object(VehicleListCreateView, 'authentication_classes', [auth_class]):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['count'], 1)
+            self.assertEqual(
+                any(query['sql'].startswith('SELECT "authentication_user"."id"') for query in queries),
+                reads_user,
+            )
+
+    def test_other_fields_load_once_through_cache(self):
+        """Test that unclaimed fields are fetched once and then served from the cache"""
+        access = self.login()
+        user = self.authenticate(access)
+        self.assertIsInstance(user, ClaimsUser)
+        with self.assertNumQueries(0):
+            self.assertEqual((user.pk, user.user_type), (self.user.pk, 'host'))
+            self.assertTrue(user.is_authenticated)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, 'testhost')
+            self.assertEqual(user.email, 'host@example.com')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(access).email, 'host@example.com')
+
+        self.user.email = 'changed@example.com'
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(access).email, 'changed@example.com')
+
+    def test_claimed_id_matches_owner(self):
+        """Test that the claimed id compares equal to foreign keys, so hosts cannot book their own vehicle"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login()}')
+        vehicle = Vehicle.objects.get(plate_number='CLAIM1')
+        start = date.today() + timedelta(days=3)
+        item = {'vehicle': vehicle.pk, 'start_date': start, 'end_date': start + timedelta(days=2)}
+        self.assertEqual(self.authenticate(self.login()).pk, self.user.pk)
+        for view, url, payload in ((BookingListCreateView, reverse('booking-list-create'), item),
+                                   (BookingBulkCreateView, reverse('booking-bulk-create'), {'bookings': [item]})):
+            with mock.patch.object(view, 'authentication_classes', [ClaimsJWTAuthentication]):
+                response = self.client.post(url, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('You cannot book your own vehicle.', str(response.data))
+        self.assertFalse(Booking.objects.exists())
+
+    def test_token_without_user_type_claim(self):
+        """Test that older tokens without the claim fall back to the user row"""
+        user = self.authenticate(RefreshToken.for_user(self.user).access_token)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.user_type, 'host')
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class PasswordHashingTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testrenter',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.credentials = {'username': 'testrenter', 'password': 'testpass123'}
+
+    def iterations(self):
+        self.user.refresh_from_db()
+        return int(self.user.password.split('$')[1])
+
+    def test_iterations_follow_settings(self):
+        """Test that new hashes use PASSWORD_HASH_ITERATIONS"""
+        self.assertEqual(self.iterations(), 1000)
+
+    def test_login_upgrades_hash(self):
+        """Test that logging in rehashes passwords made with another iteration count"""
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            response = self.client.post(reverse('login'), self.credentials)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.iterations(), 2000)
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_asgi_urls_serve_async_views(self):
+        """Test that ASGI requests reach the async login view"""
+        self.assertIs(resolve('/api/auth/login/', urlconf=ASGI_URLCONF).func.view_class, AsyncLoginView)
+        self.assertEqual(resolve('/api/vehicles/', urlconf=ASGI_URLCONF).url_name, 'vehicle-list-create')
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_async_login(self):
+        """Test async login, including the rehash on a changed iteration count"""
+        with override_settings(PASSWORD_HASH_ITERATIONS=3000):
+            response = await self.async_client.post(reverse('login'), self.credentials,
+                                                    content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['message'], 'Login successful')
+        self.assertEqual(data['user']['user_type'], 'renter')
+        self.assertEqual(AccessToken(data['tokens']['access'])['user_type'], 'renter')
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$3000$'))
+
+    async def test_aauthenticate_hashes_on_the_pool(self):
+        """Test that awaited authentication hashes off the event loop, unknown users included"""
+        threads = []
+
+        def verify(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return verify_password(*args, **kwargs)
+
+        with mock.patch('authentication.hashers.verify_password', verify), \
+                mock.patch('authentication.hashers.make_password', wraps=make_password) as make:
+            self.assertEqual(await aauthenticate(None, **self.credentials), self.user)
+            self.assertIsNone(await aauthenticate(None, username='nobody', password='testpass123'))
+            self.user.is_active = False
+            await self.user.asave(update_fields=['is_active'])
+            self.assertIsNone(await aauthenticate(None, **self.credentials))
+        self.assertEqual(len(threads), 2)
+        self.assertTrue(all(name.startswith('password-hash') for name in threads))
+        self.assertEqual(make.call_count, 1)
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_async_login_errors_match_sync_view(self):
+        """Test that async login rejects bad input exactly like LoginView"""
+        for payload in ({'username': 'testrenter', 'password': 'wrong'},
+                        {'username': 'nobody', 'password': 'testpass123'},
+                        {'username': 'testrenter'}):
+            response = await self.async_client.post(reverse('login'), payload)
+            with override_settings(ROOT_URLCONF='one_now_rental.urls'):
+                expected = await sync_to_async(self.client.post)(reverse('login'), payload)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.json(), expected.json())
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_async_register(self):
+        """Test async registration and its validation errors"""
+        data = {
+            'username': 'newhost',
+            'email': 'NewHost@EXAMPLE.com',
+            'password': 'testpass123',
+            'password_confirm': 'testpass123',
+            'first_name': 'New',
+            'last_name': 'Host',
+            'user_type': 'host',
+        }
+        response = await self.async_client.post(reverse('register'), data, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['user']['email'], 'NewHost@example.com')
+        user = await User.objects.aget(username='newhost')
+        self.assertEqual((user.user_type, user.first_name), ('host', 'New'))
+        self.assertTrue(await user.acheck_password('testpass123'))
+
+        response = await self.async_client.post(reverse('register'), data, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['error'], 'Registration failed')
+        self.assertIn('username', response.json()['details'])
+
+
+class ThrottlingTestCase(APITestCase):
+    """Token buckets: exact under concurrent threads, and enforced on the auth views."""
+
+    def setUp(self):
+        cache.clear()
+        throttling = override_settings(
+            THROTTLING={**settings.THROTTLING, 'ENABLED': True},
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'auth': '3/min'}},
+        )
+        throttling.enable()
+        self.addCleanup(throttling.disable)
+        self.credentials = {'username': 'nobody', 'password': 'testpass123'}
+
+    def consume_concurrently(self, store, keys, attempts):
+        """Take tokens from ``keys`` on one thread each; returns how many were granted per key."""
+        granted = {key: 0 for key in keys}
+        lock, barrier = threading.Lock(), threading.Barrier(len(keys))
+
+        def worker(key):
+            barrier.wait()
+            allowed = sum(store.consume(key, 100, 1.0) == 0 for _ in range(attempts))
+            with lock:
+                granted[key] += allowed
+
+        threads = [threading.Thread(target=worker, args=(key,)) for key in keys]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return granted
+
+    def test_local_store_is_exact_under_threads(self):
+        """Test that threads sharing a bucket get exactly its capacity between them"""
+        store = LocalBucketStore()
+        store.timer = lambda: 1000.0
+        granted = self.consume_concurrently(store, ['shared'] * 16, 50)
+        self.assertEqual(granted, {'shared': 100})
+        # Separate keys have separate buckets
+        granted = self.consume_concurrently(store, [f'user:{i}' for i in range(8)], 150)
+        self.assertEqual(set(granted.values()), {100})
+
+    def test_refill_and_wait(self):
+        """Test that buckets refill at the rate and report the wait for the next token"""
+        for store_class in (LocalBucketStore, CacheBucketStore):
+            with self.subTest(store=store_class.__name__):
+                store, now = store_class(), [1000.0]
+                store.timer = lambda: now[0]
+                self.assertEqual([store.consume('key', 2, 0.5) for _ in range(3)], [0, 0, 2.0])
+                now[0] += 1
+                self.assertEqual(store.consume('key', 2, 0.5), 1.0)
+                now[0] += 1
+                self.assertEqual(store.consume('key', 2, 0.5), 0)
+                now[0] += 100
+                self.assertEqual([store.consume('key', 2, 0.5) for _ in range(3)], [0, 0, 2.0])
+
+    def test_local_store_drops_least_recently_used(self):
+        """Test that the local store keeps at most MAX_KEYS buckets"""
+        with override_settings(THROTTLING={**settings.THROTTLING, 'MAX_KEYS': 2}):
+            store = LocalBucketStore()
+        store.timer = lambda: 1000.0
+        for key in ('a', 'b', 'a', 'c'):
+            store.consume(key, 1, 1.0)
+        self.assertEqual(list(store._buckets), ['a', 'c'])
+
+    def test_login_is_throttled_per_ip(self):
+        """Test that logins past the rate get 429 with Retry-After, per client IP"""
+        statuses = [self.client.post(reverse('login'), self.credentials).status_code for _ in range(4)]
+        self.assertEqual(statuses, [400, 400, 400, 429])
+        response = self.client.post(reverse('register'), {})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # One token per 20 seconds, partly refilled while the requests ran
+        self.assertIn(int(response['Retry-After']), range(1, 21))
+
+        response = self.client.post(reverse('login'), self.credentials, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        """Test that rotating X-Forwarded-For does not get a fresh bucket"""
+        statuses = [
+            self.client.post(reverse('login'), self.credentials, HTTP_X_FORWARDED_FOR=f'203.0.113.{i}').status_code
+            for i in range(4)
+        ]
+        self.assertEqual(statuses, [400, 400, 400, 429])
+
+    def test_forwarded_for_behind_trusted_proxy(self):
+        """Test that with NUM_PROXIES the address the proxy appended identifies the client"""
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1,
+                                               'DEFAULT_THROTTLE_RATES': {'auth': '3/min'}}):
+            statuses = [
+                self.client.post(reverse('login'), self.credentials,
+                                 HTTP_X_FORWARDED_FOR=f'198.51.100.{i}, 203.0.113.7').status_code
+                for i in range(4)
+            ]
+            self.assertEqual(statuses, [400, 400, 400, 429])
+            response = self.client.post(reverse('login'), self.credentials, HTTP_X_FORWARDED_FOR='203.0.113.8')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_disabled(self):
+        """Test that nothing is throttled with THROTTLING['ENABLED'] off"""
+        with override_settings(THROTTLING={**settings.THROTTLING, 'ENABLED': False}):
+            for _ in range(5):
+                self.assertEqual(self.client.post(reverse('login'), self.credentials).status_code, 400)
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_async_views_match_sync_views(self):
+        """Test that the async auth views throttle like the DRF views"""
+        for _ in range(3):
+            await self.async_client.post(reverse('login'), self.credentials)
+        response = await self.async_client.post(reverse('register'), {})
+        with override_settings(ROOT_URLCONF='one_now_rental.urls'):
+            expected = await sync_to_async(self.client.post)(reverse('login'), self.credentials)
+        self.assertEqual((response.status_code, expected.status_code), (status.HTTP_429_TOO_MANY_REQUESTS,) * 2)
+        self.assertEqual(response.json().keys(), expected.json().keys())
+        self.assertIn('Retry-After', response)
+
+
+@tag('slow')
+class RegistrationAtScaleTestCase(TestCase):
+    USERS = 1_000_000
+
+    @classmethod
+    def setUpTestData(cls):
+        for offset in range(0, cls.USERS, 20_000):
+            User.objects.bulk_create([
+                User(username=f'user{i}', email=f'user{i}@example.com', password='!')
+                for i in range(offset, min(offset + 20_000, cls.USERS))
+            ])
+
+    def registration(self, **overrides):
+        return UserRegistrationSerializer(data={
+            'username': 'newuser',
+            'email': 'newuser@example.com',
+            'password': 'testpass123',
+            'password_confirm': 'testpass123',
+            'first_name': 'New',
+            'last_name': 'User',
+            **overrides,
+        })
+
+    def test_uniqueness_check_uses_indexes(self):
+        """Test the registration check at 1M users: one query, no table scan"""
+        serializer = self.registration(username='user999999', email='USER123456@Example.com')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(serializer.errors, {
+            'username': ['Username already exists.'],
+            'email': ['Email already exists.'],
+        })
+
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + queries[0]['sql'])
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+            self.assertNotIn('SCAN authentication_user', plan)
+            self.assertIn('user_email_ci_unique', plan)
+
+    def test_register_new_user(self):
+        """Test that a new user still validates and saves at 1M users"""
+        serializer = self.registration()
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.save().email, 'newuser@example.com')
@@ -0,0 +1,15 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the user's ``user_type``. Access tokens made from
+    it copy the claim, which lets ``ClaimsJWTAuthentication`` skip the
+    user query.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['user_type'] = user.user_type
+        return token
@@ -1,33 +1,48 @@
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from one_now_rental.throttling import AuthThrottle
 from .serializers import UserRegistrationSerializer, UserLoginSerializer
+from .tokens import UserRefreshToken
+
+
+def auth_payload(user):
+    """The user and token pair returned by register and login."""
+    refresh = UserRefreshToken.for_user(user)
+    return {
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'user_type': user.user_type
+        },
+        'tokens': {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        }
+    }
 
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [AuthThrottle]
 
     def post(self, request):
         """Register a new user"""
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            try:
+                user = serializer.save()
+            except serializers.ValidationError as exc:
+                return Response({
+                    'error': 'Registration failed',
+                    'details': exc.detail
+                }, status=status.HTTP_400_BAD_REQUEST)
             return Response({
                 'message': 'User registered successfully',
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'user_type': user.user_type
-                },
-                'tokens': {
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                }
+                **auth_payload(user)
             }, status=status.HTTP_201_CREATED)
         return Response({
             'error': 'Registration failed',
@@ -37,25 +52,16 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [AuthThrottle]
 
     def post(self, request):
         """Login user and return JWT token"""
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
             return Response({
                 'message': 'Login successful',
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'user_type': user.user_type
-                },
-                'tokens': {
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                }
+                **auth_payload(user)
             }, status=status.HTTP_200_OK)
         return Response({
             'error': 'Login failed',
@@ -0,0 +1,10 @@
+"""
+Performance benchmarks for the rental API.
+
+Each module is a standalone script run from the project directory, e.g.::
+
+    python -m benchmarks.availability --vehicles 100000 --bookings 1000000
+
+Benchmarks build a throwaway test database, so they never touch the
+configured one.
+"""
@@ -0,0 +1,58 @@
+"""
+Latency and query count of GET /api/analytics/host/ on a seeded dataset.
+
+Seeding bulk-creates bookings without signals, so the daily stats rollup is
+rebuilt afterwards; ``rebuild_s`` reports how long that took.
+
+    python -m benchmarks.analytics --vehicles 10000 --bookings 1000000
+"""
+import time
+from datetime import date, timedelta
+
+from benchmarks import common
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=10000, bookings=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.core.management import call_command
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    hosts, _ = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    started = time.perf_counter()
+    call_command('rebuild_booking_stats', verbosity=0)
+    rebuild_s = round(time.perf_counter() - started, 1)
+    client = APIClient()
+    url = reverse('host-analytics')
+    today = date.today()
+    cases = {
+        'day_30d': {'from': today - timedelta(days=29), 'to': today, 'granularity': 'day'},
+        'week_1y': {'from': today - timedelta(days=364), 'to': today, 'granularity': 'week'},
+        'month_5y': {'from': today - timedelta(days=5 * 365), 'to': today, 'granularity': 'month'},
+    }
+
+    results = {'vehicles': args.vehicles, 'bookings': args.bookings, 'rebuild_s': rebuild_s}
+    for name, params in cases.items():
+        hosts_cycle = iter(hosts * (args.repeat // len(hosts) + 1))
+
+        def request():
+            client.force_authenticate(next(hosts_cycle))
+            response = client.get(url, params)
+            assert response.status_code == 200, response.content
+
+        # Seeding overflows the query log, which would hide the count
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            request()
+        results[name] = {'queries': len(queries), **common.summarize(common.timed(request, args.repeat))}
+    common.report('analytics', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Requests per second on GET /api/vehicles/ with JWTAuthentication, which
+loads the user row per request, versus ClaimsJWTAuthentication, which
+builds the user from the token's claims.
+
+    python -m benchmarks.auth --requests 2000
+
+Each request carries a real access token from UserRefreshToken, cycling
+over the seeded hosts. ``cached`` runs with the response cache serving the
+list, where authentication is most of the remaining work; ``uncached``
+turns the response cache off.
+"""
+import time
+
+from benchmarks import common
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=1000, bookings=0)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from authentication.backends import ClaimsJWTAuthentication
+    from authentication.tokens import UserRefreshToken
+    from vehicles.views import VehicleListCreateView
+
+    hosts, _ = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    tokens = [f'Bearer {UserRefreshToken.for_user(host).access_token}' for host in hosts]
+    client = APIClient()
+    url = reverse('vehicle-list-create')
+
+    def run():
+        samples = []
+        started = time.perf_counter()
+        for i in range(args.requests):
+            sent = time.perf_counter()
+            response = client.get(url, HTTP_AUTHORIZATION=tokens[i % len(tokens)])
+            samples.append((time.perf_counter() - sent) * 1000)
+            assert response.status_code == 200, response.content
+        return round(args.requests / (time.perf_counter() - started), 1), samples
+
+    results = {'vehicles': args.vehicles, 'requests': args.requests}
+    for case, enabled in (('cached', True), ('uncached', False)):
+        results[case] = {}
+        with override_settings(RESPONSE_CACHE={'ENABLED': enabled, 'ALIAS': 'default', 'TIMEOUT': 300}):
+            for name, auth_class in (('jwt', JWTAuthentication), ('claims', ClaimsJWTAuthentication)):
+                VehicleListCreateView.authentication_classes = [auth_class]
+                run()  # warm the response cache and the claims user cache
+                rps, samples = run()
+                results[case][name] = {'requests_per_s': rps, **common.summarize(samples)}
+        results[case]['speedup'] = round(
+            results[case]['claims']['requests_per_s'] / results[case]['jwt']['requests_per_s'], 2
+        )
+    common.report('auth', results)
+
+
+if __name__ == '__main__':
+    main()
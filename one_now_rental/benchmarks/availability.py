@@ -0,0 +1,52 @@
+"""
+Latency of GET /api/vehicles/available/ on a large fleet.
+
+    python -m benchmarks.availability --vehicles 100000 --bookings 1000000
+
+Exits non-zero when the p95 latency exceeds ``--budget-ms``.
+"""
+import random
+import sys
+from datetime import date, timedelta
+
+from benchmarks import common
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=100_000, bookings=1_000_000)
+    parser.add_argument('--searches', type=int, default=50)
+    parser.add_argument('--budget-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    _, renters = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    client = APIClient()
+    client.force_authenticate(renters[0])
+    url = reverse('vehicle-availability')
+
+    rng = random.Random(args.seed)
+    types = ['sedan', 'suv', 'hatchback', 'coupe', 'convertible', 'truck', 'van']
+
+    def search():
+        start = date.today() + timedelta(days=rng.randint(1, 180))
+        params = {'start': start, 'end': start + timedelta(days=rng.randint(1, 7))}
+        if rng.random() < 0.5:
+            params['vehicle_type'] = rng.choice(types)
+        if rng.random() < 0.5:
+            params['max_rate'] = rng.randint(50, 250)
+        response = client.get(url, params)
+        assert response.status_code == 200, response.content
+
+    search()  # warm up connection and caches
+    results = common.summarize(common.timed(search, args.searches))
+    results.update(vehicles=args.vehicles, bookings=args.bookings, budget_ms=args.budget_ms)
+    common.report('availability', results)
+    if results['p95_ms'] > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Query count and wall time of N single POST /api/bookings/ requests versus
+one POST /api/bookings/bulk/ carrying the same N bookings.
+
+    python -m benchmarks.bulk_bookings --items 200
+"""
+import time
+from datetime import date, timedelta
+
+from benchmarks import common
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=200, bookings=2000)
+    parser.add_argument('--items', type=int, default=200)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from vehicles.models import Vehicle
+
+    _, renters = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    client = APIClient()
+    client.force_authenticate(renters[0])
+    vehicle_ids = list(Vehicle.objects.filter(is_available=True).values_list('id', flat=True))
+
+    def items(first_day):
+        # Past the seeded bookings, three days apart per vehicle
+        base = date.today() + timedelta(days=first_day)
+        return [
+            {
+                'vehicle': vehicle_ids[i % len(vehicle_ids)],
+                'start_date': base + timedelta(days=3 * (i // len(vehicle_ids))),
+                'end_date': base + timedelta(days=3 * (i // len(vehicle_ids)) + 2),
+            }
+            for i in range(args.items)
+        ]
+
+    def measure(send):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            send()
+            elapsed = (time.perf_counter() - started) * 1000
+        return {'queries': len(queries), 'total_ms': round(elapsed, 3)}
+
+    def single():
+        for item in items(400):
+            response = client.post(reverse('booking-list-create'), item, format='json')
+            assert response.status_code == 201, response.content
+
+    def bulk():
+        response = client.post(reverse('booking-bulk-create'), {'bookings': items(800)}, format='json')
+        assert response.status_code == 201, response.content
+
+    results = {'items': args.items, 'single_posts': measure(single), 'bulk_post': measure(bulk)}
+    results['query_ratio'] = round(results['single_posts']['queries'] / results['bulk_post']['queries'], 1)
+    common.report('bulk_bookings', results)
+
+
+if __name__ == '__main__':
+    main()
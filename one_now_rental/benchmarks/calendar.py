@@ -0,0 +1,75 @@
+"""
+Availability calendars for the next 365 days: the occupancy bitmap lookup
+alone, the single and batch endpoints, and the per-day overlap query the
+bitmaps replace.
+
+    python -m benchmarks.calendar --vehicles 10000 --bookings 200000
+
+``bitmap_us`` times ``Occupancy.calendar()`` on a cached bitmap, in
+microseconds; the other cases are whole requests, in milliseconds.
+"""
+import random
+from datetime import date, timedelta
+
+from benchmarks import common
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=10_000, bookings=200_000)
+    parser.add_argument('--samples', type=int, default=50)
+    parser.add_argument('--batch', type=int, default=50, help='vehicles per batch request')
+    args = parser.parse_args()
+
+    common.setup()
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from bookings import occupancy
+    from bookings.models import Booking
+    from vehicles.models import Vehicle
+
+    _, renters = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    client = APIClient()
+    client.force_authenticate(renters[0])
+    rng = random.Random(args.seed)
+    vehicle_ids = list(Vehicle.objects.values_list('pk', flat=True))
+    start, end = date.today(), date.today() + timedelta(days=365)
+    # Build every bitmap up front, as a warm cache would hold them
+    occupancy.get_occupancies(vehicle_ids)
+
+    def get(url, params):
+        response = client.get(url, params)
+        assert response.status_code == 200, response.content
+
+    def bitmap():
+        occupancy.get_occupancies([rng.choice(vehicle_ids)])
+
+    def single():
+        get(reverse('vehicle-calendar', args=[rng.choice(vehicle_ids)]), {})
+
+    def batch():
+        ids = rng.sample(vehicle_ids, min(args.batch, len(vehicle_ids)))
+        get(reverse('vehicle-calendar-batch'), {'ids': ','.join(map(str, ids))})
+
+    def per_day_queries():
+        vehicle_id = rng.choice(vehicle_ids)
+        bookings = Booking.objects.active().filter(vehicle_id=vehicle_id)
+        [bookings.overlapping(start + timedelta(days=i), start + timedelta(days=i + 1)).exists()
+         for i in range(365)]
+
+    held = occupancy.get_occupancies([vehicle_ids[0]])[vehicle_ids[0]]
+    bitmap_ms = common.summarize(common.timed(lambda: held.calendar(start, end), args.samples * 20))
+    single(), batch()  # warm up the connection and URL resolution
+    results = {
+        'vehicles': args.vehicles,
+        'bookings': args.bookings,
+        'bitmap_us': {f'{key}_us': round(bitmap_ms[f'{key}_ms'] * 1000, 1) for key in ('p50', 'p95', 'p99')},
+        'cached_lookup_ms': common.summarize(common.timed(bitmap, args.samples)),
+        'endpoint_ms': common.summarize(common.timed(single, args.samples)),
+        f'batch_{args.batch}_ms': common.summarize(common.timed(batch, args.samples)),
+        'per_day_queries_ms': common.summarize(common.timed(per_day_queries, max(1, args.samples // 10))),
+    }
+    common.report('calendar', results)
+
+
+if __name__ == '__main__':
+    main()
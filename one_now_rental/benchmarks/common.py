@@ -0,0 +1,72 @@
+import argparse
+import atexit
+import json
+import os
+import statistics
+import time
+
+
+def setup():
+    """
+    Configure Django and switch to a fresh benchmark database, with
+    throttling off. It is named apart from the test database, so
+    benchmarks and ``manage.py test`` can run at the same time.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'one_now_rental.settings')
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    override_settings(THROTTLING={**settings.THROTTLING, 'ENABLED': False}).enable()
+    old_name = connection.settings_dict['NAME']
+    if connection.vendor == 'sqlite':
+        bench_name = str(settings.BASE_DIR / 'bench_db.sqlite3')
+    else:
+        bench_name = f'bench_{old_name}'
+    connection.settings_dict['TEST']['NAME'] = bench_name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    atexit.register(connection.creation.destroy_test_db, old_name, verbosity=0)
+
+
+def parser(description, **defaults):
+    """Argument parser with the dataset-size options every benchmark shares."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--vehicles', type=int, default=defaults.get('vehicles', 1000))
+    parser.add_argument('--bookings', type=int, default=defaults.get('bookings', 10000))
+    parser.add_argument('--seed', type=int, default=42)
+    return parser
+
+
+def seed(vehicles, bookings, seed=42, batch_size=5000):
+    """``one_now_rental.perf_data.seed_dataset()``; returns ``(hosts, renters)``."""
+    from one_now_rental.perf_data import seed_dataset
+    return seed_dataset(vehicles, bookings, seed=seed, batch_size=batch_size)
+
+
+def timed(fn, repeat):
+    """Call ``fn`` ``repeat`` times and return per-call latencies in ms."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(samples):
+    cuts = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+    return {
+        'count': len(samples),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'p50_ms': round(cuts[49], 3),
+        'p95_ms': round(cuts[94], 3),
+        'p99_ms': round(cuts[98], 3),
+    }
+
+
+def report(name, results):
+    print(json.dumps({'benchmark': name, **results}, indent=2, default=str))
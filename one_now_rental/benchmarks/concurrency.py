@@ -0,0 +1,108 @@
+"""
+Read throughput and latency with many concurrent clients, served three ways:
+
+* ``wsgi``: the sync DRF views on ``--threads`` worker threads, as under a
+  threaded WSGI server.
+* ``asgi_sync``: the sync DRF views under ASGI, where Django runs each one
+  on its sync thread.
+* ``asgi_async``: the async views from ``one_now_rental.asgi_urls``.
+
+    python -m benchmarks.concurrency --clients 1000 --requests 4 --threads 8
+
+Every client arrives at once and sends ``--requests`` GETs one after the
+other, alternating between its list and one of its detail pages (vehicles
+for hosts, bookings for renters). Latencies run from when a request could
+first be sent. The response cache is off unless ``--cache`` is given.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import common
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=1000, bookings=20000)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=4, help='sequential requests per client')
+    parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+    parser.add_argument('--cache', action='store_true', help='keep the response cache on')
+    args = parser.parse_args()
+
+    common.setup()
+    from django.conf import settings
+    from django.test import AsyncClient, Client, override_settings
+    from authentication.tokens import UserRefreshToken
+    from bookings.models import Booking
+    from one_now_rental.asgi import ASGI_URLCONF
+    from vehicles.models import Vehicle
+
+    hosts, renters = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    vehicle_ids = dict(Vehicle.objects.order_by('owner_id', '-id').values_list('owner_id', 'id'))
+    booking_ids = dict(Booking.objects.order_by('renter_id', '-id').values_list('renter_id', 'id'))
+    plans = []
+    for user in hosts + renters:
+        if user in hosts:
+            paths = ('/api/vehicles/', f'/api/vehicles/{vehicle_ids[user.pk]}/')
+        elif user.pk in booking_ids:
+            paths = ('/api/bookings/', f'/api/bookings/{booking_ids[user.pk]}/')
+        else:
+            continue
+        headers = {'Authorization': f'Bearer {UserRefreshToken.for_user(user).access_token}'}
+        plans.append((headers, paths))
+    clients = [plans[i % len(plans)] for i in range(args.clients)]
+
+    def run_wsgi():
+        def serve(headers, paths, arrived):
+            client, latencies = Client(), []
+            for i in range(args.requests):
+                response = client.get(paths[i % 2], headers=headers)
+                assert response.status_code == 200, response.content
+                now = time.perf_counter()
+                latencies.append((now - arrived) * 1000)
+                arrived = now
+            return latencies
+
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            arrived = time.perf_counter()
+            futures = [pool.submit(serve, headers, paths, arrived) for headers, paths in clients]
+            return [latency for future in futures for latency in future.result()]
+
+    async def run_asgi():
+        client = AsyncClient()
+
+        async def serve(headers, paths, arrived):
+            latencies = []
+            for i in range(args.requests):
+                response = await client.get(paths[i % 2], headers=headers)
+                assert response.status_code == 200, response.content
+                now = time.perf_counter()
+                latencies.append((now - arrived) * 1000)
+                arrived = now
+            return latencies
+
+        arrived = time.perf_counter()
+        results = await asyncio.gather(*(serve(headers, paths, arrived) for headers, paths in clients))
+        return [latency for latencies in results for latency in latencies]
+
+    modes = (
+        ('wsgi', settings.ROOT_URLCONF, run_wsgi),
+        ('asgi_sync', settings.ROOT_URLCONF, lambda: asyncio.run(run_asgi())),
+        ('asgi_async', ASGI_URLCONF, lambda: asyncio.run(run_asgi())),
+    )
+    results = {'clients': args.clients, 'requests': args.requests, 'threads': args.threads, 'cache': args.cache}
+    cache_settings = {**settings.RESPONSE_CACHE, 'ENABLED': args.cache}
+    for name, urlconf, run in modes:
+        with override_settings(ROOT_URLCONF=urlconf, RESPONSE_CACHE=cache_settings):
+            started = time.perf_counter()
+            latencies = run()
+            elapsed = time.perf_counter() - started
+        results[name] = {
+            'requests_per_s': round(len(latencies) / elapsed, 1),
+            'latency': common.summarize(latencies),
+        }
+    common.report('concurrency', results)
+
+
+if __name__ == '__main__':
+    main()
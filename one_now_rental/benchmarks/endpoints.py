@@ -0,0 +1,218 @@
+"""
+Latency and query counts of every endpoint in ``one_now_rental.urls``,
+driven through the test client against a seeded database.
+
+    python -m benchmarks.endpoints --requests 200 --output current.json
+    python -m benchmarks.endpoints --baseline main.json --threshold 20
+
+Each case (a method on a named route) gets one untimed warm-up request,
+whose queries are counted, then ``--requests`` timed ones. Writes send a
+fresh payload every time, so each one does the full work of a successful
+request. Streaming exports are read to the end inside the timing. The
+response cache is off unless ``--cache`` is given.
+
+With ``--baseline``, cases whose p95 grew by more than ``--threshold``
+percent (and at least ``--min-delta`` ms), or that now run more queries,
+are listed and the script exits with status 1. The admin site is not
+benchmarked; any other named route without a case is an error.
+"""
+import json
+import logging
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmarks import common
+
+
+def route_names(patterns, skip=('admin',)):
+    """Names of the routes in ``patterns``, outside the ``skip`` namespaces."""
+    from django.urls import URLResolver
+
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace not in skip:
+                names |= route_names(pattern.url_patterns, skip)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Regressions of ``results`` against ``baseline``, as printable lines."""
+    regressions = []
+    for case, current in results['cases'].items():
+        previous = baseline.get('cases', {}).get(case)
+        if previous is None:
+            continue
+        old, new = previous['latency']['p95_ms'], current['latency']['p95_ms']
+        if new > old * (1 + threshold / 100) and new - old >= min_delta:
+            regressions.append(f'{case}: p95 {old} ms -> {new} ms (+{100 * (new / old - 1):.0f}%)')
+        if current['queries'] > previous['queries']:
+            regressions.append(f'{case}: {previous["queries"]} -> {current["queries"]} queries')
+    return regressions
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=1000, bookings=20000)
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per case')
+    parser.add_argument('--cache', action='store_true', help='keep the response cache on')
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    parser.add_argument('--baseline', help='results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='allowed p95 growth over the baseline, in percent')
+    parser.add_argument('--min-delta', type=float, default=1.0,
+                        help='ignore p95 growth below this many ms')
+    args = parser.parse_args()
+
+    common.setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import get_resolver, reverse
+    from authentication.tokens import UserRefreshToken
+    from bookings.models import Booking
+    from one_now_rental.perf_data import PASSWORD
+    from vehicles.models import Vehicle
+
+    hosts, renters = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    host = hosts[0]
+    renter = Booking.objects.order_by('id').first().renter
+    User = get_user_model()
+    staff = User.objects.create_user('benchstaff', 'benchstaff@example.com', PASSWORD, is_staff=True)
+    # Writes go to a host and vehicles of their own, clear of the seeded calendar
+    writer = User.objects.create_user('benchhost', 'benchhost@example.com', PASSWORD, user_type='host')
+    single, bulk = (
+        Vehicle.objects.create(owner=writer, make='Bench', model=name, year=2024,
+                               plate_number=f'BENCH-{name}', daily_rate=50)
+        for name in ('single', 'bulk')
+    )
+    tokens = {
+        user.pk: f'Bearer {UserRefreshToken.for_user(user).access_token}'
+        for user in (host, renter, staff, writer)
+    }
+    vehicle = Vehicle.objects.filter(owner=host).order_by('id').first()
+    future = date.today() + timedelta(days=1000)
+    # Bookings that started already cannot be saved, so PATCH gets an upcoming one
+    booking = Booking.objects.create(renter=renter, vehicle=single, start_date=future - timedelta(days=7),
+                                     end_date=future - timedelta(days=4), total_amount=150)
+    client = Client()
+
+    def created_vehicle(i):
+        return reverse('vehicle-detail', args=[Vehicle.objects.get(plate_number=f'BENCH{i:07d}').pk])
+
+    # (route, method, user, path or path(i), payload(i) or query)
+    cases = [
+        ('register', 'post', None, None, lambda i: {
+            'username': f'bench{i}', 'email': f'bench{i}@example.com',
+            'password': 'Bench-pass-123', 'password_confirm': 'Bench-pass-123',
+            'first_name': 'Bench', 'last_name': 'User',
+        }),
+        ('login', 'post', None, None, lambda i: {'username': host.username, 'password': PASSWORD}),
+        ('vehicle-list-create', 'get', host, None, None),
+        ('vehicle-list-create', 'post', writer, None, lambda i: {
+            'make': 'Bench', 'model': 'Car', 'year': 2024, 'plate_number': f'BENCH{i:07d}',
+            'vehicle_type': 'sedan', 'daily_rate': '60.00',
+        }),
+        ('vehicle-export', 'get', host, None, None),
+        ('vehicle-availability', 'get', renter, None, {
+            'start': date.today() + timedelta(days=400), 'end': date.today() + timedelta(days=403),
+        }),
+        ('vehicle-calendar', 'get', renter, reverse('vehicle-calendar', args=[vehicle.pk]), None),
+        ('vehicle-calendar-batch', 'get', renter, None, {
+            'ids': ','.join(str(pk) for pk in Vehicle.objects.order_by('id').values_list('pk', flat=True)[:50]),
+        }),
+        ('vehicle-detail', 'get', host, reverse('vehicle-detail', args=[vehicle.pk]), None),
+        ('vehicle-detail', 'patch', host, reverse('vehicle-detail', args=[vehicle.pk]),
+         lambda i: {'daily_rate': f'{50 + i % 100}.00'}),
+        # Deletes the vehicles the POST case created
+        ('vehicle-detail', 'delete', writer, created_vehicle, None),
+        ('booking-list-create', 'get', renter, None, None),
+        ('booking-list-create', 'post', renter, None, lambda i: {
+            'vehicle': single.pk,
+            'start_date': (future + timedelta(days=4 * i)).isoformat(),
+            'end_date': (future + timedelta(days=4 * i + 3)).isoformat(),
+        }),
+        ('booking-export', 'get', renter, None, None),
+        ('booking-bulk-create', 'post', renter, None, lambda i: {'bookings': [
+            {
+                'vehicle': bulk.pk,
+                'start_date': (future + timedelta(days=4 * (10 * i + k))).isoformat(),
+                'end_date': (future + timedelta(days=4 * (10 * i + k) + 3)).isoformat(),
+            }
+            for k in range(10)
+        ]}),
+        ('booking-detail', 'get', renter, reverse('booking-detail', args=[booking.pk]), None),
+        ('booking-detail', 'patch', renter, reverse('booking-detail', args=[booking.pk]),
+         lambda i: {'notes': f'Benchmark note {i}'}),
+        ('host-analytics', 'get', host, None, {'granularity': 'day'}),
+        ('response-cache-stats', 'get', staff, None, None),
+        ('metrics', 'get', None, None, None),
+        ('schema-swagger-ui', 'get', None, None, {'format': 'openapi'}),
+    ]
+    # Schema generation logs a warning per view it cannot introspect anonymously
+    logging.getLogger('drf_yasg').setLevel(logging.ERROR)
+    missing = route_names(get_resolver().url_patterns) - {route for route, *_ in cases}
+    if missing:
+        sys.exit(f'No benchmark case for: {", ".join(sorted(missing))}')
+
+    def request(route, method, user, path, payload, i):
+        """Send one request; returns the response, fully read."""
+        if path is None:
+            path = reverse(route)
+        elif callable(path):
+            path = path(i)
+        headers = {'Authorization': tokens[user.pk]} if user else {}
+        if method == 'get':
+            response = client.get(path, payload, headers=headers)
+        else:
+            data = payload(i) if payload else None
+            response = getattr(client, method)(path, data, content_type='application/json', headers=headers)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        assert response.status_code < 300, (route, method, response.status_code, response.content)
+        return response
+
+    results = {'vehicles': args.vehicles, 'bookings': args.bookings,
+               'requests': args.requests, 'cache': args.cache, 'cases': {}}
+    # Without DEBUG, only the warm-up requests log their queries
+    with override_settings(DEBUG=False, RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': args.cache}):
+        for route, method, user, path, payload in cases:
+            with CaptureQueriesContext(connection) as queries:
+                request(route, method, user, path, payload, 0)
+            # Read now, as the next request resets the query log
+            query_count = len(queries)
+            samples = []
+            for i in range(1, args.requests + 1):
+                if callable(path):
+                    # Resolved outside the timing
+                    resolved = path(i)
+                else:
+                    resolved = path
+                started = time.perf_counter()
+                request(route, method, user, resolved, payload, i)
+                samples.append((time.perf_counter() - started) * 1000)
+            results['cases'][f'{method.upper()} {route}'] = {
+                'queries': query_count,
+                'latency': common.summarize(samples),
+            }
+
+    common.report('endpoints', results)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'benchmark': 'endpoints', **results}, output, indent=2, default=str)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), args.threshold, args.min_delta)
+        for line in regressions:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Cost of PerformanceMiddleware: requests per second on GET /api/bookings/
+with the instrumentation on and off.
+
+    python -m benchmarks.instrumentation --requests 2000
+
+``cached`` serves the list from the response cache, so per-request
+overhead weighs the most; ``uncached`` runs the queries and serializers the
+middleware times. The response cache is warmed before measuring.
+"""
+import time
+
+from benchmarks import common
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=1000, bookings=20000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.conf import settings
+    from django.test import Client, override_settings
+    from django.urls import reverse
+    from authentication.tokens import UserRefreshToken
+
+    _, renters = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    tokens = [f'Bearer {UserRefreshToken.for_user(renter).access_token}' for renter in renters]
+    url = reverse('booking-list-create')
+
+    def run():
+        # A new client loads the middleware under the current settings
+        client = Client()
+        samples = []
+        started = time.perf_counter()
+        for i in range(args.requests):
+            sent = time.perf_counter()
+            response = client.get(url, headers={'Authorization': tokens[i % len(tokens)]})
+            samples.append((time.perf_counter() - sent) * 1000)
+            assert response.status_code == 200, response.content
+        return round(args.requests / (time.perf_counter() - started), 1), samples
+
+    results = {'vehicles': args.vehicles, 'bookings': args.bookings, 'requests': args.requests}
+    for case, cached in (('cached', True), ('uncached', False)):
+        results[case] = {}
+        with override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': cached}):
+            for name, enabled in (('off', False), ('on', True)):
+                with override_settings(PERFORMANCE_METRICS={**settings.PERFORMANCE_METRICS, 'ENABLED': enabled}):
+                    run()
+                    rps, samples = run()
+                results[case][name] = {'requests_per_s': rps, **common.summarize(samples)}
+        results[case]['overhead_pct'] = round(
+            100 * (1 - results[case]['on']['requests_per_s'] / results[case]['off']['requests_per_s']), 1
+        )
+    common.report('instrumentation', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+A login surge against the sync LoginView on a pool of worker threads (as
+under a threaded WSGI server) versus the async login view on one event
+loop that hashes on ``PASSWORD_HASH_WORKERS`` threads (as under ASGI).
+
+    python -m benchmarks.logins --logins 200 --workers 4 --iterations 1000000
+
+All logins arrive at once. While they are served, a probe requests
+GET /api/vehicles/ every ``--probe-interval`` ms; ``probe`` is the latency
+other traffic sees during the surge. Latencies run from arrival to
+response. ``--iterations`` sets PASSWORD_HASH_ITERATIONS and users are
+stored with that count, so no login triggers a rehash.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from benchmarks import common
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=100, bookings=0)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4,
+                        help='sync worker threads and async hash threads')
+    parser.add_argument('--iterations', type=int, default=None)
+    parser.add_argument('--probe-interval', type=float, default=50)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.test import AsyncClient, Client, override_settings
+    from authentication.tokens import UserRefreshToken
+    from one_now_rental.asgi import ASGI_URLCONF
+
+    iterations = args.iterations or settings.PASSWORD_HASH_ITERATIONS
+    override = override_settings(PASSWORD_HASH_ITERATIONS=iterations, PASSWORD_HASH_WORKERS=args.workers)
+    override.enable()
+    hosts, _ = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    probe_auth = f'Bearer {UserRefreshToken.for_user(hosts[0]).access_token}'
+    User = get_user_model()
+    password = make_password('benchpass123')
+    User.objects.bulk_create([
+        User(username=f'login{i}', email=f'login{i}@example.com', password=password)
+        for i in range(args.users)
+    ])
+    payloads = [{'username': f'login{i % args.users}', 'password': 'benchpass123'} for i in range(args.logins)]
+    interval = args.probe_interval / 1000
+
+    def run_sync():
+        def call(path, arrived, **kwargs):
+            response = Client().get(path, **kwargs) if 'data' not in kwargs else Client().post(path, **kwargs)
+            assert response.status_code == 200, response.content
+            return (time.perf_counter() - arrived) * 1000
+
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            arrived = time.perf_counter()
+            logins = [pool.submit(call, '/api/auth/login/', arrived, data=payload) for payload in payloads]
+            probes = []
+            while not all(future.done() for future in logins):
+                probes.append(pool.submit(call, '/api/vehicles/', time.perf_counter(),
+                                          headers={'Authorization': probe_auth}))
+                time.sleep(interval)
+            wait(probes)
+        return [future.result() for future in logins], [future.result() for future in probes]
+
+    async def run_async():
+        client = AsyncClient()
+
+        async def call(path, arrived, **kwargs):
+            if 'data' in kwargs:
+                response = await client.post(path, **kwargs)
+            else:
+                response = await client.get(path, **kwargs)
+            assert response.status_code == 200, response.content
+            return (time.perf_counter() - arrived) * 1000
+
+        arrived = time.perf_counter()
+        logins = [asyncio.ensure_future(call('/api/auth/login/', arrived, data=payload)) for payload in payloads]
+        probes = []
+        while not all(task.done() for task in logins):
+            probes.append(asyncio.ensure_future(
+                call('/api/vehicles/', time.perf_counter(), headers={'Authorization': probe_auth})
+            ))
+            await asyncio.sleep(interval)
+        return await asyncio.gather(*logins), await asyncio.gather(*probes)
+
+    results = {'logins': args.logins, 'workers': args.workers, 'iterations': iterations}
+    for name, run in (('sync', run_sync), ('async', lambda: asyncio.run(run_async()))):
+        with override_settings(ROOT_URLCONF=ASGI_URLCONF if name == 'async' else settings.ROOT_URLCONF):
+            logins, probes = run()
+        results[name] = {
+            # Every login arrived at the start, so the slowest marks the end of the surge
+            'logins_per_s': round(args.logins / (max(logins) / 1000), 1),
+            'login': common.summarize(logins),
+            'probe': common.summarize(probes),
+        }
+    override.disable()
+    common.report('logins', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Latency of deep pages of GET /api/bookings/ for one renter with a long
+booking history: OFFSET pages (with and without COUNT(*)) versus keyset
+cursors.
+
+    python -m benchmarks.pagination --history 100000
+
+Cursor pages are reached by following ``next`` links. Every page on the
+way is timed, and the latencies are reported around each checkpoint page.
+"""
+import time
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks import common
+
+CHECKPOINTS = (1, 10, 100, 1000, 5000)
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=1000, bookings=100_000)
+    parser.add_argument('--history', type=int, default=100_000,
+                        help='bookings owned by the benchmarked renter')
+    parser.add_argument('--samples', type=int, default=5)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from bookings.models import Booking
+    from vehicles.models import Vehicle
+
+    _, renters = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    renter = renters[0]
+    vehicle = Vehicle.objects.exclude(owner=renter).first()
+    first = date.today() + timedelta(days=1000)
+    for offset in range(0, args.history, 5000):
+        Booking.objects.bulk_create([
+            Booking(renter=renter, vehicle=vehicle, start_date=first + timedelta(days=i),
+                    end_date=first + timedelta(days=i + 1), total_amount=vehicle.daily_rate)
+            for i in range(offset, min(offset + 5000, args.history))
+        ])
+
+    client = APIClient()
+    client.force_authenticate(renter)
+    url = reverse('booking-list-create')
+    last_page = Booking.objects.filter(renter=renter).count() // 20
+    checkpoints = [page for page in CHECKPOINTS if page <= last_page]
+
+    def get(params):
+        response = client.get(url, params)
+        assert response.status_code == 200, response.content
+        return response
+
+    results = {'history': args.history, 'pages': {}}
+    for page in checkpoints:
+        results['pages'][page] = {
+            'offset_ms': common.summarize(common.timed(lambda: get({'page': page}), args.samples))['p50_ms'],
+            'offset_uncounted_ms': common.summarize(
+                common.timed(lambda: get({'page': page, 'count': 'false'}), args.samples)
+            )['p50_ms'],
+        }
+
+    # Follow next links from the start, timing every page on the way
+    cursor_ms, params = {}, {'cursor': ''}
+    for page in range(1, checkpoints[-1] + 1):
+        started = time.perf_counter()
+        response = get(params)
+        cursor_ms[page] = (time.perf_counter() - started) * 1000
+        if response.data['next']:
+            params = {'cursor': parse_qs(urlparse(response.data['next']).query)['cursor'][0]}
+    for page in checkpoints:
+        nearby = [cursor_ms[p] for p in range(max(1, page - args.samples + 1), page + 1)]
+        results['pages'][page]['cursor_ms'] = round(sorted(nearby)[len(nearby) // 2], 3)
+
+    common.report('pagination', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Serializing N bookings with BookingSerializer versus its compiled
+values()-based read path.
+
+``serialize`` times the representation step alone, on rows that are already
+fetched: model instances for the serializer and values() dicts for the
+compiled path. ``end_to_end`` times the queryset all the way to rendered
+JSON bytes, including the fetch.
+
+    python -m benchmarks.serializers --rows 10000
+
+The garbage collector is paused while timing, as timeit does, so that
+collection passes over the row dicts do not dominate either side.
+"""
+import gc
+
+from benchmarks import common
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=1000, bookings=10000)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    common.setup()
+    from rest_framework.renderers import JSONRenderer
+    from bookings.models import Booking
+    from bookings.serializers import BookingSerializer
+    from one_now_rental.fast_serializers import compile_serializer
+    from one_now_rental.serializers import eager_queryset
+
+    common.seed(args.vehicles, max(args.bookings, args.rows), seed=args.seed)
+    queryset = Booking.objects.order_by('-created_at', '-id')
+    renderer = JSONRenderer()
+    compiled = compile_serializer(BookingSerializer)
+
+    def fetch_instances():
+        return list(eager_queryset(queryset, BookingSerializer)[:args.rows])
+
+    def fetch_rows():
+        return list(compiled.values(queryset)[:args.rows])
+
+    instances, rows = fetch_instances(), fetch_rows()
+    assert renderer.render(BookingSerializer(instances, many=True).data) == renderer.render(
+        compiled.represent(rows)
+    ), 'compiled output differs from BookingSerializer'
+
+    cases = {
+        'serialize': (
+            lambda: BookingSerializer(instances, many=True).data,
+            lambda: compiled.represent(rows),
+        ),
+        'end_to_end': (
+            lambda: renderer.render(BookingSerializer(fetch_instances(), many=True).data),
+            lambda: renderer.render(compiled.represent(fetch_rows())),
+        ),
+    }
+
+    results = {'rows': args.rows}
+    gc.disable()
+    for case, (drf, fast) in cases.items():
+        results[case] = {}
+        for name, fn in (('serializer', drf), ('compiled', fast)):
+            gc.collect()
+            results[case][name] = common.summarize(common.timed(fn, args.repeat))
+        results[case]['speedup'] = round(
+            results[case]['serializer']['p50_ms'] / results[case]['compiled']['p50_ms'], 1
+        )
+    gc.enable()
+    common.report('serializers', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Payload size and latency of the booking and vehicle lists in full versus
+the narrow shape a mobile list screen asks for with ``?fields=``.
+
+    python -m benchmarks.sparse_fields --requests 100 --page-size 100
+
+Each case reports the rendered body size of one page, the columns the
+page query selects, and p50/p95/p99 latency over ``--requests`` requests.
+The response cache is off, so every request does the full work.
+"""
+from benchmarks import common
+
+MOBILE_BOOKING_FIELDS = 'id,start_date,end_date,status,vehicle_details.make,vehicle_details.model'
+MOBILE_VEHICLE_FIELDS = 'id,make,model,daily_rate,is_available'
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=1000, bookings=20000)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--page-size', type=int, default=100)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.conf import settings
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from bookings.models import Booking
+    from vehicles.models import Vehicle
+
+    hosts, renters = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    renter = max(renters, key=lambda user: Booking.objects.filter(renter=user).count())
+    host = max(hosts, key=lambda user: Vehicle.objects.filter(owner=user).count())
+
+    cases = {
+        'bookings': (renter, reverse('booking-list-create'), MOBILE_BOOKING_FIELDS),
+        'vehicles': (host, reverse('vehicle-list-create'), MOBILE_VEHICLE_FIELDS),
+    }
+    results = {'page_size': args.page_size}
+    with override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False},
+                           REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'PAGE_SIZE': args.page_size}):
+        for case, (user, url, fields) in cases.items():
+            client = APIClient()
+            client.force_authenticate(user)
+            results[case] = {}
+            for shape, params in (('full', {}), ('mobile', {'fields': fields})):
+                def get():
+                    response = client.get(url, params)
+                    assert response.status_code == 200, response.content
+                    return response
+
+                with CaptureQueriesContext(connection) as queries:
+                    body = get().content
+                page_query = queries.captured_queries[-1]['sql']
+                results[case][shape] = {
+                    'payload_bytes': len(body),
+                    'selected_columns': page_query.split(' FROM ', 1)[0].count(',') + 1,
+                    'latency': common.summarize(common.timed(get, args.requests)),
+                }
+            full, mobile = results[case]['full'], results[case]['mobile']
+            results[case]['payload_ratio'] = round(full['payload_bytes'] / mobile['payload_bytes'], 1)
+            results[case]['speedup'] = round(full['latency']['p50_ms'] / mobile['latency']['p50_ms'], 1)
+
+    common.report('sparse_fields', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Cost of token-bucket throttling: one bucket check in each store, checks
+from many threads at once, and GET /api/vehicles/ with throttling on and
+off.
+
+    python -m benchmarks.throttling --checks 100000 --threads 8
+
+Store checks are reported in microseconds per check; the endpoint cases in
+milliseconds per request.
+"""
+import threading
+import time
+
+from benchmarks import common
+
+
+def per_check_us(consume, checks, threads=1):
+    """Microseconds per ``consume()`` call, over ``checks`` calls split across ``threads``."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(n):
+        barrier.wait()
+        for i in range(checks // threads):
+            consume(f'bench:{n}:{i % 1000}', 1_000_000, 1_000.0)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return round((time.perf_counter() - started) * 1e6 / checks, 3)
+
+
+def main():
+    parser = common.parser(__doc__, vehicles=1000, bookings=1000)
+    parser.add_argument('--checks', type=int, default=100_000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    common.setup()
+    from django.conf import settings
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from one_now_rental.throttling import CacheBucketStore, LocalBucketStore
+
+    hosts, _ = common.seed(args.vehicles, args.bookings, seed=args.seed)
+    results = {'checks': args.checks, 'threads': args.threads, 'stores_us': {}}
+    for store_class in (LocalBucketStore, CacheBucketStore):
+        store = store_class()
+        results['stores_us'][store_class.__name__] = {
+            'single_thread': per_check_us(store.consume, args.checks),
+            f'{args.threads}_threads': per_check_us(store.consume, args.checks, args.threads),
+        }
+
+    client = APIClient()
+    client.force_authenticate(hosts[0])
+    url = reverse('vehicle-list-create')
+
+    def get():
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+
+    rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'search': '1000000/min'}
+    results['endpoint_ms'] = {}
+    for enabled in (False, True):
+        with override_settings(
+            THROTTLING={**settings.THROTTLING, 'ENABLED': enabled},
+            RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False},
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates},
+        ):
+            get()
+            results['endpoint_ms']['throttled' if enabled else 'unthrottled'] = common.summarize(
+                common.timed(get, args.requests)
+            )
+    common.report('throttling', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('bookings/', async_views.AsyncBookingListCreateView.as_view(), name='booking-list-create'),
+    path('bookings/<int:pk>/', async_views.AsyncBookingRetrieveUpdateView.as_view(), name='booking-detail'),
+]
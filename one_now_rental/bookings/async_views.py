@@ -0,0 +1,21 @@
+"""
+Async booking views, served in place of the DRF views under ASGI.
+
+Reads run on the event loop; creates and updates run the sync view's
+handler on a thread, inside the same transaction as before (see
+``one_now_rental.async_views``).
+"""
+from one_now_rental.async_views import AsyncListMixin, AsyncRetrieveMixin
+from one_now_rental.db_router import AsyncReplicaReadMixin
+from one_now_rental.response_cache import AsyncCachedResponseMixin
+from .views import BookingListCreateView, BookingRetrieveUpdateView
+
+
+class AsyncBookingListCreateView(AsyncReplicaReadMixin, AsyncCachedResponseMixin, AsyncListMixin,
+                                 BookingListCreateView):
+    pass
+
+
+class AsyncBookingRetrieveUpdateView(AsyncReplicaReadMixin, AsyncCachedResponseMixin,
+                                     AsyncRetrieveMixin, BookingRetrieveUpdateView):
+    pass
@@ -0,0 +1,109 @@
+"""
+Scheduled booking status transitions.
+
+A booking's status otherwise changes only when it is saved, so unconfirmed
+``pending`` requests would hold their vehicle in the overlap check forever,
+and finished ``confirmed`` bookings would stay in the active set. Two
+transitions, run by the ``run_booking_lifecycle`` command:
+
+* ``expire``: ``pending`` bookings created more than
+  ``settings.BOOKING_LIFECYCLE['PENDING_TTL']`` seconds ago are cancelled.
+* ``complete``: ``confirmed`` bookings whose ``end_date`` has come are
+  completed.
+
+Each works in chunks of ``BOOKING_LIFECYCLE['BATCH_SIZE']`` bookings, one
+transaction per chunk: a locking read of the chunk off a partial index,
+then one ``UPDATE`` by primary key. On PostgreSQL the read skips rows that
+another node has locked, so several nodes running the job split the work
+rather than queue on it; SQLite transactions take the write lock at BEGIN
+and run one at a time.
+
+Rows change through ``update()``, so each chunk sends ``bookings_changed``
+with the bookings' previous states. That updates the analytics rollup, and
+invalidates cached responses and occupancy bitmaps in the caches this
+process uses: web workers only see that when ``RESPONSE_CACHE`` and
+``OCCUPANCY_CACHE`` name a shared backend (see ``process_local_caches()``).
+"""
+import copy
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+
+from one_now_rental.db_router import primary
+from .models import Booking
+from .signals import bookings_changed
+
+# Read for the update and for the bookings_changed receivers
+FIELDS = ('id', 'renter', 'vehicle', 'start_date', 'end_date', 'status', 'total_amount')
+
+
+def expirable(now):
+    """Pending bookings older than the TTL at ``now``, oldest first."""
+    cutoff = now - timedelta(seconds=settings.BOOKING_LIFECYCLE['PENDING_TTL'])
+    return Booking.objects.filter(status='pending', created_at__lt=cutoff).order_by('created_at')
+
+
+def completable(now):
+    """Confirmed bookings that have ended by ``now``, earliest first."""
+    return Booking.objects.filter(status='confirmed', end_date__lte=timezone.localdate(now)).order_by('end_date')
+
+
+# name: (bookings due at a given time, status they move to)
+TRANSITIONS = {
+    'expire': (expirable, 'cancelled'),
+    'complete': (completable, 'completed'),
+}
+
+
+def process_local_caches():
+    """
+    The cache settings whose alias keeps entries in this process's memory,
+    where invalidations made by the job never reach the web workers.
+    """
+    names = []
+    if settings.RESPONSE_CACHE['ENABLED']:
+        names.append('RESPONSE_CACHE')
+    names.append('OCCUPANCY_CACHE')
+    return [name for name in names if isinstance(caches[getattr(settings, name)['ALIAS']], LocMemCache)]
+
+
+def apply_chunk(name, now=None, batch_size=None):
+    """
+    Move up to ``batch_size`` bookings due for transition ``name`` at
+    ``now``, in one transaction. Returns how many moved; fewer than
+    ``batch_size`` means none are left that another node is not handling.
+    """
+    due, new_status = TRANSITIONS[name]
+    now = now or timezone.now()
+    batch_size = batch_size or settings.BOOKING_LIFECYCLE['BATCH_SIZE']
+    with transaction.atomic():
+        previous = list(primary(due(now)).select_for_update(skip_locked=True).only(*FIELDS)[:batch_size])
+        if not previous:
+            return 0
+        Booking.objects.filter(pk__in=[booking.pk for booking in previous]).update(
+            status=new_status, updated_at=timezone.now(),
+        )
+        bookings = [copy.copy(booking) for booking in previous]
+        for booking in bookings:
+            booking.status = new_status
+        bookings_changed.send(sender=Booking, bookings=bookings, previous=previous)
+    return len(previous)
+
+
+def run(now=None, batch_size=None):
+    """Apply every transition due at ``now``; returns ``{name: bookings moved}``."""
+    now = now or timezone.now()
+    batch_size = batch_size or settings.BOOKING_LIFECYCLE['BATCH_SIZE']
+    moved = {}
+    for name in TRANSITIONS:
+        moved[name] = 0
+        while True:
+            count = apply_chunk(name, now, batch_size)
+            moved[name] += count
+            if count < batch_size:
+                break
+    return moved
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings import lifecycle
+
+
+class Command(BaseCommand):
+    help = (
+        'Cancel pending bookings older than BOOKING_LIFECYCLE["PENDING_TTL"] and complete '
+        'confirmed bookings that have ended. Safe to run on several nodes at once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Bookings per transaction; defaults to BOOKING_LIFECYCLE["BATCH_SIZE"].')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep running, once every this many seconds. Runs once by default.')
+        parser.add_argument('--allow-local-caches', action='store_true',
+                            help='Run even though RESPONSE_CACHE or OCCUPANCY_CACHE use a local-memory '
+                                 'backend, whose entries the web workers keep serving until they expire.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        local = lifecycle.process_local_caches()
+        if local and not options['allow_local_caches']:
+            raise CommandError(
+                f'{" and ".join(local)} use a local-memory cache, so the web workers would keep serving '
+                f'the old statuses until their entries expire. Point them at a shared backend, '
+                f'or pass --allow-local-caches.'
+            )
+        while True:
+            started = time.perf_counter()
+            moved = lifecycle.run(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Expired {moved["expire"]} and completed {moved["complete"]} bookings '
+                f'in {time.perf_counter() - started:.1f}s'
+            ))
+            if not options['interval']:
+                break
+            time.sleep(max(0, options['interval'] - (time.perf_counter() - started)))
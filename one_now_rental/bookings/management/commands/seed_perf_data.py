@@ -0,0 +1,39 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from one_now_rental.perf_data import PASSWORD, seed_dataset
+from vehicles.models import Vehicle
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-generate a reproducible dataset of hosts, renters, vehicles and bookings '
+        'for load tests, then rebuild the analytics rollup and the vehicle search index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehicles', type=int, default=100_000)
+        parser.add_argument('--bookings', type=int, default=2_000_000)
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed; the same seed always yields the same rows.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per bulk insert.')
+
+    def handle(self, *args, **options):
+        if options['vehicles'] < 1:
+            raise CommandError('--vehicles must be at least 1.')
+        if Vehicle.objects.exists():
+            raise CommandError('The database already holds vehicles; seed an empty database.')
+
+        started = time.perf_counter()
+        hosts, renters = seed_dataset(options['vehicles'], options['bookings'],
+                                      seed=options['seed'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(hosts)} hosts, {len(renters)} renters, {options["vehicles"]} vehicles '
+            f'and {options["bookings"]} bookings in {time.perf_counter() - started:.1f}s'
+        ))
+        call_command('rebuild_booking_stats', batch_size=options['batch_size'], stdout=self.stdout)
+        call_command('rebuild_vehicle_search', stdout=self.stdout)
+        self.stdout.write(f'Users log in as host<N> or renter<N> with password "{PASSWORD}"')
@@ -8,6 +8,16 @@ from decimal import Decimal
 
 User = get_user_model()
 
+class BookingQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(status__in=Booking.ACTIVE_STATUSES)
+
+    def overlapping(self, start_date, end_date):
+        # Bookings are half-open [start_date, end_date) ranges, so two overlap
+        # exactly when each one starts before the other ends.
+        return self.filter(start_date__lt=end_date, end_date__gt=start_date)
+
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -15,9 +25,14 @@ class Booking(models.Model):
         ('cancelled', 'Cancelled'),
         ('completed', 'Completed'),
     ]
+    # Statuses that hold the vehicle for their date range
+    ACTIVE_STATUSES = ('pending', 'confirmed')
+    # Statuses that count towards revenue and utilization
+    EARNING_STATUSES = ('confirmed', 'completed')
     
-    renter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
-    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='bookings')
+    # Both indexed through the composites below
+    renter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings', db_index=False)
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='bookings', db_index=False)
     start_date = models.DateField()
     end_date = models.DateField()
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -26,11 +41,30 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookingQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        # Matched to BookingFilter and the list's ordering_fields, so each
+        # renter's list is read in order off an index, to the overlap
+        # check, which looks up one vehicle's active bookings by date, and
+        # to the lifecycle job.
         indexes = [
-            models.Index(fields=['renter', 'status']),
-            models.Index(fields=['vehicle', 'start_date', 'end_date']),
+            # Default ordering, and keyset pagination
+            models.Index(fields=['renter', 'created_at', 'id']),
+            # ?status= in the default ordering
+            models.Index(fields=['renter', 'status', 'created_at'], name='booking_renter_status_idx'),
+            # Also reads ?from_date= as a range, sorting just the bookings in it
+            models.Index(fields=['renter', 'start_date'], name='booking_renter_start_idx'),
+            models.Index(fields=['renter', 'total_amount'], name='booking_renter_amount_idx'),
+            models.Index(fields=['vehicle', 'status', 'start_date', 'end_date'],
+                         name='booking_vehicle_status_idx'),
+            # Bookings due for bookings.lifecycle transitions; partial, so
+            # they stay as small as the set of active bookings
+            models.Index(fields=['created_at'], condition=models.Q(status='pending'),
+                         name='booking_pending_created_idx'),
+            models.Index(fields=['end_date'], condition=models.Q(status='confirmed'),
+                         name='booking_confirmed_end_idx'),
         ]
 
     def __str__(self):
@@ -49,7 +83,13 @@ class Booking(models.Model):
         
         if self.start_date and self.end_date and self.vehicle:
             # Calculate total amount
-            days = (self.end_date - self.start_date).days
-            self.total_amount = Decimal(str(days)) * Decimal(self.vehicle.daily_rate)
+            self.total_amount = self.calculate_total(
+                self.start_date, self.end_date, self.vehicle.daily_rate
+            )
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def calculate_total(start_date, end_date, daily_rate):
+        days = (end_date - start_date).days
+        return Decimal(str(days)) * Decimal(daily_rate)
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Per-vehicle occupancy bitmaps behind the availability calendars.
+
+A vehicle's occupancy is one integer: bit ``i`` is set when the day
+``origin + i`` (as a date ordinal) is held by an active booking. A calendar
+for any range is then a shift and a mask, which takes microseconds however
+many bookings the vehicle has.
+
+Bitmaps live in the cache named in ``settings.OCCUPANCY_CACHE['ALIAS']``,
+keyed by the vehicle and a per-vehicle version token. A missing one is
+built from the vehicle's active bookings on first read, in one indexed
+query, and stored under the token read before the build. The signals in
+``bookings.signals`` replace the tokens of the vehicles a write touched
+once it commits, so a build that read the bookings before the commit is
+stored under a token nobody reads any more and cannot be served.
+
+Writes drop bitmaps rather than patch them: patching needs a
+compare-and-set on the token that the cache API does not offer, and
+clearing a cancelled booking's days is wrong wherever another active
+booking overlaps them. Every process must see the
+same tokens, so with several processes (web workers, or commands such as
+``run_booking_lifecycle``) the alias must be a shared backend.
+"""
+import re
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from one_now_rental.db_router import primary
+from .models import Booking
+
+_BOOKED_RUN = re.compile('1+')
+
+
+def get_cache():
+    return caches[settings.OCCUPANCY_CACHE['ALIAS']]
+
+
+def _version_key(vehicle_id):
+    return f'occupancy:version:{vehicle_id}'
+
+
+def _key(vehicle_id, version):
+    return f'occupancy:{vehicle_id}:{version}'
+
+
+def _versions(cache, vehicle_ids):
+    """The current version token of each of ``vehicle_ids``, creating missing ones."""
+    keys = {vehicle_id: _version_key(vehicle_id) for vehicle_id in vehicle_ids}
+    cached = cache.get_many(keys.values())
+    missing = {key: uuid.uuid4().hex for key in keys.values() if key not in cached}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        # Another process may have added its own token first
+        cached.update(cache.get_many(missing))
+    return {vehicle_id: cached[key] for vehicle_id, key in keys.items()}
+
+
+def _mask(days):
+    return (1 << days) - 1
+
+
+class Occupancy:
+    """The days one vehicle is held, as a bitmap starting at ``origin``."""
+    __slots__ = ('origin', 'bits')
+
+    def __init__(self, origin=None, bits=0):
+        self.origin = origin
+        self.bits = bits
+
+    def add(self, start_date, end_date):
+        """Mark the days of ``[start_date, end_date)`` as held."""
+        first, last = start_date.toordinal(), end_date.toordinal()
+        if first >= last:
+            return
+        if self.origin is None:
+            self.origin = first
+        elif first < self.origin:
+            self.bits <<= self.origin - first
+            self.origin = first
+        self.bits |= _mask(last - first) << (first - self.origin)
+
+    def window(self, start_date, end_date):
+        """The bits of ``[start_date, end_date)``, with bit 0 for ``start_date``."""
+        if self.origin is None:
+            return 0
+        offset = start_date.toordinal() - self.origin
+        bits = self.bits >> offset if offset >= 0 else self.bits << -offset
+        return bits & _mask((end_date - start_date).days)
+
+    def calendar(self, start_date, end_date):
+        """
+        ``days``, one ``'1'`` (held) or ``'0'`` (free) per day of
+        ``[start_date, end_date)``, and the held runs as ``booked`` ranges.
+        """
+        days = (end_date - start_date).days
+        text = format(self.window(start_date, end_date), f'0{days}b')[::-1] if days else ''
+        return {
+            'days': text,
+            'booked': [
+                {'start': start_date + timedelta(days=run.start()), 'end': start_date + timedelta(days=run.end())}
+                for run in _BOOKED_RUN.finditer(text)
+            ],
+        }
+
+
+def _build(vehicle_ids):
+    """Bitmaps of ``vehicle_ids`` from their active bookings, in one query."""
+    occupancies = {vehicle_id: Occupancy() for vehicle_id in vehicle_ids}
+    ranges = primary(Booking.objects.active().filter(vehicle_id__in=vehicle_ids))
+    for vehicle_id, start_date, end_date in ranges.values_list('vehicle_id', 'start_date', 'end_date'):
+        occupancies[vehicle_id].add(start_date, end_date)
+    return occupancies
+
+
+def get_occupancies(vehicle_ids):
+    """``{vehicle_id: Occupancy}`` for ``vehicle_ids``, building the missing ones."""
+    cache = get_cache()
+    # Read before any build, so a build that misses a commit is stored
+    # under the version that commit replaced
+    versions = _versions(cache, vehicle_ids)
+    cached = cache.get_many([_key(vehicle_id, version) for vehicle_id, version in versions.items()])
+    occupancies, missing = {}, []
+    for vehicle_id in vehicle_ids:
+        entry = cached.get(_key(vehicle_id, versions[vehicle_id]))
+        if entry is None:
+            missing.append(vehicle_id)
+        else:
+            occupancies[vehicle_id] = Occupancy(*entry)
+    if missing:
+        built = _build(missing)
+        cache.set_many(
+            {_key(vehicle_id, versions[vehicle_id]): (occupancy.origin, occupancy.bits)
+             for vehicle_id, occupancy in built.items()},
+            settings.OCCUPANCY_CACHE['TIMEOUT'],
+        )
+        occupancies.update(built)
+    return occupancies
+
+
+def invalidate(vehicle_ids):
+    """Replace the version tokens of ``vehicle_ids``, orphaning their bitmaps."""
+    get_cache().set_many({_version_key(vehicle_id): uuid.uuid4().hex for vehicle_id in vehicle_ids},
+                         timeout=None)
+
+
+def record_changes(vehicle_ids):
+    """Drop the bitmaps of ``vehicle_ids`` once the surrounding transaction commits."""
+    vehicle_ids = set(vehicle_ids)
+    if vehicle_ids:
+        transaction.on_commit(lambda: invalidate(vehicle_ids))
@@ -1,11 +1,54 @@
 from rest_framework import serializers
-from django.db.models import Q
+from one_now_rental.db_router import primary
+from one_now_rental.instrumentation import TimedSerializerMixin
 from .models import Booking
+from .signals import bookings_changed
 from vehicles.models import Vehicle
 from vehicles.serializers import VehicleSerializer
+from bisect import bisect_left, insort
+from collections import defaultdict
 from datetime import date, datetime
 
-class BookingSerializer(serializers.ModelSerializer):
+# Largest batch accepted by POST /api/bookings/bulk/
+BULK_BOOKING_LIMIT = 500
+
+
+def validate_booking_dates(start_date, end_date):
+    if start_date >= end_date:
+        raise serializers.ValidationError({
+            'end_date': 'End date must be after start date.'
+        })
+
+    if start_date < date.today():
+        raise serializers.ValidationError({
+            'start_date': 'Start date cannot be in the past.'
+        })
+
+
+def merge_ranges(ranges):
+    """
+    Merge a start-sorted list of (start, end) pairs into the disjoint ranges
+    ``overlaps_any()`` expects, covering the same dates.
+    """
+    merged = []
+    for start_date, end_date in ranges:
+        if merged and start_date <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end_date))
+        else:
+            merged.append((start_date, end_date))
+    return merged
+
+
+def overlaps_any(ranges, start_date, end_date):
+    """
+    Check [start_date, end_date) against ``ranges``, a start-sorted list of
+    mutually disjoint (start, end) pairs. Because the ranges are disjoint,
+    only the last one starting before ``end_date`` can overlap.
+    """
+    index = bisect_left(ranges, (end_date,)) - 1
+    return index >= 0 and ranges[index][1] > start_date
+
+class BookingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     renter = serializers.StringRelatedField(read_only=True)
     vehicle_details = VehicleSerializer(source='vehicle', read_only=True)
     days = serializers.SerializerMethodField()
@@ -16,12 +59,32 @@ class BookingSerializer(serializers.ModelSerializer):
                  'end_date', 'days', 'total_amount', 'status', 'notes', 
                  'created_at', 'updated_at']
         read_only_fields = ['id', 'renter', 'total_amount', 'created_at', 'updated_at']
+        # Columns get_days() reads, loaded even when ?fields= leaves them out
+        method_field_sources = {'days': ('start_date', 'end_date')}
+        # ?expand= names for nested fields that ?fields= otherwise drops
+        expandable_fields = {'vehicle': 'vehicle_details'}
 
     def get_days(self, obj):
         if obj.start_date and obj.end_date:
             return (obj.end_date - obj.start_date).days
         return 0
 
+    def validate_status(self, value):
+        # Reactivating a cancelled or completed booking takes its dates back,
+        # so it gets the same overlap check as a new booking, under the same
+        # vehicle lock. Callers must run validation and save() in one atomic block.
+        instance = self.instance
+        if (instance is None or instance.status in Booking.ACTIVE_STATUSES
+                or value not in Booking.ACTIVE_STATUSES):
+            return value
+        Vehicle.objects.select_for_update().only('id').get(pk=instance.vehicle_id)
+        overlapping_bookings = primary(Booking.objects.active().overlapping(
+            instance.start_date, instance.end_date
+        ).filter(vehicle_id=instance.vehicle_id).exclude(pk=instance.pk))
+        if overlapping_bookings.exists():
+            raise serializers.ValidationError('Vehicle is already booked for the selected dates.')
+        return value
+
 class BookingCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
@@ -33,15 +96,15 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         vehicle = attrs.get('vehicle')
 
         # Basic date validation
-        if start_date >= end_date:
-            raise serializers.ValidationError({
-                'end_date': 'End date must be after start date.'
-            })
+        validate_booking_dates(start_date, end_date)
 
-        if start_date < date.today():
-            raise serializers.ValidationError({
-                'start_date': 'Start date cannot be in the past.'
-            })
+        # Lock the vehicle row until the surrounding transaction commits, so
+        # concurrent bookings of one vehicle are checked and inserted one at a
+        # time. Callers must run validation and save() in the same atomic block.
+        vehicle = Vehicle.objects.select_for_update(of=('self',)).select_related(
+            'owner'
+        ).get(pk=vehicle.pk)
+        attrs['vehicle'] = vehicle
 
         # Check if vehicle exists and is available
         if not vehicle.is_available:
@@ -49,15 +112,10 @@ class BookingCreateSerializer(serializers.ModelSerializer):
                 'vehicle': 'Vehicle is not available for booking.'
             })
 
-        # Check for overlapping bookings
-        overlapping_bookings = Booking.objects.filter(
-            vehicle=vehicle,
-            status__in=['pending', 'confirmed'],
-        ).filter(
-            Q(start_date__lte=start_date, end_date__gt=start_date) |
-            Q(start_date__lt=end_date, end_date__gte=end_date) |
-            Q(start_date__gte=start_date, end_date__lte=end_date)
-        )
+        # Check for overlapping bookings, on the primary since a replica may lag
+        overlapping_bookings = primary(Booking.objects.active().overlapping(
+            start_date, end_date
+        ).filter(vehicle=vehicle))
 
         if overlapping_bookings.exists():
             raise serializers.ValidationError({
@@ -68,6 +126,94 @@ class BookingCreateSerializer(serializers.ModelSerializer):
 
     def validate_vehicle(self, value):
         # Ensure user cannot book their own vehicle
-        if value.owner == self.context['request'].user:
+        if value.owner_id == self.context['request'].user.id:
             raise serializers.ValidationError('You cannot book your own vehicle.')
-        return value
\ No newline at end of file
+        return value
+
+
+class BookingBulkItemSerializer(serializers.ModelSerializer):
+    # A plain id: vehicles are fetched for the whole batch in one query
+    vehicle = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = Booking
+        fields = ['vehicle', 'start_date', 'end_date', 'notes']
+
+    def validate(self, attrs):
+        validate_booking_dates(attrs['start_date'], attrs['end_date'])
+        return attrs
+
+
+class BookingBulkCreateSerializer(serializers.Serializer):
+    """
+    Validate and insert a batch of bookings with a fixed number of queries:
+    one locked read of the vehicles, one read of the active bookings that
+    could collide, and a bulk insert. Conflicts with existing bookings and
+    within the batch are reported per item, and nothing is inserted unless
+    every item is valid. Like BookingCreateSerializer, validation and save()
+    must run in the same transaction.
+    """
+    bookings = BookingBulkItemSerializer(many=True, allow_empty=False, max_length=BULK_BOOKING_LIMIT)
+
+    def validate(self, attrs):
+        items = attrs['bookings']
+        renter = self.context['request'].user
+        vehicle_ids = {item['vehicle'] for item in items}
+
+        vehicles = Vehicle.objects.select_for_update(of=('self',)).select_related(
+            'owner'
+        ).in_bulk(vehicle_ids)
+
+        booked = defaultdict(list)
+        existing = primary(Booking.objects.active().overlapping(
+            min(item['start_date'] for item in items),
+            max(item['end_date'] for item in items),
+        ).filter(vehicle_id__in=vehicle_ids).order_by('start_date'))
+        for vehicle_id, start_date, end_date in existing.values_list('vehicle_id', 'start_date', 'end_date'):
+            booked[vehicle_id].append((start_date, end_date))
+        # Active bookings may overlap each other, when written around the
+        # overlap check; accepted ones never do
+        booked = defaultdict(list, {vehicle_id: merge_ranges(ranges) for vehicle_id, ranges in booked.items()})
+
+        errors = []
+        accepted = defaultdict(list)
+        for item in items:
+            vehicle = vehicles.get(item['vehicle'])
+            start_date, end_date = item['start_date'], item['end_date']
+            if vehicle is None:
+                error = {'vehicle': ['Vehicle does not exist.']}
+            elif vehicle.owner_id == renter.id:
+                error = {'vehicle': ['You cannot book your own vehicle.']}
+            elif not vehicle.is_available:
+                error = {'vehicle': ['Vehicle is not available for booking.']}
+            elif overlaps_any(booked[vehicle.id], start_date, end_date):
+                error = {'non_field_errors': ['Vehicle is already booked for the selected dates.']}
+            elif overlaps_any(accepted[vehicle.id], start_date, end_date):
+                error = {'non_field_errors': ['Overlaps another booking in this batch.']}
+            else:
+                error = {}
+                item['vehicle'] = vehicle
+                insort(accepted[vehicle.id], (start_date, end_date))
+            errors.append(error)
+
+        if any(errors):
+            raise serializers.ValidationError({'bookings': errors})
+        return attrs
+
+    def create(self, validated_data):
+        renter = self.context['request'].user
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                renter=renter,
+                vehicle=item['vehicle'],
+                start_date=item['start_date'],
+                end_date=item['end_date'],
+                notes=item.get('notes', ''),
+                total_amount=Booking.calculate_total(
+                    item['start_date'], item['end_date'], item['vehicle'].daily_rate
+                ),
+            )
+            for item in validated_data['bookings']
+        ])
+        bookings_changed.send(sender=Booking, bookings=bookings)
+        return bookings
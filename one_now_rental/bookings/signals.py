@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from one_now_rental import response_cache
+from one_now_rental.db_router import primary
+from vehicles.models import Vehicle
+from . import occupancy
+from .models import Booking
+
+# Sent for bulk writes that bypass post_save and post_delete. ``bookings``
+# holds the affected Booking instances as written; for set-based updates,
+# ``previous`` holds the same bookings as they were before.
+bookings_changed = Signal()
+
+# Fields of the row before a save: analytics.signals compares them with
+# the saved booking, and update_occupancy() reads the vehicle
+PREVIOUS_FIELDS = ('vehicle_id', 'start_date', 'end_date', 'status', 'total_amount')
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def invalidate_booking_responses(sender, instance, **kwargs):
+    response_cache.invalidate('bookings', [instance.renter_id])
+
+
+@receiver(bookings_changed, sender=Booking)
+def invalidate_bulk_booking_responses(sender, bookings, **kwargs):
+    response_cache.invalidate('bookings', [booking.renter_id for booking in bookings])
+
+
+@receiver(post_save, sender=Vehicle)
+def invalidate_vehicle_booking_responses(sender, instance, created, **kwargs):
+    # Booking responses embed vehicle_details
+    if not created:
+        renters = Booking.objects.filter(vehicle=instance).values_list('renter_id', flat=True)
+        response_cache.invalidate('bookings', renters.distinct())
+
+
+@receiver(pre_save, sender=Booking)
+def remember_previous_state(sender, instance, **kwargs):
+    """
+    Read the row as it was before the save, once for every post_save
+    receiver; ``previous_state()`` hands them their fields of it.
+    """
+    instance._previous_state = None
+    if not instance._state.adding:
+        previous = primary(Booking.objects.filter(pk=instance.pk))
+        if transaction.get_connection(previous.db).in_atomic_block:
+            # Held until the save commits, so a concurrent save of the row
+            # waits and then reads this one's state instead of the same
+            # previous state; saves outside a transaction cannot be ordered
+            previous = previous.select_for_update()
+        instance._previous_state = previous.values(*PREVIOUS_FIELDS).first()
+
+
+def previous_state(instance, fields):
+    """``fields`` of ``instance`` as they were before its save, or None if it was inserted."""
+    previous = getattr(instance, '_previous_state', None)
+    return tuple(previous[field] for field in fields) if previous else None
+
+
+@receiver(post_save, sender=Booking)
+def update_occupancy(sender, instance, **kwargs):
+    # A booking moved to another vehicle frees days on the old one too
+    previous = previous_state(instance, ('vehicle_id',))
+    occupancy.record_changes([instance.vehicle_id, *(previous or ())])
+
+
+@receiver(post_delete, sender=Booking)
+def remove_occupancy(sender, instance, **kwargs):
+    occupancy.record_changes([instance.vehicle_id])
+
+
+@receiver(bookings_changed, sender=Booking)
+def update_bulk_occupancy(sender, bookings, previous=(), **kwargs):
+    occupancy.record_changes(booking.vehicle_id for booking in (*previous, *bookings))
@@ -1,17 +1,42 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import threading
+import tracemalloc
+from unittest import mock, skipUnless
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import TestCase, TransactionTestCase, tag
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from rest_framework.test import APITestCase
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from datetime import date, timedelta
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from one_now_rental.asgi import ASGI_URLCONF
+from one_now_rental import idempotency
+from one_now_rental.fast_serializers import compile_serializer
+from one_now_rental.pagination import KeysetPagination
+from one_now_rental.query_plans import QueryPlanAssertionsMixin
 from vehicles.models import Vehicle
+from . import lifecycle
 from .models import Booking
+from .serializers import BookingSerializer
+from .signals import bookings_changed
+from .views import BookingListCreateView
 
 User = get_user_model()
 
 class BookingTestCase(APITestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
@@ -40,8 +65,8 @@ class BookingTestCase(APITestCase):
         
         self.booking_data = {
             'vehicle': self.vehicle.id,
-            'start_date': "2025-07-10",
-            'end_date': "2025-07-13",
+            'start_date': date.today() + timedelta(days=1),
+            'end_date': date.today() + timedelta(days=4),
             'notes': 'Weekend trip'
         }
         
@@ -57,6 +82,18 @@ class BookingTestCase(APITestCase):
         self.assertEqual(booking.vehicle, self.vehicle)
         self.assertEqual(booking.total_amount, 225.00)  # 3 days * 75.00
     
+    def test_save_reads_previous_state_once(self):
+        """Test that the occupancy and analytics receivers share one read of the row before a save"""
+        start = date.today() + timedelta(days=5)
+        booking = Booking.objects.create(renter=self.user, vehicle=self.vehicle, start_date=start,
+                                         end_date=start + timedelta(days=2))
+        booking.status = 'confirmed'
+        with CaptureQueriesContext(connection) as queries, transaction.atomic():
+            booking.save()
+        reads = [query for query in queries
+                 if query['sql'].startswith('SELECT') and 'FROM "bookings_booking"' in query['sql']]
+        self.assertEqual(len(reads), 1)
+
     def test_create_booking_own_vehicle(self):
         """Test booking own vehicle (should fail)"""
         own_vehicle = Vehicle.objects.create(
@@ -105,5 +142,1236 @@ class BookingTestCase(APITestCase):
         # Try to book overlapping dates
         response = self.client.post(self.bookings_url, self.booking_data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-    
-    
\ No newline at end of file
+
+    def test_reactivation_checks_overlaps(self):
+        """Test that a cancelled booking cannot be reactivated over another active booking"""
+        start = date.today() + timedelta(days=1)
+        cancelled = Booking.objects.create(renter=self.user, vehicle=self.vehicle, start_date=start,
+                                           end_date=start + timedelta(days=3), status='cancelled')
+        Booking.objects.create(renter=self.vehicle_owner, vehicle=self.vehicle,
+                               start_date=start + timedelta(days=2), end_date=start + timedelta(days=5))
+        detail_url = reverse('booking-detail', kwargs={'pk': cancelled.pk})
+
+        for new_status in ('pending', 'confirmed'):
+            response = self.client.patch(detail_url, {'status': new_status})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data['error'], 'Booking update failed')
+            self.assertIn('status', response.data['details'])
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+
+        # Once the slot frees up it can be taken back; active bookings move freely
+        Booking.objects.exclude(pk=cancelled.pk).update(status='cancelled')
+        response = self.client.patch(detail_url, {'status': 'pending'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(detail_url, {'status': 'confirmed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_and_detail_query_counts_are_constant(self):
+        """Test that list/detail queries do not grow with the number of rows"""
+        booking = Booking.objects.create(
+            renter=self.user,
+            vehicle=self.vehicle,
+            start_date=date.today() + timedelta(days=1),
+            end_date=date.today() + timedelta(days=2),
+        )
+        detail_url = reverse('booking-detail', kwargs={'pk': booking.pk})
+
+        # JWT user lookup, COUNT(*) and one page query
+        with self.assertNumQueries(3):
+            self.client.get(self.bookings_url)
+        # JWT user lookup and one row query
+        with self.assertNumQueries(2):
+            self.client.get(detail_url)
+
+        for i in range(15):
+            Booking.objects.create(
+                renter=self.user,
+                vehicle=self.vehicle,
+                start_date=date.today() + timedelta(days=10 + 2 * i),
+                end_date=date.today() + timedelta(days=11 + 2 * i),
+            )
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.bookings_url)
+        self.assertEqual(len(response.data['results']), 16)
+        self.assertEqual(response.data['results'][0]['renter'], str(self.user))
+        self.assertEqual(response.data['results'][0]['vehicle_details']['owner'], str(self.vehicle_owner))
+
+    def test_cached_booking_list_is_invalidated_by_writes(self):
+        """Test that booking, vehicle and bulk writes refresh cached booking lists"""
+        self.assertEqual(self.client.get(self.bookings_url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.bookings_url)['X-Cache'], 'HIT')
+
+        self.client.post(self.bookings_url, self.booking_data)
+        response = self.client.get(self.bookings_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+
+        # Booking responses embed the vehicle, so the owner's edits must show up
+        self.vehicle.daily_rate = 90.00
+        self.vehicle.save()
+        response = self.client.get(self.bookings_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['vehicle_details']['daily_rate'], '90.00')
+
+        start = date.today() + timedelta(days=20)
+        self.client.post(reverse('booking-bulk-create'), {'bookings': [{
+            'vehicle': self.vehicle.id,
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=1)).isoformat(),
+        }]}, format='json')
+        response = self.client.get(self.bookings_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class BookingPaginationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='frequent',
+            email='frequent@example.com',
+            password='testpass123'
+        )
+        owner = User.objects.create_user(
+            username='owner',
+            email='owner@example.com',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        vehicle = Vehicle.objects.create(
+            owner=owner,
+            make='Toyota',
+            model='Camry',
+            year=2020,
+            plate_number='PAGE123',
+            daily_rate=50.00,
+        )
+        Booking.objects.bulk_create([
+            Booking(
+                renter=self.user,
+                vehicle=vehicle,
+                start_date=date.today() + timedelta(days=2 * i + 1),
+                end_date=date.today() + timedelta(days=2 * i + 2),
+                total_amount=50.00,
+            )
+            for i in range(45)
+        ])
+        # Tie a run of rows on created_at so the id tie-break matters
+        tied = Booking.objects.order_by('id').values_list('id', flat=True)[10:30]
+        Booking.objects.filter(id__in=list(tied)).update(created_at=Booking.objects.first().created_at)
+        self.bookings_url = reverse('booking-list-create')
+
+    def walk_cursor_pages(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids += [booking['id'] for booking in response.data['results']]
+            url, pages = response.data['next'], pages + 1
+        return ids, pages
+
+    def test_cursor_pages_cover_every_row_once(self):
+        """Test keyset pagination in both directions, including created_at ties"""
+        expected = list(Booking.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        ids, pages = self.walk_cursor_pages(f'{self.bookings_url}?cursor=')
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+        ids, _ = self.walk_cursor_pages(f'{self.bookings_url}?cursor=&ordering=created_at')
+        self.assertEqual(ids, expected[::-1])
+
+    def test_cursor_rejects_other_orderings_and_bad_cursors(self):
+        """Test that keyset mode refuses orderings and cursors it cannot seek"""
+        response = self.client.get(self.bookings_url, {'cursor': '', 'ordering': 'total_amount'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.bookings_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_with_and_without_count(self):
+        """Test that count=false skips COUNT(*) but keeps the same pages"""
+        counted = self.client.get(self.bookings_url, {'page': 2})
+        self.assertEqual(counted.data['count'], 45)
+
+        # JWT user lookup and one page query, no COUNT(*)
+        with self.assertNumQueries(2):
+            uncounted = self.client.get(self.bookings_url, {'page': 2, 'count': 'false'})
+        self.assertNotIn('count', uncounted.data)
+        self.assertEqual(uncounted.data['results'], counted.data['results'])
+        self.assertIsNotNone(uncounted.data['next'])
+        self.assertIsNotNone(uncounted.data['previous'])
+
+
+class BookingBulkCreateTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='importer',
+            email='importer@example.com',
+            password='testpass123'
+        )
+        owner = User.objects.create_user(
+            username='owner',
+            email='owner@example.com',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        self.vehicles = [
+            Vehicle.objects.create(
+                owner=owner,
+                make='Toyota',
+                model='Camry',
+                year=2020,
+                plate_number=f'BULK{i}',
+                daily_rate=40.00 + i,
+            )
+            for i in range(3)
+        ]
+        self.bulk_url = reverse('booking-bulk-create')
+
+    def item(self, vehicle, offset, days=2):
+        start = date.today() + timedelta(days=offset)
+        return {
+            'vehicle': vehicle.id,
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=days)).isoformat(),
+        }
+
+    def post_batch(self, items):
+        return self.client.post(self.bulk_url, {'bookings': items}, format='json')
+
+    def test_bulk_create_success(self):
+        """Test that a valid batch is inserted with computed totals"""
+        items = [self.item(vehicle, offset) for vehicle in self.vehicles for offset in (1, 5)]
+        response = self.post_batch(items)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['bookings']), 6)
+        self.assertEqual(Booking.objects.filter(renter=self.user).count(), 6)
+        booking = Booking.objects.get(vehicle=self.vehicles[1], start_date=date.today() + timedelta(days=1))
+        self.assertEqual(booking.total_amount, 82.00)  # 2 days * 41.00
+
+    def test_bulk_create_conflicts_reported_per_item(self):
+        """Test conflicts against existing bookings and within the batch"""
+        Booking.objects.create(
+            renter=self.user,
+            vehicle=self.vehicles[0],
+            start_date=date.today() + timedelta(days=2),
+            end_date=date.today() + timedelta(days=4),
+        )
+        items = [
+            self.item(self.vehicles[0], 1),
+            self.item(self.vehicles[1], 1),
+            self.item(self.vehicles[1], 2),
+        ]
+        response = self.post_batch(items)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['details']['bookings']
+        self.assertIn('non_field_errors', errors[0])
+        self.assertEqual(errors[1], {})
+        self.assertIn('non_field_errors', errors[2])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_bulk_create_conflicts_with_overlapping_bookings(self):
+        """Test that a long booking is found behind a shorter one that starts after it"""
+        for start, end in ((1, 10), (2, 3)):
+            Booking.objects.create(
+                renter=self.user,
+                vehicle=self.vehicles[0],
+                start_date=date.today() + timedelta(days=start),
+                end_date=date.today() + timedelta(days=end),
+            )
+        response = self.post_batch([self.item(self.vehicles[0], 5, days=1), self.item(self.vehicles[0], 10)])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['details']['bookings']
+        self.assertIn('non_field_errors', errors[0])
+        self.assertEqual(errors[1], {})
+
+    def test_bulk_create_invalid_item_dates(self):
+        """Test that one invalid item rejects the whole batch"""
+        response = self.post_batch([self.item(self.vehicles[0], 1), self.item(self.vehicles[1], -1)])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('start_date', response.data['details']['bookings'][1])
+        self.assertFalse(Booking.objects.exists())
+
+    def test_bulk_create_query_count_is_constant(self):
+        """Test that validation cost does not grow with the batch size"""
+        def count_queries(items):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post_batch(items)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        small = count_queries([self.item(self.vehicles[0], 1)])
+        large = count_queries([
+            self.item(vehicle, offset)
+            for vehicle in self.vehicles for offset in range(10, 40, 3)
+        ])
+        self.assertEqual(small, large)
+
+
+class BookingConcurrencyTestCase(TransactionTestCase):
+    """Concurrent POSTs must never leave two active bookings overlapping."""
+
+    def setUp(self):
+        owner = User.objects.create(username='owner', email='owner@example.com')
+        self.renters = [
+            User.objects.create(username=f'renter{i}', email=f'renter{i}@example.com')
+            for i in range(8)
+        ]
+        self.vehicle = Vehicle.objects.create(
+            owner=owner,
+            make='Toyota',
+            model='Camry',
+            year=2020,
+            plate_number='RACE123',
+            daily_rate=50.00,
+        )
+        self.bookings_url = reverse('booking-list-create')
+
+    def run_concurrently(self, ranges):
+        barrier = threading.Barrier(len(ranges))
+        statuses = [None] * len(ranges)
+
+        def book(index, start, end):
+            client = APIClient()
+            client.force_authenticate(self.renters[index])
+            data = {'vehicle': self.vehicle.id, 'start_date': start, 'end_date': end}
+            barrier.wait()
+            try:
+                statuses[index] = client.post(self.bookings_url, data).status_code
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=book, args=(index, start, end))
+            for index, (start, end) in enumerate(ranges)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statuses
+
+    def assertNoOverlaps(self):
+        bookings = list(Booking.objects.active().filter(vehicle=self.vehicle))
+        for booking in bookings:
+            overlapping = Booking.objects.active().overlapping(
+                booking.start_date, booking.end_date
+            ).filter(vehicle=self.vehicle).exclude(pk=booking.pk)
+            self.assertFalse(overlapping.exists(), f'{booking} overlaps {list(overlapping)}')
+
+    def test_same_range_booked_once(self):
+        """Test that only one of many identical concurrent bookings succeeds"""
+        start = date.today() + timedelta(days=5)
+        statuses = self.run_concurrently([(start, start + timedelta(days=3))] * len(self.renters))
+
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), 1)
+        self.assertEqual(statuses.count(status.HTTP_400_BAD_REQUEST), len(self.renters) - 1)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite pragmas')
+    def test_sqlite_connections_use_wal_and_busy_timeout(self):
+        """Test that SQLite connections wait on the write lock in WAL mode"""
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for pragma in ('journal_mode', 'busy_timeout', 'synchronous'):
+                cursor.execute(f'PRAGMA {pragma}')
+                pragmas[pragma] = cursor.fetchone()[0]
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'busy_timeout': 20000, 'synchronous': 1})
+
+    def test_staggered_ranges_never_overlap(self):
+        """Test that partially overlapping concurrent bookings stay disjoint"""
+        for round_number in range(3):
+            first = date.today() + timedelta(days=10 + round_number * 20)
+            ranges = [
+                (first + timedelta(days=i), first + timedelta(days=i + 3))
+                for i in range(len(self.renters))
+            ]
+            statuses = self.run_concurrently(ranges)
+            self.assertIn(status.HTTP_201_CREATED, statuses)
+        self.assertNoOverlaps()
+
+
+class BookingReplicaRoutingTestCase(APITestCase):
+    """Reads of safe requests go to a replica unless the user just wrote."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='renter', email='renter@example.com',
+                                             password='testpass123')
+        owner = User.objects.create_user(username='owner', email='owner@example.com',
+                                         password='testpass123')
+        self.vehicle = Vehicle.objects.create(owner=owner, make='Toyota', model='Camry', year=2020,
+                                              plate_number='REP123', daily_rate=75.00)
+        self.client.force_authenticate(self.user)
+        self.bookings_url = reverse('booking-list-create')
+        # Replica reads are recorded and then served by the test database
+        self.replica_reads = 0
+        patcher = mock.patch('one_now_rental.db_router.random.choice', side_effect=self.route)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        override = override_settings(DATABASE_REPLICAS=['replica1'])
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def route(self, aliases):
+        self.replica_reads += 1
+        return 'default'
+
+    def book(self, days_ahead):
+        start = date.today() + timedelta(days=days_ahead)
+        return self.client.post(self.bookings_url, {
+            'vehicle': self.vehicle.id, 'start_date': start, 'end_date': start + timedelta(days=2),
+        })
+
+    def test_safe_requests_read_from_replica(self):
+        """Test that list and detail GETs read from the replicas"""
+        self.client.get(self.bookings_url)
+        self.assertGreater(self.replica_reads, 0)
+
+        self.replica_reads = 0
+        self.client.get(reverse('vehicle-list-create'))
+        self.assertGreater(self.replica_reads, 0)
+
+    def test_writes_pin_user_to_primary(self):
+        """Test that writes and the overlap check stay on the primary, and pin the writer"""
+        response = self.book(5)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.replica_reads, 0)
+
+        # The new booking must be visible right away
+        response = self.client.get(reverse('booking-detail', kwargs={'pk': response.data['booking']['id']}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.replica_reads, 0)
+
+        # Other users are unaffected, and the pin expires
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.client.force_authenticate(other)
+        self.client.get(self.bookings_url)
+        self.assertGreater(self.replica_reads, 0)
+        cache.clear()
+        self.replica_reads = 0
+        self.client.force_authenticate(self.user)
+        self.client.get(self.bookings_url)
+        self.assertGreater(self.replica_reads, 0)
+
+    def test_failed_write_does_not_pin(self):
+        """Test that a rejected write leaves the user on the replicas"""
+        self.assertEqual(self.book(-1).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.get(self.bookings_url)
+        self.assertGreater(self.replica_reads, 0)
+
+
+REPLICA_ALIASES = [alias for alias in settings.DATABASES if alias != 'default']
+
+
+@skipUnless(REPLICA_ALIASES, 'set DB_REPLICAS to run against replica aliases')
+@override_settings(DATABASE_REPLICAS=REPLICA_ALIASES)
+class BookingReplicaDatabaseTestCase(TransactionTestCase):
+    """GET requests run their queries on a configured replica alias."""
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='renter', email='renter@example.com')
+        owner = User.objects.create(username='owner', email='owner@example.com')
+        self.vehicle = Vehicle.objects.create(owner=owner, make='Toyota', model='Camry', year=2020,
+                                              plate_number='REP123', daily_rate=75.00)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def queries_by_alias(self, method, *args):
+        contexts = {alias: CaptureQueriesContext(connections[alias]) for alias in connections}
+        for context in contexts.values():
+            context.__enter__()
+        try:
+            response = getattr(self.client, method)(*args)
+        finally:
+            for context in contexts.values():
+                context.__exit__(None, None, None)
+        return response, {alias: len(context) for alias, context in contexts.items()}
+
+    def test_replica_serves_reads_until_user_writes(self):
+        """Test that GETs query a replica and the writer's next GET queries the primary"""
+        url = reverse('booking-list-create')
+        _, queries = self.queries_by_alias('get', url)
+        self.assertEqual(queries['default'], 0)
+        self.assertGreater(sum(queries[alias] for alias in settings.DATABASE_REPLICAS), 0)
+
+        start = date.today() + timedelta(days=5)
+        response = self.client.post(url, {'vehicle': self.vehicle.id, 'start_date': start,
+                                          'end_date': start + timedelta(days=2)})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response, queries = self.queries_by_alias('get', url)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(sum(queries[alias] for alias in settings.DATABASE_REPLICAS), 0)
+
+
+class BookingCompiledSerializerTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='parity',
+            email='parity@example.com',
+            password='testpass123'
+        )
+        owner = User.objects.create_user(
+            username='owner',
+            email='owner@example.com',
+            password='testpass123',
+            user_type='host'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        vehicles = [
+            Vehicle.objects.create(
+                owner=owner,
+                make='Toyota',
+                model='Camry',
+                year=2020,
+                plate_number=f'PAR{i}',
+                daily_rate=rate,
+            )
+            for i, rate in enumerate([50, '33.33', '0.5'])
+        ]
+        statuses = ['pending', 'confirmed', 'cancelled', 'completed']
+        for i in range(25):
+            start = date.today() + timedelta(days=3 * i + 1)
+            Booking.objects.create(
+                renter=self.user,
+                vehicle=vehicles[i % 3],
+                start_date=start,
+                end_date=start + timedelta(days=i % 3 + 1),
+                status=statuses[i % 4],
+                notes='' if i % 2 else f'Trip #{i} — “quoted”',
+            )
+        self.bookings_url = reverse('booking-list-create')
+
+    def test_compiled_output_matches_serializer(self):
+        """Test that the compiled path renders byte-identical JSON"""
+        compiled = compile_serializer(BookingSerializer)
+        queryset = Booking.objects.all()
+        expected = JSONRenderer().render(BookingSerializer(queryset, many=True).data)
+        self.assertEqual(JSONRenderer().render(compiled.represent(compiled.values(queryset))), expected)
+
+    def test_list_endpoint_matches_with_and_without_compiled_path(self):
+        """Test that list responses are identical with the compiled path on and off"""
+        for params in ({}, {'page': 2}, {'status': 'confirmed'}, {'ordering': 'total_amount'},
+                       {'count': 'false'}, {'cursor': ''}):
+            cache.clear()
+            compiled = self.client.get(self.bookings_url, params)
+            cache.clear()
+            with override_settings(COMPILED_READ_SERIALIZERS=False):
+                plain = self.client.get(self.bookings_url, params)
+            self.assertEqual(compiled.status_code, status.HTTP_200_OK)
+            self.assertEqual(compiled.content, plain.content)
+
+    def test_compiled_list_query_count(self):
+        """Test that the compiled list path reads everything in one query"""
+        # JWT user lookup, COUNT(*) and one page query
+        with self.assertNumQueries(3):
+            self.client.get(self.bookings_url)
+
+
+
+@override_settings(ROOT_URLCONF=ASGI_URLCONF)
+class BookingAsyncViewTestCase(APITestCase):
+    """The async views under ASGI answer exactly like the sync DRF views."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='asyncrenter', email='asyncrenter@example.com',
+                                             password='testpass123')
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='testpass123')
+        self.vehicle = Vehicle.objects.create(owner=owner, make='Toyota', model='Camry', year=2020,
+                                              plate_number='ASYNC1', daily_rate=75.00)
+        for i in range(25):
+            start = date.today() + timedelta(days=3 * i + 1)
+            Booking.objects.create(renter=self.user, vehicle=self.vehicle, start_date=start,
+                                   end_date=start + timedelta(days=2), status=('pending', 'confirmed')[i % 2])
+        self.booking = Booking.objects.order_by('id').first()
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.bookings_url = reverse('booking-list-create')
+        self.detail_url = reverse('booking-detail', kwargs={'pk': self.booking.pk})
+
+    async def test_reads_match_sync_views(self):
+        """Test list, detail and not-found responses against the sync views"""
+        requests = [(self.bookings_url, params) for params in (
+            {}, {'page': 2}, {'page': 'last'}, {'status': 'confirmed'}, {'ordering': 'total_amount'},
+            {'count': 'false', 'page': 2}, {'cursor': ''}, {'vehicle_make': 'toy'},
+        )] + [(self.detail_url, {}), (reverse('booking-detail', kwargs={'pk': 999999}), {})]
+        for url, params in requests:
+            with self.subTest(url=url, params=params):
+                cache.clear()
+                response = await self.async_client.get(url, params, headers=self.headers)
+                cache.clear()
+                with override_settings(ROOT_URLCONF='one_now_rental.urls'):
+                    expected = await sync_to_async(self.client.get)(url, params, headers=self.headers)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.content, expected.content)
+
+        response = await self.async_client.get(self.bookings_url, {'cursor': ''}, headers=self.headers)
+        response = await self.async_client.get(response.json()['next'], headers=self.headers)
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_list_query_count(self):
+        """Test that an async list page costs the same queries as the sync one"""
+        # JWT user lookup, COUNT(*) and one page query
+        with self.assertNumQueries(3):
+            response = async_to_sync(self.async_client.get)(self.bookings_url, headers=self.headers)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    async def test_create_and_update(self):
+        """Test booking creation, overlap rejection and status updates"""
+        start = date.today() + timedelta(days=200)
+        data = {'vehicle': self.vehicle.id, 'start_date': start.isoformat(),
+                'end_date': (start + timedelta(days=2)).isoformat()}
+        response = await self.async_client.post(self.bookings_url, data, content_type='application/json',
+                                                headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['booking']['total_amount'], '150.00')
+
+        response = await self.async_client.post(self.bookings_url, data, content_type='application/json',
+                                                headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['error'], 'Booking creation failed')
+
+        response = await self.async_client.patch(self.detail_url, {'status': 'cancelled'},
+                                                 content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        await self.booking.arefresh_from_db()
+        self.assertEqual(self.booking.status, 'cancelled')
+
+    async def test_replica_routing(self):
+        """Test that async reads use the replicas until the user writes"""
+        reads = []
+
+        def route(aliases):
+            reads.append(aliases)
+            return 'default'
+
+        with mock.patch('one_now_rental.db_router.random.choice', side_effect=route), \
+                override_settings(DATABASE_REPLICAS=['replica1']):
+            await self.async_client.get(self.bookings_url, headers=self.headers)
+            self.assertGreater(len(reads), 0)
+
+            reads.clear()
+            response = await self.async_client.patch(self.detail_url, {'notes': 'pinned'},
+                                                     content_type='application/json', headers=self.headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            await self.async_client.get(self.detail_url, headers=self.headers)
+            self.assertEqual(reads, [])
+
+
+class BookingExportTestCase(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host',
+            email='host@example.com',
+            password='testpass123',
+            user_type='host'
+        )
+        self.renter = User.objects.create_user(
+            username='renter',
+            email='renter@example.com',
+            password='testpass123'
+        )
+        self.vehicle = Vehicle.objects.create(
+            owner=self.host,
+            make='Toyota',
+            model='Camry',
+            year=2020,
+            plate_number='EXP123',
+            daily_rate=50.00,
+        )
+        for i, status_ in enumerate(['pending', 'confirmed', 'confirmed']):
+            start = date.today() + timedelta(days=5 * i + 1)
+            Booking.objects.create(
+                renter=self.renter,
+                vehicle=self.vehicle,
+                start_date=start,
+                end_date=start + timedelta(days=3),
+                status=status_,
+                notes=f'Airport pickup, "gate {i}"\nthen hotel',
+            )
+        self.export_url = reverse('booking-export')
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_csv_export_for_host(self):
+        """Test that hosts export the bookings on their fleet as CSV by default"""
+        self.authenticate(self.host)
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('bookings.csv', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['renter'], 'renter')
+        self.assertEqual(rows[0]['plate_number'], 'EXP123')
+        self.assertEqual(rows[0]['total_amount'], '150.00')
+        self.assertEqual(rows[0]['notes'], 'Airport pickup, "gate 0"\nthen hotel')
+
+    def test_ndjson_export_respects_filters(self):
+        """Test NDJSON export of the renter's own bookings with BookingFilter applied"""
+        self.authenticate(self.renter)
+        response = self.client.get(self.export_url, {'format': 'ndjson', 'status': 'confirmed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(len(records), 2)
+        self.assertEqual({record['status'] for record in records}, {'confirmed'})
+        self.assertEqual(records[0]['start_date'], (date.today() + timedelta(days=6)).isoformat())
+        self.assertTrue(records[0]['created_at'].endswith('Z'))
+
+    def test_export_scopes(self):
+        """Test that renters see nothing in host scope and bad scopes are rejected"""
+        self.authenticate(self.renter)
+        response = self.client.get(self.export_url, {'scope': 'host'})
+        self.assertEqual(b''.join(response.streaming_content).decode().count('\n'), 1)
+
+        response = self.client.get(self.export_url, {'scope': 'everyone'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @tag('slow')
+    def test_export_memory_stays_bounded(self):
+        """Test that exporting 200k rows streams with bounded peak memory"""
+        total, batch = 200_000, 10_000
+        start = date.today() + timedelta(days=1)
+        for offset in range(0, total, batch):
+            Booking.objects.bulk_create([
+                Booking(
+                    renter=self.renter,
+                    vehicle=self.vehicle,
+                    start_date=start,
+                    end_date=start + timedelta(days=1),
+                    total_amount=50.00,
+                    status='completed',
+                )
+                for _ in range(batch)
+            ])
+        self.authenticate(self.host)
+
+        tracemalloc.start()
+        try:
+            response = self.client.get(self.export_url, {'format': 'ndjson'})
+            lines = sum(chunk.count(b'\n') for chunk in response.streaming_content)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(lines, total + 3)
+        # A materialized export of this size needs hundreds of MB
+        self.assertLess(peak, 16 * 1024 * 1024)
+
+
+class SeedPerfDataCommandTestCase(TestCase):
+    def seed(self, **options):
+        call_command('seed_perf_data', vehicles=40, bookings=400, batch_size=64,
+                     stdout=io.StringIO(), **options)
+
+    def snapshot(self):
+        return (
+            list(User.objects.order_by('username').values_list('username', 'user_type')),
+            list(Vehicle.objects.order_by('plate_number').values_list(
+                'plate_number', 'owner__username', 'make', 'year', 'vehicle_type', 'daily_rate', 'is_available')),
+            list(Booking.objects.order_by('vehicle__plate_number', 'start_date').values_list(
+                'vehicle__plate_number', 'renter__username', 'start_date', 'end_date', 'total_amount', 'status')),
+        )
+
+    def test_seeds_consistent_data(self):
+        """Test the row counts, non-overlapping bookings and rebuilt rollup"""
+        self.seed()
+        self.assertEqual(User.objects.filter(user_type='host').count(), 4)
+        self.assertEqual(User.objects.filter(user_type='renter').count(), 8)
+        self.assertEqual(Vehicle.objects.count(), 40)
+        self.assertEqual(Booking.objects.count(), 400)
+        # Spread around today, so the overlap check and the lifecycle job have work
+        upcoming = Booking.objects.active().filter(start_date__gt=date.today())
+        self.assertGreater(upcoming.count(), 100)
+        self.assertGreater(Booking.objects.filter(end_date__lte=date.today()).count(), 100)
+
+        for vehicle in Vehicle.objects.all():
+            ranges = list(vehicle.bookings.order_by('start_date').values_list('start_date', 'end_date'))
+            self.assertTrue(all(end <= start for (_, end), (start, _) in zip(ranges, ranges[1:])))
+        call_command('check_booking_stats', stdout=io.StringIO())
+        self.assertTrue(self.client.login(username='renter0', password='benchpass123'))
+
+    def test_same_seed_same_rows(self):
+        """Test that a seed reproduces its dataset and another seed differs"""
+        self.seed(seed=7)
+        first = self.snapshot()
+        for model in (Booking, Vehicle, User):
+            model.objects.all().delete()
+
+        self.seed(seed=7)
+        self.assertEqual(self.snapshot(), first)
+        for model in (Booking, Vehicle, User):
+            model.objects.all().delete()
+
+        self.seed(seed=8)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_refuses_a_seeded_database(self):
+        """Test that seeding twice is rejected"""
+        self.seed()
+        with self.assertRaisesMessage(CommandError, 'already holds vehicles'):
+            self.seed()
+        self.assertEqual(Vehicle.objects.count(), 40)
+
+
+@override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False})
+class BookingQueryPlanTestCase(QueryPlanAssertionsMixin, APITestCase):
+    """Every read behind the booking endpoints is served by an index, in index order."""
+
+    def setUp(self):
+        self.renter = User.objects.create_user(username='renter', email='renter@example.com',
+                                               password='testpass123')
+        owner = User.objects.create_user(username='owner', email='owner@example.com',
+                                         password='testpass123', user_type='host')
+        self.vehicle = Vehicle.objects.create(owner=owner, make='Toyota', model='Camry', year=2020,
+                                              plate_number='ABC123', daily_rate=50)
+        start = date.today() + timedelta(days=10)
+        self.booking = Booking.objects.create(renter=self.renter, vehicle=self.vehicle, start_date=start,
+                                              end_date=start + timedelta(days=2), total_amount=100)
+        self.client.force_authenticate(self.renter)
+        self.bookings_url = reverse('booking-list-create')
+
+    def get(self, url, params=None):
+        def send():
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            return response
+        return send
+
+    def test_list_orderings(self):
+        """Test each ordering_fields ordering, both ways, with and without counts"""
+        self.assertIndexedQueries(self.get(self.bookings_url))
+        for field in BookingListCreateView.ordering_fields:
+            for ordering in (field, f'-{field}'):
+                with self.subTest(ordering=ordering):
+                    self.assertIndexedQueries(self.get(self.bookings_url, {'ordering': ordering}))
+                    self.assertIndexedQueries(self.get(self.bookings_url, {'ordering': ordering, 'count': 'false'}))
+
+    def test_list_filters(self):
+        """Test each BookingFilter filter in the default ordering"""
+        today = date.today().isoformat()
+        for params in ({'status': 'pending'}, {'to_date': today},
+                       {'vehicle_make': 'toy'}, {'vehicle_model': 'cam'},
+                       {'status': 'confirmed', 'cursor': ''}):
+            with self.subTest(params=params):
+                self.assertIndexedQueries(self.get(self.bookings_url, params))
+        # A range of (renter, start_date); only the bookings in it are sorted
+        self.assertIndexedQueries(self.get(self.bookings_url, {'from_date': today}), allow_sort=True)
+
+    def test_list_cursor_pages(self):
+        """Test keyset pages both ways"""
+        cursor = KeysetPagination().encode_cursor(self.booking)
+        for ordering in ('created_at', '-created_at'):
+            with self.subTest(ordering=ordering):
+                self.assertIndexedQueries(self.get(self.bookings_url, {'cursor': '', 'ordering': ordering}))
+                self.assertIndexedQueries(self.get(self.bookings_url, {'cursor': cursor, 'ordering': ordering}))
+
+    def test_detail_and_export(self):
+        """Test the detail view and the renter's export"""
+        self.assertIndexedQueries(self.get(reverse('booking-detail', args=[self.booking.pk])))
+        self.assertIndexedQueries(self.get(reverse('booking-export'), {'format': 'csv', 'scope': 'renter'}))
+
+    def test_overlap_check(self):
+        """Test the overlap check of single and bulk creation"""
+        start = self.booking.start_date + timedelta(days=1)
+        payload = {'vehicle': self.vehicle.pk, 'start_date': start, 'end_date': start + timedelta(days=2)}
+        response = self.assertIndexedQueries(lambda: self.client.post(self.bookings_url, payload))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        start += timedelta(days=10)
+        payload = {'bookings': [
+            {'vehicle': self.vehicle.pk, 'start_date': start, 'end_date': start + timedelta(days=2)},
+        ]}
+        response = self.assertIndexedQueries(
+            lambda: self.client.post(reverse('booking-bulk-create'), payload, format='json'), allow_sort=True
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class BookingSparseFieldsTestCase(APITestCase):
+    """?fields= and ?expand= narrow both the representation and the query."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='mobile', email='mobile@example.com',
+                                             password='testpass123')
+        owner = User.objects.create_user(username='owner', email='owner@example.com',
+                                         password='testpass123', user_type='host')
+        self.client.force_authenticate(self.user)
+        vehicle = Vehicle.objects.create(owner=owner, make='Toyota', model='Camry', year=2020,
+                                         plate_number='SPARSE1', daily_rate=50, description='Long text')
+        for i in range(25):
+            start = date.today() + timedelta(days=3 * i + 1)
+            self.booking = Booking.objects.create(renter=self.user, vehicle=vehicle, start_date=start,
+                                                  end_date=start + timedelta(days=2), notes=f'Trip #{i}')
+        self.bookings_url = reverse('booking-list-create')
+
+    def get(self, url, params):
+        """GET with the compiled path on and off; both must answer alike."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        cache.clear()
+        with override_settings(COMPILED_READ_SERIALIZERS=False):
+            plain = self.client.get(url, params)
+        self.assertEqual(response.content, plain.content)
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_fields_narrow_response_and_query(self):
+        """Test that only the requested fields are represented and loaded"""
+        response, sql = self.get(self.bookings_url, {'fields': 'id,status,days,vehicle_details.make'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0], {
+            'id': self.booking.id, 'vehicle_details': {'make': 'Toyota'}, 'days': 2, 'status': 'pending',
+        })
+        for column in ('notes', 'description', 'username'):
+            self.assertNotIn(f'"{column}"', sql)
+
+    def test_expand_adds_the_full_vehicle(self):
+        """Test that ?expand=vehicle embeds every vehicle field"""
+        response, sql = self.get(self.bookings_url, {'fields': 'id', 'expand': 'vehicle'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'vehicle_details'})
+        self.assertEqual(response.data['results'][0]['vehicle_details']['description'], 'Long text')
+
+        full = self.client.get(self.bookings_url, {'expand': 'vehicle'})
+        self.assertEqual(full.data['results'], self.client.get(self.bookings_url).data['results'])
+
+    def test_cursor_pages_with_fields(self):
+        """Test that keyset cursors work when created_at is not requested"""
+        response, _ = self.get(self.bookings_url, {'fields': 'id', 'cursor': ''})
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_detail_with_fields(self):
+        """Test ?fields= on the detail view, and that updates answer in full"""
+        url = reverse('booking-detail', args=[self.booking.pk])
+        response, _ = self.get(url, {'fields': 'id,notes'})
+        self.assertEqual(response.data, {'id': self.booking.id, 'notes': 'Trip #24'})
+
+        response = self.client.patch(f'{url}?fields=id', {'notes': 'Changed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('vehicle_details', response.data['booking'])
+
+    def test_unknown_fields_are_rejected(self):
+        """Test that unknown fields and expansions answer 400"""
+        for params in ({'fields': 'id,nope'}, {'fields': 'status.make'}, {'fields': 'vehicle_details.nope'},
+                       {'expand': 'renter'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.bookings_url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookingThrottleTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        throttling = override_settings(
+            THROTTLING={**settings.THROTTLING, 'ENABLED': True},
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'booking_create': '2/hour'}},
+        )
+        throttling.enable()
+        self.addCleanup(throttling.disable)
+        self.user = User.objects.create_user(username='eager', email='eager@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_booking_creation_is_throttled_per_user(self):
+        """Test that single and bulk creation share the user's bucket, and reads are not throttled"""
+        self.assertEqual(self.client.post(reverse('booking-list-create'), {}).status_code, 400)
+        self.assertEqual(self.client.post(reverse('booking-bulk-create'), {}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(reverse('booking-list-create'), {}).status_code, 429)
+        for _ in range(3):
+            self.assertEqual(self.client.get(reverse('booking-list-create')).status_code, 200)
+
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.post(reverse('booking-list-create'), {}).status_code, 400)
+
+
+class BookingIdempotencyTestCase(APITestCase):
+    def setUp(self):
+        idempotency.get_store().clear()
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='testpass123')
+        self.user = User.objects.create_user(username='retrier', email='retrier@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.vehicle = Vehicle.objects.create(
+            owner=owner, make='Toyota', model='Camry', year=2020, plate_number='RETRY1', daily_rate=50.00,
+        )
+        start = date.today() + timedelta(days=5)
+        self.data = {'vehicle': self.vehicle.id, 'start_date': start, 'end_date': start + timedelta(days=3)}
+        self.url = reverse('booking-list-create')
+
+    def test_retry_replays_first_response(self):
+        """Test that a retry gets the stored response without validating or writing again"""
+        first = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(Booking.objects.count(), 1)
+
+        # Without a key, the same body is a new request and overlaps the first
+        self.assertEqual(self.client.post(self.url, self.data).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_key_reused_with_different_body(self):
+        """Test that a key sent with another body is rejected"""
+        self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY='abc')
+        response = self.client.post(
+            self.url, {**self.data, 'end_date': self.data['end_date'] + timedelta(days=1)}, HTTP_IDEMPOTENCY_KEY='abc',
+        )
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_keys_are_scoped_per_user_and_validated(self):
+        """Test that users do not see each other's responses and oversized keys are rejected"""
+        self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY='abc')
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.client.force_authenticate(other)
+        response = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+        response = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY='k' * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_server_errors_are_not_stored(self):
+        """Test that a failed request releases its key for the retry"""
+        with mock.patch.object(BookingListCreateView, 'create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY='abc')
+        response = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    @override_settings(IDEMPOTENCY={**settings.IDEMPOTENCY, 'MAX_KEYS': 2})
+    def test_local_store_evicts_oldest(self):
+        """Test that the local store keeps at most MAX_KEYS records"""
+        store = idempotency.get_store()
+        for key in 'abc':
+            self.assertIsNone(store.claim(key, 'fingerprint', 60))
+            store.complete(key, 'fingerprint', (201, {}), 60)
+        self.assertIsNone(store.claim('a', 'fingerprint', 60))
+        self.assertEqual(store.claim('c', 'fingerprint', 60), ('done', 'fingerprint', (201, {})))
+
+    def test_expired_records_are_dropped(self):
+        store = idempotency.get_store()
+        with mock.patch.object(idempotency.LocalIdempotencyStore, 'timer', return_value=0):
+            store.claim('a', 'fingerprint', 60)
+        with mock.patch.object(idempotency.LocalIdempotencyStore, 'timer', return_value=61):
+            self.assertIsNone(store.claim('a', 'fingerprint', 60))
+
+    @override_settings(IDEMPOTENCY={**settings.IDEMPOTENCY, 'STORE': 'one_now_rental.idempotency.CacheIdempotencyStore'})
+    def test_cache_store(self):
+        cache.clear()
+        first = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY='abc')
+        retry = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class BookingIdempotencyConcurrencyTestCase(TransactionTestCase):
+    def setUp(self):
+        idempotency.get_store().clear()
+        owner = User.objects.create(username='owner', email='owner@example.com')
+        self.renter = User.objects.create(username='renter', email='renter@example.com')
+        self.vehicle = Vehicle.objects.create(
+            owner=owner, make='Toyota', model='Camry', year=2020, plate_number='RETRY2', daily_rate=50.00,
+        )
+
+    def test_concurrent_duplicates_create_once(self):
+        """Test that duplicates in flight together are answered 409 or replayed, never run twice"""
+        start = date.today() + timedelta(days=5)
+        data = {'vehicle': self.vehicle.id, 'start_date': start, 'end_date': start + timedelta(days=3)}
+        barrier = threading.Barrier(6)
+        responses = [None] * 6
+
+        def book(index):
+            client = APIClient()
+            client.force_authenticate(self.renter)
+            barrier.wait()
+            try:
+                responses[index] = client.post(reverse('booking-list-create'), data, HTTP_IDEMPOTENCY_KEY='abc')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(index,)) for index in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        original = [r for r in responses if r.status_code == 201 and 'Idempotent-Replayed' not in r]
+        self.assertEqual(len(original), 1)
+        for response in responses:
+            self.assertIn(response.status_code, (status.HTTP_201_CREATED, status.HTTP_409_CONFLICT))
+            if response.status_code == status.HTTP_409_CONFLICT:
+                self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class BookingLifecycleTestCase(QueryPlanAssertionsMixin, APITestCase):
+    """Stale pending bookings expire and ended confirmed ones complete, in batched updates."""
+
+    def setUp(self):
+        cache.clear()
+        self.renter = User.objects.create_user(username='renter', email='renter@example.com',
+                                               password='testpass123')
+        owner = User.objects.create_user(username='owner', email='owner@example.com',
+                                         password='testpass123', user_type='host')
+        self.vehicle = Vehicle.objects.create(owner=owner, make='Toyota', model='Camry', year=2020,
+                                              plate_number='LIFE-1', daily_rate=50)
+        self.today = date.today()
+        self.now = timezone.now()
+
+    def book(self, status, start, end, age_hours=0):
+        """A booking of days ``[start, end)`` from today, made ``age_hours`` ago; past dates bypass save()."""
+        booking, = Booking.objects.bulk_create([Booking(
+            renter=self.renter, vehicle=self.vehicle, status=status, total_amount=(end - start) * 50,
+            start_date=self.today + timedelta(days=start), end_date=self.today + timedelta(days=end),
+        )])
+        Booking.objects.filter(pk=booking.pk).update(created_at=self.now - timedelta(hours=age_hours))
+        return booking.pk
+
+    def statuses(self):
+        return dict(Booking.objects.values_list('pk', 'status'))
+
+    def test_transitions(self):
+        """Test which bookings expire and complete, and that the rest are left alone"""
+        stale = self.book('pending', 3, 5, age_hours=49)
+        fresh = self.book('pending', 6, 8, age_hours=1)
+        ended = self.book('confirmed', -4, -1)
+        ending_today = self.book('confirmed', -2, 0)
+        ongoing = self.book('confirmed', -1, 1)
+        cancelled = self.book('cancelled', 10, 12, age_hours=72)
+
+        self.assertEqual(lifecycle.run(), {'expire': 1, 'complete': 2})
+        self.assertEqual(self.statuses(), {
+            stale: 'cancelled', fresh: 'pending', ended: 'completed', ending_today: 'completed',
+            ongoing: 'confirmed', cancelled: 'cancelled',
+        })
+        self.assertEqual(lifecycle.run(), {'expire': 0, 'complete': 0})
+
+        with override_settings(BOOKING_LIFECYCLE={**settings.BOOKING_LIFECYCLE, 'PENDING_TTL': 1800}):
+            self.assertEqual(lifecycle.run(), {'expire': 1, 'complete': 0})
+        self.assertEqual(self.statuses()[fresh], 'cancelled')
+
+    def test_chunks(self):
+        """Test that each chunk is one indexed read and one update"""
+        for day in range(5):
+            self.book('pending', day + 1, day + 2, age_hours=49)
+            self.book('confirmed', -day - 2, -day - 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(lifecycle.run(batch_size=2), {'expire': 5, 'complete': 5})
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 6)
+        self.assertEqual(set(self.statuses().values()), {'cancelled', 'completed'})
+
+        self.book('pending', 1, 2, age_hours=49)
+        self.book('confirmed', -3, -1)
+        self.assertIndexedQueries(lambda: lifecycle.run(batch_size=2))
+
+    def test_caches_follow_transitions(self):
+        """Test that calendars, booking responses and the analytics rollup see the new statuses"""
+        self.book('pending', 2, 4, age_hours=49)
+        call_command('rebuild_booking_stats', stdout=io.StringIO())
+        self.client.force_authenticate(self.renter)
+        calendar_url = reverse('vehicle-calendar', args=[self.vehicle.pk])
+        params = {'from': self.today, 'to': self.today + timedelta(days=5)}
+        self.assertEqual(self.client.get(calendar_url, params).data['days'], '00110')
+        self.assertEqual(self.client.get(reverse('booking-list-create')).data['results'][0]['status'], 'pending')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lifecycle.run()
+        self.assertEqual(self.client.get(calendar_url, params).data['days'], '00000')
+        self.assertEqual(self.client.get(reverse('booking-list-create')).data['results'][0]['status'], 'cancelled')
+        call_command('check_booking_stats', stdout=io.StringIO())
+
+    def test_command(self):
+        self.book('pending', 2, 4, age_hours=49)
+        out = io.StringIO()
+        call_command('run_booking_lifecycle', batch_size=10, allow_local_caches=True, stdout=out)
+        self.assertIn('Expired 1 and completed 0 bookings', out.getvalue())
+        with self.assertRaisesMessage(CommandError, '--batch-size'):
+            call_command('run_booking_lifecycle', batch_size=0, stdout=out)
+
+    def test_command_refuses_local_caches(self):
+        """Test that the job will not run where its invalidations cannot reach the web workers"""
+        self.book('pending', 2, 4, age_hours=49)
+        with self.assertRaisesMessage(CommandError, 'RESPONSE_CACHE and OCCUPANCY_CACHE use a local-memory cache'):
+            call_command('run_booking_lifecycle', stdout=io.StringIO())
+        self.assertEqual(set(self.statuses().values()), {'pending'})
+
+        shared = {**settings.CACHES, 'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                                'LOCATION': 'lifecycle_test_cache'}}
+        with override_settings(CACHES=shared, OCCUPANCY_CACHE={**settings.OCCUPANCY_CACHE, 'ALIAS': 'shared'},
+                               RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False}):
+            self.assertEqual(lifecycle.process_local_caches(), [])
+
+
+class BookingLifecycleConcurrencyTestCase(TransactionTestCase):
+    def test_concurrent_runs_move_each_booking_once(self):
+        """Test that runs on several threads share the work without repeating it"""
+        renter = User.objects.create(username='renter', email='renter@example.com')
+        vehicle = Vehicle.objects.create(owner=renter, make='Toyota', model='Camry', year=2020,
+                                         plate_number='LIFE-2', daily_rate=50)
+        today = date.today()
+        Booking.objects.bulk_create([
+            Booking(renter=renter, vehicle=vehicle, status='confirmed', total_amount=50,
+                    start_date=today - timedelta(days=day + 1), end_date=today - timedelta(days=day))
+            for day in range(40)
+        ])
+        changed = []
+        bookings_changed.connect(lambda bookings, **kwargs: changed.extend(b.pk for b in bookings),
+                                 sender=Booking, weak=False, dispatch_uid='lifecycle-test')
+        self.addCleanup(bookings_changed.disconnect, sender=Booking, dispatch_uid='lifecycle-test')
+
+        barrier = threading.Barrier(4)
+        moved = [None] * 4
+
+        def run(index):
+            barrier.wait()
+            try:
+                moved[index] = lifecycle.run(batch_size=3)['complete']
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(moved), 40)
+        self.assertEqual(sorted(changed), sorted(Booking.objects.values_list('pk', flat=True)))
+        self.assertFalse(Booking.objects.exclude(status='completed').exists())
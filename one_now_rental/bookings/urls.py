@@ -3,5 +3,7 @@ from . import views
 
 urlpatterns = [
     path('bookings/', views.BookingListCreateView.as_view(), name='booking-list-create'),
+    path('bookings/export/', views.BookingExportView.as_view(), name='booking-export'),
+    path('bookings/bulk/', views.BookingBulkCreateView.as_view(), name='booking-bulk-create'),
     path('bookings/<int:pk>/', views.BookingRetrieveUpdateView.as_view(), name='booking-detail'),
 ]
\ No newline at end of file
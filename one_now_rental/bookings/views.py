@@ -1,14 +1,26 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from django_filters import rest_framework as filters
+from one_now_rental.db_router import ReplicaReadMixin
+from one_now_rental.exports import ExportView
+from one_now_rental.fast_serializers import CompiledListMixin
+from one_now_rental.idempotency import IdempotentCreateMixin
+from one_now_rental.pagination import KeysetPagination
+from one_now_rental.response_cache import CachedResponseMixin
+from one_now_rental.serializers import SparseFieldsMixin, eager_queryset
+from one_now_rental.throttling import BookingCreateThrottle
 from .models import Booking
-from .serializers import BookingSerializer, BookingCreateSerializer
+from .serializers import BookingSerializer, BookingCreateSerializer, BookingBulkCreateSerializer
 
 class BookingFilter(filters.FilterSet):
     from_date = filters.DateFilter(field_name='start_date', lookup_expr='gte')
     to_date = filters.DateFilter(field_name='end_date', lookup_expr='lte')
+    # Scans only the user's bookings; on PostgreSQL, trigram indexes from
+    # vehicles.search back these too
     vehicle_make = filters.CharFilter(field_name='vehicle__make', lookup_expr='icontains')
     vehicle_model = filters.CharFilter(field_name='vehicle__model', lookup_expr='icontains')
     
@@ -16,44 +28,108 @@ class BookingFilter(filters.FilterSet):
         model = Booking
         fields = ['status', 'from_date', 'to_date', 'vehicle_make', 'vehicle_model']
 
-class BookingListCreateView(generics.ListCreateAPIView):
+class BookingListCreateView(ReplicaReadMixin, CachedResponseMixin, CompiledListMixin, SparseFieldsMixin,
+                            IdempotentCreateMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    cache_scope = 'bookings'
+    serializer_class = BookingSerializer
+    throttle_classes = [BookingCreateThrottle]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = BookingFilter
     ordering_fields = ['created_at', 'start_date', 'total_amount']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        return Booking.objects.filter(renter=self.request.user).select_related('vehicle')
+        return eager_queryset(Booking.objects.filter(renter=self.request.user), self.get_serializer_class())
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return BookingCreateSerializer
-        return BookingSerializer
+        return super().get_serializer_class()
 
     def perform_create(self, serializer):
         serializer.save(renter=self.request.user)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        print(serializer)
-        if serializer.is_valid():
-            self.perform_create(serializer)
-            return Response({
-                'message': 'Booking created successfully',
-                'booking': BookingSerializer(serializer.instance).data
-            }, status=status.HTTP_201_CREATED)
+        # Validation locks the vehicle, so the overlap check and the insert
+        # must share one transaction.
+        with transaction.atomic():
+            if serializer.is_valid():
+                self.perform_create(serializer)
+                return Response({
+                    'message': 'Booking created successfully',
+                    'booking': BookingSerializer(serializer.instance).data
+                }, status=status.HTTP_201_CREATED)
         return Response({
             'error': 'Booking creation failed',
             'details': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
 
-class BookingRetrieveUpdateView(generics.RetrieveUpdateAPIView):
+class BookingBulkCreateView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BookingBulkCreateSerializer
+    throttle_classes = [BookingCreateThrottle]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        # Validation locks the batch's vehicles until the insert commits
+        with transaction.atomic():
+            if serializer.is_valid():
+                bookings = serializer.save()
+                return Response({
+                    'message': 'Bookings created successfully',
+                    'bookings': BookingSerializer(bookings, many=True).data
+                }, status=status.HTTP_201_CREATED)
+        return Response({
+            'error': 'Bulk booking creation failed',
+            'details': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+class BookingExportView(ExportView):
+    """
+    All of the user's bookings as CSV or NDJSON, filtered like the list.
+    ``?scope=host`` exports the bookings on the user's own vehicles and is
+    the default for hosts; ``?scope=renter`` exports the ones they made.
+    """
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = BookingFilter
+    export_name = 'bookings'
+    export_fields = (
+        ('id', 'id'),
+        ('renter', 'renter__username'),
+        ('vehicle', 'vehicle_id'),
+        ('plate_number', 'vehicle__plate_number'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+        ('status', 'status'),
+        ('total_amount', 'total_amount'),
+        ('notes', 'notes'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
+
+    def get_queryset(self):
+        user = self.request.user
+        scope = self.request.query_params.get('scope') or ('host' if user.user_type == 'host' else 'renter')
+        if scope == 'host':
+            queryset = Booking.objects.filter(vehicle__owner=user)
+        elif scope == 'renter':
+            queryset = Booking.objects.filter(renter=user)
+        else:
+            raise ValidationError({'scope': 'Scope must be "host" or "renter".'})
+        return queryset.order_by('created_at', 'id')
+
+
+class BookingRetrieveUpdateView(ReplicaReadMixin, CachedResponseMixin, SparseFieldsMixin,
+                                generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    cache_scope = 'bookings'
     serializer_class = BookingSerializer
 
     def get_queryset(self):
-        return Booking.objects.filter(renter=self.request.user).select_related('vehicle')
+        return eager_queryset(Booking.objects.filter(renter=self.request.user), self.get_serializer_class())
 
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
@@ -64,12 +140,15 @@ class BookingRetrieveUpdateView(generics.RetrieveUpdateAPIView):
         filtered_data = {k: v for k, v in request.data.items() if k in allowed_fields}
         
         serializer = self.get_serializer(instance, data=filtered_data, partial=partial)
-        if serializer.is_valid():
-            booking = serializer.save()
-            return Response({
-                'message': 'Booking updated successfully',
-                'booking': serializer.data
-            }, status=status.HTTP_200_OK)
+        # Reactivating a booking locks its vehicle for the overlap check, so
+        # validation and save() share one transaction, as in create()
+        with transaction.atomic():
+            if serializer.is_valid():
+                serializer.save()
+                return Response({
+                    'message': 'Booking updated successfully',
+                    'booking': serializer.data
+                }, status=status.HTTP_200_OK)
         return Response({
             'error': 'Booking update failed',
             'details': serializer.errors
@@ -2,6 +2,8 @@
 ASGI config for one_now_rental project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are routed through ``one_now_rental.asgi_urls``, which serves the
+async views where an app provides them.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +11,19 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'one_now_rental.settings')
 
-application = get_asgi_application()
+ASGI_URLCONF = 'one_now_rental.asgi_urls'
+
+
+class RentalASGIHandler(ASGIHandler):
+    async def get_response_async(self, request):
+        request.urlconf = ASGI_URLCONF
+        return await super().get_response_async(request)
+
+
+django.setup(set_prefix=False)
+application = RentalASGIHandler()
@@ -0,0 +1,14 @@
+"""
+URL configuration served under ASGI (see asgi.py).
+
+Routes with an async implementation come first and shadow their sync
+counterparts; everything else falls through to ``one_now_rental.urls``.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/auth/', include('authentication.async_urls')),
+    path('api/', include('vehicles.async_urls')),
+    path('api/', include('bookings.async_urls')),
+    path('', include('one_now_rental.urls')),
+]
@@ -0,0 +1,178 @@
+"""
+Async dispatch for DRF generic views, served in place of the sync views
+under ASGI (see ``one_now_rental.asgi_urls``).
+
+DRF's ``APIView.dispatch`` is synchronous, so under ASGI Django runs every
+DRF request on a worker thread. ``AsyncGenericViewMixin`` replaces it with a
+coroutine that authenticates, filters, paginates and serializes on the
+event loop, reading through the async ORM. Mixed in ahead of an existing
+view, it reuses that view's querysets, filters, pagination and serializers,
+so requests and responses are the same as the sync view's.
+
+Writes still run the view's sync handler, in one thread hop per request:
+they need ``transaction.atomic()`` and row locks, which the async ORM does
+not offer.
+"""
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from rest_framework import exceptions
+from rest_framework.response import Response
+
+from .fast_serializers import CompiledListMixin, compile_serializer
+
+
+class AsyncGenericViewMixin:
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        """``APIView.dispatch()`` with async initialization and handlers."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        if not hasattr(self.response, 'render'):
+            return self.response
+        # Rendered here, since Django would render a template response on a thread
+        self.response.render()
+        return HttpResponse(self.response.content, status=self.response.status_code,
+                            headers=self.response.headers)
+
+    async def ainitial(self, request, *args, **kwargs):
+        """``APIView.initial()`` with authentication awaited."""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        await self.acheck_throttles(request)
+
+    async def aperform_authentication(self, request):
+        """
+        ``Request.user`` resolution: authenticators providing
+        ``aauthenticate()`` are awaited, others run on a thread.
+        """
+        for authenticator in request.authenticators:
+            authenticate = getattr(authenticator, 'aauthenticate', None)
+            try:
+                if authenticate is not None:
+                    user_auth_tuple = await authenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def acheck_throttles(self, request):
+        """
+        ``check_throttles()``, awaiting throttles that provide
+        ``aallow_request()`` and running others on a thread.
+        """
+        durations = []
+        for throttle in self.get_throttles():
+            allow_request = getattr(throttle, 'aallow_request', None)
+            if allow_request is not None:
+                allowed = await allow_request(request, self)
+            else:
+                allowed = await sync_to_async(throttle.allow_request)(request, self)
+            if not allowed:
+                durations.append(throttle.wait())
+
+        if durations:
+            durations = [duration for duration in durations if duration is not None]
+            self.throttled(request, max(durations, default=None))
+
+    async def afilter_queryset(self, queryset):
+        """
+        ``filter_queryset()``, once every filter backend providing
+        ``aprepare()`` has awaited what it needs from the database: the
+        sync filters must not query it from the event loop.
+        """
+        for backend in self.filter_backends:
+            prepare = getattr(backend(), 'aprepare', None)
+            if prepare is not None:
+                await prepare(self.request, queryset, self)
+        return self.filter_queryset(queryset)
+
+    async def aget_object(self):
+        """``get_object()`` through the async ORM."""
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        paginate = getattr(self.paginator, 'apaginate_queryset', None)
+        if paginate is None:
+            return await sync_to_async(self.paginate_queryset)(queryset)
+        return await paginate(queryset, self.request, view=self)
+
+
+class AsyncListMixin(AsyncGenericViewMixin):
+    """``list()`` on the event loop, compiled serializers included."""
+
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        if isinstance(self, CompiledListMixin) and settings.COMPILED_READ_SERIALIZERS:
+            compiled = compile_serializer(self.get_serializer_class())
+            queryset, represent = compiled.values(queryset), compiled.represent
+        else:
+            def represent(rows):
+                return self.get_serializer(rows, many=True).data
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(represent(page))
+        return Response(represent([row async for row in queryset]))
+
+
+class AsyncRetrieveMixin(AsyncGenericViewMixin):
+    """``retrieve()`` on the event loop."""
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
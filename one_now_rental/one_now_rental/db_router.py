@@ -0,0 +1,138 @@
+"""
+Read-replica routing.
+
+Writes, and reads by default, go to the ``default`` (primary) database.
+Views with ``ReplicaReadMixin`` serve their GET/HEAD/OPTIONS requests from
+one of ``settings.DATABASE_REPLICAS``, picked at random per query.
+
+After a successful write, ``ReplicaPinningMiddleware`` pins the user to the
+primary for ``settings.REPLICA_PIN_SECONDS``. Their next reads then see
+their own writes even while the replicas lag behind.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def primary(queryset):
+    """``queryset`` pinned to the primary, for reads that must not lag."""
+    return queryset.using(DEFAULT_DB_ALIAS)
+
+
+def _pin_key(user_id):
+    return f'dbpin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    cache.set(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+async def apin_to_primary(user_id):
+    await cache.aset(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(_pin_key(user_id), False)
+
+
+async def ais_pinned(user_id):
+    return await cache.aget(_pin_key(user_id), False)
+
+
+class ReplicaReadMixin:
+    """Serve a DRF view's safe-method requests from the replicas."""
+
+    def dispatch(self, request, *args, **kwargs):
+        # Restores the flag however the request ends, errors included
+        token = _replica_reads.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication runs here, before reads are switched over
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned(request.user.pk):
+            _replica_reads.set(True)
+
+
+class AsyncReplicaReadMixin:
+    """``ReplicaReadMixin`` for views in ``one_now_rental.async_views``."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        token = _replica_reads.set(False)
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    async def ainitial(self, request, *args, **kwargs):
+        await super().ainitial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not await ais_pinned(request.user.pk):
+            _replica_reads.set(True)
+
+
+class ReplicaPinningMiddleware:
+    """Pin users to the primary for a while after each successful write."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.wrote(request, response):
+            user_id = self.user_id(request)
+            if user_id is not None:
+                pin_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.wrote(request, response):
+            # Outside DRF views the user is still the lazy session user,
+            # which queries when first read
+            user_id = await sync_to_async(self.user_id)(request)
+            if user_id is not None:
+                await apin_to_primary(user_id)
+        return response
+
+    def wrote(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
+
+    def user_id(self, request):
+        # DRF has replaced the lazy session user with the authenticated one
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.pk
+        return None
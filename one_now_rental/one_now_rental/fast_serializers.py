@@ -0,0 +1,229 @@
+"""
+Read-only fast path for list endpoints.
+
+``compile_serializer()`` turns a ``ModelSerializer`` class into a Python
+function that takes one ``queryset.values()`` row and returns the same dict
+literal the serializer would build. Nested serializers are inlined. This
+skips model instantiation, the per-field ``get_attribute`` walk and the
+nested serializer instance per row. The output renders to the same JSON
+bytes as ``serializer_class(queryset, many=True).data``, and the parity tests
+in the bookings and vehicles apps hold it to that.
+"""
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .instrumentation import SerializationTimer
+from .serializers import method_field_sources
+
+# Fields whose representation is the database value itself
+_IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.EmailField,
+    serializers.IntegerField,
+    serializers.URLField,
+)
+
+
+class _RowView:
+    """Attribute access to one nesting level of a ``values()`` row."""
+    __slots__ = ('_row', '_prefix')
+
+    def __init__(self, row, prefix):
+        self._row = row
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        try:
+            return self._row[self._prefix + name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _unsupported(serializer, field, reason):
+    return ImproperlyConfigured(
+        f'{serializer.__class__.__name__}.{field.field_name}: {reason} '
+        'is not supported by compiled serializers.'
+    )
+
+
+def _scalar_converter(field):
+    """Return a value -> representation callable for ``field``, or None for identity."""
+    field_type = type(field)
+    if field_type in _IDENTITY_FIELDS:
+        return None
+
+    if field_type is serializers.DateField:
+        if getattr(field, 'format', api_settings.DATE_FORMAT).lower() == 'iso-8601':
+            return lambda value: value.isoformat()
+
+    if field_type is serializers.DecimalField:
+        coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if coerce_to_string and field.decimal_places is not None and not (
+            field.localize or field.normalize_output
+        ):
+            # DecimalField.quantize() copies the decimal context per value
+            # to cap precision at max_digits, which column values never exceed
+            exponent = Decimal(1).scaleb(-field.decimal_places)
+            return lambda value: '{:f}'.format(value.quantize(exponent, rounding=field.rounding))
+
+    if field_type is serializers.PrimaryKeyRelatedField and field.pk_field is None:
+        return None
+
+    if isinstance(field, serializers.RelatedField):
+        raise _unsupported(field.parent, field, field_type.__name__)
+    return field.to_representation
+
+
+def _datetime_converter(field):
+    """
+    ISO 8601 DateTimeField output with the active timezone passed in, since
+    looking it up per value is most of DateTimeField's cost.
+    """
+    def convert(value, tz):
+        if value.tzinfo is not None and tz is not None:
+            value = value.astimezone(tz)
+        else:
+            value = field.enforce_timezone(value)
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _str_converter(related_model, pk_key, columns):
+    """``str()`` of a partial related instance, shared per pk within one call."""
+    def convert(row, memo):
+        pk = row[pk_key]
+        if pk is None:
+            return None
+        text = memo.get((pk_key, pk))
+        if text is None:
+            instance = related_model(pk=pk, **{attr: row[column] for attr, column in columns})
+            text = memo[(pk_key, pk)] = str(instance)
+        return text
+    return convert
+
+
+class CompiledSerializer:
+    """
+    A ``values()``-based reader for one ``ModelSerializer`` class.
+
+    Supported fields are model columns (through dotted sources too),
+    ``PrimaryKeyRelatedField``, ``StringRelatedField`` (the related model's
+    ``STR_FIELDS`` are loaded and ``__str__`` runs on a partial instance),
+    nested single serializers, and ``SerializerMethodField``. Methods get an
+    object that only exposes the declared fields of their level and the
+    columns in ``Meta.method_field_sources``, with foreign keys as ids.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._paths = []
+        self._namespace = {'_RowView': _RowView}
+        body = self._compile(serializer_class(), '')
+        self.paths = tuple(dict.fromkeys(self._paths))
+        self.source = f'def build(row, memo, tz):\n    return {body}\n'
+        exec(compile(self.source, f'<compiled {serializer_class.__qualname__}>', 'exec'), self._namespace)
+        self._build = self._namespace['build']
+
+    def _bind(self, value):
+        name = f'_c{len(self._namespace)}'
+        self._namespace[name] = value
+        return name
+
+    def _column(self, path):
+        self._paths.append(path)
+        return f'row[{path!r}]'
+
+    def _compile(self, serializer, prefix):
+        """Return a dict-literal expression for one serializer level."""
+        model = serializer.Meta.model
+        items = []
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                method = self._bind(getattr(serializer, field.method_name))
+                for name in method_field_sources(serializer, field):
+                    self._column(prefix + name)
+                items.append(f'{field.field_name!r}: {method}(_RowView(row, {prefix!r}))')
+                continue
+            if field.source == '*':
+                raise _unsupported(serializer, field, "source='*'")
+            if isinstance(field, serializers.ListSerializer):
+                raise _unsupported(serializer, field, 'many=True')
+
+            path = prefix + field.source.replace('.', '__')
+            if isinstance(field, serializers.BaseSerializer):
+                nested = self._compile(field, path + '__')
+                expression = f'None if {self._column(path)} is None else {nested}'
+            elif isinstance(field, serializers.StringRelatedField):
+                related_model = model._meta.get_field(field.source).related_model
+                str_fields = getattr(related_model, 'STR_FIELDS', None) or [
+                    f.attname for f in related_model._meta.concrete_fields if not f.primary_key
+                ]
+                columns = tuple((name, f'{path}__{name}') for name in str_fields)
+                self._column(path)
+                for _, column in columns:
+                    self._column(column)
+                expression = f'{self._bind(_str_converter(related_model, path, columns))}(row, memo)'
+            elif (
+                type(field) is serializers.DateTimeField
+                and getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() == 'iso-8601'
+                and not hasattr(field, 'timezone')
+            ):
+                convert = self._bind(_datetime_converter(field))
+                expression = f'None if (v := {self._column(path)}) is None else {convert}(v, tz)'
+            else:
+                convert = _scalar_converter(field)
+                if convert is None:
+                    expression = self._column(path)
+                else:
+                    expression = f'None if (v := {self._column(path)}) is None else {self._bind(convert)}(v)'
+            items.append(f'{field.field_name!r}: ({expression})')
+        return '{' + ', '.join(items) + '}'
+
+    def values(self, queryset):
+        return queryset.values(*self.paths)
+
+    def represent(self, rows):
+        # __str__ results are shared within one call, e.g. the renter on
+        # every row of their own booking list
+        memo = {}
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        build = self._build
+        with SerializationTimer():
+            return [build(row, memo, tz) for row in rows]
+
+
+# Bounded like eager_loading_paths(), as sparse serializers are classes too
+@lru_cache(maxsize=1024)
+def compile_serializer(serializer_class):
+    return CompiledSerializer(serializer_class)
+
+
+class CompiledListMixin:
+    """
+    Serve ``list()`` through the compiled serializer of the view's
+    serializer class when ``settings.COMPILED_READ_SERIALIZERS`` is on.
+    Filtering and pagination run unchanged on the ``values()`` queryset.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.COMPILED_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+
+        compiled = compile_serializer(self.get_serializer_class())
+        queryset = compiled.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.represent(page))
+        return Response(compiled.represent(queryset))
@@ -0,0 +1,179 @@
+"""
+``Idempotency-Key`` support for POST endpoints.
+
+The first request with a given key runs as usual, and its response is
+stored for ``settings.IDEMPOTENCY['TTL']`` seconds. Retries with the same
+key and the same body are answered from the store, with an
+``Idempotent-Replayed: true`` header and without running validation or
+touching the database. Keys are scoped to the user and the path.
+
+A retry that arrives while the first request is still running gets 409
+with ``Retry-After``, and a key sent again with a different body gets 422;
+neither runs the view. Responses with a 5xx status, and exceptions, are not
+stored, so the request can be retried under the same key.
+
+Records live in the store named in ``settings.IDEMPOTENCY['STORE']``:
+
+* ``LocalIdempotencyStore`` (the default) keeps at most ``MAX_KEYS``
+  records in process memory, dropping the oldest first. Retries must reach
+  the same process to be recognized.
+* ``CacheIdempotencyStore`` keeps them in the cache named by
+  ``settings.IDEMPOTENCY['CACHE_ALIAS']``, shared by every process. Keys are
+  claimed with ``cache.add()``, which is atomic on the memcached, Redis and
+  database backends.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+PENDING, DONE = 'pending', 'done'
+
+
+class LocalIdempotencyStore:
+    """Records in this process, oldest dropped past ``settings.IDEMPOTENCY['MAX_KEYS']``."""
+    timer = time.monotonic
+
+    def __init__(self):
+        self.max_keys = settings.IDEMPOTENCY['MAX_KEYS']
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._records.get(key)
+        if entry is not None and entry[0] <= now:
+            del self._records[key]
+            entry = None
+        return entry
+
+    def claim(self, key, fingerprint, timeout):
+        """
+        Mark ``key`` as in flight for ``timeout`` seconds and return None, or
+        return the record already held for it without changing it.
+        """
+        with self._lock:
+            now = self.timer()
+            entry = self._live(key, now)
+            if entry is not None:
+                return entry[1]
+            self._records[key] = (now + timeout, (PENDING, fingerprint, None))
+            while len(self._records) > self.max_keys:
+                self._records.popitem(last=False)
+            return None
+
+    def complete(self, key, fingerprint, response, timeout):
+        with self._lock:
+            self._records[key] = (self.timer() + timeout, (DONE, fingerprint, response))
+            self._records.move_to_end(key)
+
+    def release(self, key):
+        with self._lock:
+            self._records.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+
+class CacheIdempotencyStore:
+    """Records in a Django cache, shared by every process using it."""
+
+    def __init__(self):
+        self.cache = caches[settings.IDEMPOTENCY['CACHE_ALIAS']]
+
+    def _key(self, key):
+        return f'idempotency:{key}'
+
+    def claim(self, key, fingerprint, timeout):
+        if self.cache.add(self._key(key), (PENDING, fingerprint, None), timeout):
+            return None
+        # Expired between the add and the get: the caller runs the request
+        return self.cache.get(self._key(key))
+
+    def complete(self, key, fingerprint, response, timeout):
+        self.cache.set(self._key(key), (DONE, fingerprint, response), timeout)
+
+    def release(self, key):
+        self.cache.delete(self._key(key))
+
+    def clear(self):
+        self.cache.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.IDEMPOTENCY['STORE'])()
+    return _store
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    global _store
+    if setting == 'IDEMPOTENCY':
+        _store = None
+
+
+def _error(status_code, detail, headers=None):
+    return Response({'error': 'Idempotency-Key rejected', 'detail': detail}, status=status_code, headers=headers)
+
+
+class IdempotentCreateMixin:
+    """Honour ``Idempotency-Key`` on ``post()`` of a DRF view."""
+
+    def post(self, request, *args, **kwargs):
+        idempotency_key = request.headers.get(HEADER)
+        if idempotency_key is None:
+            return super().post(request, *args, **kwargs)
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            return _error(status.HTTP_400_BAD_REQUEST,
+                          f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters long.')
+
+        config = settings.IDEMPOTENCY
+        key = f'{request.user.pk}:{request.path}:{idempotency_key}'
+        # Read before the parsers consume the stream
+        fingerprint = hashlib.sha256(
+            request.content_type.encode() + b'\0' + request.body
+        ).hexdigest()
+
+        store = get_store()
+        record = store.claim(key, fingerprint, config['LOCK_TIMEOUT'])
+        if record is not None:
+            state, stored_fingerprint, stored = record
+            if stored_fingerprint != fingerprint:
+                return _error(status.HTTP_422_UNPROCESSABLE_ENTITY,
+                              f'This {HEADER} was used with a different request.')
+            if state == PENDING:
+                return _error(status.HTTP_409_CONFLICT,
+                              f'A request with this {HEADER} is still in progress.',
+                              headers={'Retry-After': '1'})
+            status_code, data = stored
+            return Response(data, status=status_code, headers={'Idempotent-Replayed': 'true'})
+
+        try:
+            response = super().post(request, *args, **kwargs)
+        except BaseException:
+            store.release(key)
+            raise
+        if response.status_code >= 500:
+            store.release(key)
+        else:
+            store.complete(key, fingerprint, (response.status_code, response.data), config['TTL'])
+        return response
@@ -0,0 +1,252 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` times each request and, through a context
+variable, collects what it spent in the database and in serializers:
+
+* Every database connection gets an execute wrapper that counts and times
+  queries for the current request, and logs those slower than
+  ``SLOW_QUERY_MS`` to the ``one_now_rental.performance`` logger with
+  their SQL (parameters are left out, as they may hold personal data).
+* ``TimedSerializerMixin`` and the compiled read path time serialization
+  with ``SerializationTimer``.
+
+Responses get a ``Server-Timing`` header, and each request is folded into
+in-process histograms per URL name and method, exported in Prometheus text
+format by ``metrics_view``. Recording a request costs two clock reads per
+query and per serialized object, plus one locked histogram update.
+Streaming responses are timed until their first byte. Settings live in
+``settings.PERFORMANCE_METRICS``.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+from . import response_cache
+
+logger = logging.getLogger('one_now_rental.performance')
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('request', 'queries', 'db_ns', 'serialize_ns', 'serializing')
+
+    def __init__(self, request):
+        self.request = request
+        self.queries = 0
+        self.db_ns = 0
+        self.serialize_ns = 0
+        self.serializing = False
+
+    @property
+    def endpoint(self):
+        match = self.request.resolver_match
+        return match.url_name or match.view_name if match else 'unmatched'
+
+
+def record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter_ns()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter_ns() - started
+        timings.queries += 1
+        timings.db_ns += elapsed
+        if elapsed >= settings.PERFORMANCE_METRICS['SLOW_QUERY_MS'] * 1_000_000:
+            logger.warning('Slow query (%.1f ms) on %s %s: %s', elapsed / 1e6,
+                           timings.request.method, timings.endpoint, sql)
+
+
+def _install(connection, **kwargs):
+    # First, so execute_wrapper() blocks entered earlier still pop their own
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+connection_created.connect(_install, dispatch_uid='one_now_rental.instrumentation')
+# Connections this thread opened before the middleware was loaded
+for _connection in connections.all(initialized_only=True):
+    _install(_connection)
+
+
+class SerializationTimer:
+    """Add the time spent inside the block to the request's serializer time."""
+    __slots__ = ('timings', 'started')
+
+    def __enter__(self):
+        timings = _current.get()
+        # Nested serializers are already inside the outer one's time
+        if timings is None or timings.serializing:
+            self.timings = None
+            return
+        self.timings = timings
+        timings.serializing = True
+        self.started = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info):
+        if self.timings is not None:
+            self.timings.serialize_ns += time.perf_counter_ns() - self.started
+            self.timings.serializing = False
+
+
+class TimedSerializerMixin:
+    """Count a serializer's ``to_representation()`` as serializer time."""
+
+    def to_representation(self, instance):
+        with SerializationTimer():
+            return super().to_representation(instance)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Metrics:
+    """Histograms of request, database and serializer seconds per endpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, endpoint, method, seconds, db_seconds, serialize_seconds, queries):
+        buckets = settings.PERFORMANCE_METRICS['BUCKETS']
+        with self.lock:
+            series = self.series.get((endpoint, method))
+            if series is None:
+                series = self.series[(endpoint, method)] = {
+                    'request': Histogram(buckets),
+                    'db': Histogram(buckets),
+                    'serialize': Histogram(buckets),
+                    'queries': 0,
+                }
+            series['request'].observe(seconds)
+            series['db'].observe(db_seconds)
+            series['serialize'].observe(serialize_seconds)
+            series['queries'] += queries
+
+    def reset(self):
+        with self.lock:
+            self.series.clear()
+
+    def render(self):
+        """All series in the Prometheus text exposition format."""
+        with self.lock:
+            snapshot = {
+                key: {
+                    name: value if name == 'queries' else (list(value.counts), value.sum, value.buckets)
+                    for name, value in series.items()
+                }
+                for key, series in sorted(self.series.items())
+            }
+
+        lines = []
+        for name, help_text in (
+            ('request', 'Wall time of requests'),
+            ('db', 'Time requests spent in database queries'),
+            ('serialize', 'Time requests spent in serializers'),
+        ):
+            metric = f'http_{name}_duration_seconds'
+            lines += [f'# HELP {metric} {help_text}.', f'# TYPE {metric} histogram']
+            for (endpoint, method), series in snapshot.items():
+                counts, total, buckets = series[name]
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip([*buckets, '+Inf'], counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{labels}}} {total:.6f}')
+                lines.append(f'{metric}_count{{{labels}}} {cumulative}')
+
+        lines += ['# HELP http_db_queries_total Database queries run by requests.',
+                  '# TYPE http_db_queries_total counter']
+        for (endpoint, method), series in snapshot.items():
+            lines.append(f'http_db_queries_total{{endpoint="{endpoint}",method="{method}"}} {series["queries"]}')
+
+        cache = response_cache.stats()
+        for outcome in ('hits', 'misses'):
+            lines += [f'# HELP response_cache_{outcome}_total Response cache {outcome} in this process.',
+                      f'# TYPE response_cache_{outcome}_total counter',
+                      f'response_cache_{outcome}_total {cache[outcome]}']
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+class PerformanceMiddleware:
+    """Time requests, add ``Server-Timing`` and record them in ``metrics``."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings(request)
+        token = _current.set(timings)
+        started = time.perf_counter_ns()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(timings, response, time.perf_counter_ns() - started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings(request)
+        token = _current.set(timings)
+        started = time.perf_counter_ns()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(timings, response, time.perf_counter_ns() - started)
+
+    def finish(self, timings, response, elapsed_ns):
+        metrics.observe(timings.endpoint, timings.request.method, elapsed_ns / 1e9,
+                        timings.db_ns / 1e9, timings.serialize_ns / 1e9, timings.queries)
+        if settings.PERFORMANCE_METRICS['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'app;dur={elapsed_ns / 1e6:.2f}, '
+                f'db;dur={timings.db_ns / 1e6:.2f};desc="{timings.queries} queries", '
+                f'serialize;dur={timings.serialize_ns / 1e6:.2f}'
+            )
+        return response
+
+
+def metrics_view(request):
+    """
+    ``metrics`` in Prometheus text format. When ``METRICS_TOKEN`` is set,
+    scrapers must send it as a bearer token.
+    """
+    token = settings.PERFORMANCE_METRICS['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
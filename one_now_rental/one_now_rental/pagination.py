@@ -0,0 +1,247 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class UncountedPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination without the ``COUNT(*)`` query.
+
+    One row past the page is fetched to tell whether a next page exists, so
+    responses carry ``next``/``previous``/``results`` but no ``count``.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.page_window(queryset, request)
+        if window is None:
+            return None
+        return self.take_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset()`` reading the page through the async ORM."""
+        window = self.page_window(queryset, request)
+        if window is None:
+            return None
+        return self.take_page([row async for row in window])
+
+    def page_window(self, queryset, request):
+        """The requested page plus one row, as an unevaluated slice."""
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        self.limit = page_size
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params.get(self.page_query_param),
+                message='That page number is not a valid integer.'
+            ))
+
+        offset = (self.page_number - 1) * page_size
+        return queryset[offset:offset + page_size + 1]
+
+    def take_page(self, rows):
+        self.has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if not rows and self.page_number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.page_number, message='That page contains no results.'
+            ))
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        del response_schema['properties']['count']
+        response_schema['required'].remove('count')
+        return response_schema
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+
+class KeysetPagination(UncountedPageNumberPagination):
+    """
+    Page-number pagination with two opt-ins for long lists:
+
+    * ``?count=false`` drops the ``COUNT(*)`` query and the ``count`` key.
+    * ``?cursor=`` switches to keyset pagination on ``(created_at, id)``.
+      Each page is an index range seek that starts after the previous
+      page's last row, so page 5000 costs the same as page 1. Pass an empty
+      ``cursor`` for the first page and then follow ``next``. Keyset pages
+      have no ``count`` or ``previous``.
+
+    Requests without either parameter get plain ``PageNumberPagination``.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    keyset_field = 'created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.mode = 'page'
+        if self.cursor_query_param in request.query_params:
+            self.mode = 'keyset'
+            window = self.keyset_window(queryset, request)
+            return None if window is None else self.take_keyset(list(window))
+        if request.query_params.get(self.count_query_param, '').lower() in ('false', '0'):
+            self.mode = 'uncounted'
+            return super().paginate_queryset(queryset, request, view)
+        return PageNumberPagination.paginate_queryset(self, queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset()`` reading the page through the async ORM."""
+        self.request = request
+        self.mode = 'page'
+        if self.cursor_query_param in request.query_params:
+            self.mode = 'keyset'
+            window = self.keyset_window(queryset, request)
+            return None if window is None else self.take_keyset([row async for row in window])
+        if request.query_params.get(self.count_query_param, '').lower() in ('false', '0'):
+            self.mode = 'uncounted'
+            return await super().apaginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Counted up front, so the paginator never queries on its own
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.page.object_list = [row async for row in self.page.object_list]
+        return self.page.object_list
+
+    def keyset_window(self, queryset, request):
+        """The page after the cursor plus one row, as an unevaluated slice."""
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.limit = page_size
+
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        ordering = [name for name in ordering if name.lstrip('-') != 'id']
+        if [name.lstrip('-') for name in ordering] != [self.keyset_field]:
+            raise ValidationError({
+                'ordering': f'Cursor pagination only supports ordering by {self.keyset_field}.'
+            })
+        self.descending = ordering[0].startswith('-')
+        sign = '-' if self.descending else ''
+        queryset = self.with_keyset_columns(queryset).order_by(sign + self.keyset_field, sign + 'id')
+
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            # The first condition alone is an index range; the second breaks
+            # ties on created_at by id.
+            if self.descending:
+                queryset = queryset.filter(
+                    Q(**{f'{self.keyset_field}__lt': value}) | Q(**{self.keyset_field: value, 'id__lt': pk}),
+                    **{f'{self.keyset_field}__lte': value}
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{self.keyset_field}__gt': value}) | Q(**{self.keyset_field: value, 'id__gt': pk}),
+                    **{f'{self.keyset_field}__gte': value}
+                )
+
+        return queryset[:page_size + 1]
+
+    def with_keyset_columns(self, queryset):
+        """
+        ``queryset`` loading the columns ``encode_cursor()`` reads, which a
+        narrowed (``?fields=``) representation may have left out.
+        """
+        columns = (self.keyset_field, 'id')
+        if queryset._fields:
+            # values() rows from the compiled read path
+            return queryset.values(*dict.fromkeys((*queryset._fields, *columns)))
+        names, defer = queryset.query.deferred_loading
+        if names and not defer:
+            return queryset.only(*names, *columns)
+        return queryset
+
+    def take_keyset(self, rows):
+        self.has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def encode_cursor(self, row):
+        if isinstance(row, dict):
+            # values() rows from the compiled read path
+            value, pk = row[self.keyset_field], row['id']
+        else:
+            value, pk = getattr(row, self.keyset_field), row.pk
+        return base64.urlsafe_b64encode(f'{value.isoformat()}|{pk}'.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            value, pk = raw.rsplit('|', 1)
+            return datetime.fromisoformat(value), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_paginated_response(self, data):
+        if self.mode == 'keyset':
+            return Response({
+                'next': self.get_next_link(),
+                'results': data,
+            })
+        if self.mode == 'page':
+            return PageNumberPagination.get_paginated_response(self, data)
+        return super().get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return PageNumberPagination.get_paginated_response_schema(self, schema)
+
+    def get_next_link(self):
+        if self.mode == 'page':
+            return PageNumberPagination.get_next_link(self)
+        if self.mode == 'uncounted':
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_row))
+
+    def get_previous_link(self):
+        if self.mode == 'page':
+            return PageNumberPagination.get_previous_link(self)
+        return super().get_previous_link()
@@ -0,0 +1,61 @@
+"""
+Query-plan checks for tests: every read an endpoint sends must be an index
+lookup, not a pass over a whole table or a sort outside an index.
+
+Plans come from SQLite's ``EXPLAIN QUERY PLAN``, which does not depend on
+table sizes until ``ANALYZE`` has run, so a handful of test rows is enough
+to see the plan a large table gets. Other backends cost plans by table size
+and would scan tiny test tables anyway; the checks skip there.
+"""
+import re
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+# A table read row by row. Walking an index in order is allowed: with a
+# LIMIT it stops after one page, which is how the availability search works.
+FULL_SCAN = re.compile(r'^SCAN \w+(?: AS \w+)?$')
+TEMP_SORT = re.compile(r'^USE TEMP B-TREE')
+
+
+def query_plan(sql, using='default'):
+    """The detail lines of ``EXPLAIN QUERY PLAN`` for ``sql``, as interpolated by the query log."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan, allow_sort=False):
+    """The lines of ``plan`` that scan a table, or sort when ``allow_sort`` is off."""
+    return [
+        line for line in plan
+        if FULL_SCAN.match(line) or (not allow_sort and TEMP_SORT.match(line))
+    ]
+
+
+class QueryPlanAssertionsMixin:
+    """``assertIndexedQueries()`` for test cases."""
+
+    def assertIndexedQueries(self, send, allow_sort=False, using='default'):
+        """
+        Call ``send()`` and fail if any SELECT it runs scans a table, or
+        sorts unless ``allow_sort``. Returns what ``send()`` returned.
+        """
+        connection = connections[using]
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plans are checked on SQLite only')
+        with CaptureQueriesContext(connection) as queries:
+            result = send()
+        # Copied now, as the next request clears the query log
+        statements = [query['sql'] for query in queries]
+        self.assertTrue(statements, 'No queries were run')
+        for sql in statements:
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            plan = query_plan(sql, using)
+            problems = plan_problems(plan, allow_sort)
+            if problems:
+                self.fail('{}\n\n{}\n\nPlan:\n  {}'.format(
+                    ', '.join(problems), sql, '\n  '.join(plan)
+                ))
+        return result
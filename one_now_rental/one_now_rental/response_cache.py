@@ -0,0 +1,176 @@
+"""
+Per-user response cache for read endpoints.
+
+Each entry is keyed by a scope (``vehicles`` or ``bookings``), the user and
+the full request path, under a per-user version token for that scope.
+``invalidate()`` replaces the token, which orphans all of the user's entries
+in the scope at once; orphaned entries simply expire. The backend is the
+cache alias named in ``settings.RESPONSE_CACHE['ALIAS']``, so the
+local-memory default can be swapped for a shared backend.
+"""
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE['ALIAS']]
+
+
+def stats():
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / total, 4) if total else None}
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def _version_key(scope, user_id):
+    return f'respcache:version:{scope}:{user_id}'
+
+
+def _version(cache, scope, user_id):
+    key = _version_key(scope, user_id)
+    version = cache.get(key)
+    if version is None:
+        # A fresh random token, so entries written under an evicted
+        # version can never be served again.
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def _aversion(cache, scope, user_id):
+    key = _version_key(scope, user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def invalidate(scope, user_ids):
+    """
+    Drop every cached response in ``scope`` for ``user_ids``.
+
+    Runs immediately and again when the surrounding transaction commits, so
+    a concurrent request cannot re-cache rows from before the commit.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    def bump():
+        get_cache().set_many(
+            {_version_key(scope, user_id): uuid.uuid4().hex for user_id in user_ids},
+            timeout=None,
+        )
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return '*' in tags or etag in tags
+
+
+def _entry_key(scope, request, version):
+    path = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False).hexdigest()
+    return f'respcache:{scope}:{request.user.pk}:{version}:{path}'
+
+
+def _entry(response):
+    """The ``(etag, data)`` pair cached for ``response``."""
+    digest = hashlib.md5(JSONRenderer().render(response.data), usedforsecurity=False)
+    return f'"{digest.hexdigest()}"', response.data
+
+
+def _respond(request, response, etag):
+    if _etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED, headers={'X-Cache': response['X-Cache']})
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Cache successful GET responses of a DRF view per user and query string.
+
+    Responses carry an ``ETag`` and an ``X-Cache: HIT|MISS`` header, and a
+    matching ``If-None-Match`` is answered with 304.
+    """
+    cache_scope = None
+
+    def get(self, request, *args, **kwargs):
+        config = settings.RESPONSE_CACHE
+        if not config['ENABLED']:
+            return super().get(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = _entry_key(self.cache_scope, request, _version(cache, self.cache_scope, request.user.pk))
+
+        entry = cache.get(key)
+        if entry is None:
+            _record('misses')
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            etag, data = _entry(response)
+            cache.set(key, (etag, data), config['TIMEOUT'])
+            response['X-Cache'] = 'MISS'
+        else:
+            _record('hits')
+            etag, data = entry
+            response = Response(data, headers={'X-Cache': 'HIT'})
+        return _respond(request, response, etag)
+
+
+class AsyncCachedResponseMixin:
+    """
+    ``CachedResponseMixin`` for views in ``one_now_rental.async_views``.
+    Mixed in ahead of a view that already sets ``cache_scope``.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        config = settings.RESPONSE_CACHE
+        if not config['ENABLED']:
+            return await super().get(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = _entry_key(self.cache_scope, request, await _aversion(cache, self.cache_scope, request.user.pk))
+
+        entry = await cache.aget(key)
+        if entry is None:
+            _record('misses')
+            response = await super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            etag, data = _entry(response)
+            await cache.aset(key, (etag, data), config['TIMEOUT'])
+            response['X-Cache'] = 'MISS'
+        else:
+            _record('hits')
+            etag, data = entry
+            response = Response(data, headers={'X-Cache': 'HIT'})
+        return _respond(request, response, etag)
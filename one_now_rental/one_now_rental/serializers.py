@@ -0,0 +1,137 @@
+from collections import defaultdict
+from functools import lru_cache
+
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+
+
+def method_field_sources(serializer, field):
+    """
+    Column names a ``SerializerMethodField`` reads, from the serializer's
+    ``Meta.method_field_sources``; an empty tuple if it declares none.
+    """
+    return tuple(getattr(serializer.Meta, 'method_field_sources', {}).get(field.field_name, ()))
+
+
+# Bounded, since sparse_serializer() makes a class per ?fields= combination
+@lru_cache(maxsize=1024)
+def eager_loading_paths(serializer_class):
+    """
+    Work out which relations and columns ``serializer_class`` reads while
+    representing an instance, as ``(select_related, only)`` lookup paths.
+
+    Nested serializers are followed recursively. ``StringRelatedField`` and
+    friends read the columns the related model lists in ``STR_FIELDS``
+    (all of them if it has none). ``SerializerMethodField`` methods must
+    only read attributes that other declared fields already load, or the
+    columns listed for them in ``Meta.method_field_sources``.
+    """
+    select_related, only = [], []
+
+    def walk(serializer, prefix):
+        model = serializer.Meta.model
+        for field in serializer.fields.values():
+            if isinstance(field, serializers.SerializerMethodField):
+                only.extend(prefix + name for name in method_field_sources(serializer, field))
+            if field.write_only or field.source == '*':
+                continue
+            path = prefix + field.source.replace('.', '__')
+            if isinstance(field, serializers.BaseSerializer):
+                select_related.append(path)
+                only.append(path)
+                walk(field, path + '__')
+            elif isinstance(field, serializers.RelatedField) and not isinstance(
+                field, serializers.PrimaryKeyRelatedField
+            ):
+                related_model = model._meta.get_field(field.source).related_model
+                select_related.append(path)
+                only.append(path)
+                str_fields = getattr(related_model, 'STR_FIELDS', None) or [
+                    f.name for f in related_model._meta.concrete_fields
+                ]
+                only.extend(f'{path}__{name}' for name in str_fields)
+            else:
+                only.append(path)
+
+    walk(serializer_class(), '')
+    return tuple(dict.fromkeys(select_related)), tuple(dict.fromkeys(only))
+
+
+def eager_queryset(queryset, serializer_class):
+    """Narrow ``queryset`` to exactly what ``serializer_class`` will read."""
+    select_related, only = eager_loading_paths(serializer_class)
+    return queryset.select_related(*select_related).only(*only)
+
+
+def parse_field_list(value):
+    """``'a, b,,c'`` -> ``frozenset({'a', 'b', 'c'})``."""
+    return frozenset(name.strip() for name in value.split(',') if name.strip())
+
+
+@lru_cache(maxsize=256)
+def sparse_serializer(serializer_class, fields):
+    """
+    A subclass of ``serializer_class`` representing only ``fields``.
+
+    ``fields`` is a frozenset of field names; ``name.subfield`` keeps only
+    part of a nested serializer, and a bare ``name`` keeps all of it. Being
+    a class, the result gets its own ``eager_loading_paths()`` and compiled
+    serializer, so the query loads just these columns too. Unknown names
+    raise ``ValidationError``.
+    """
+    available = serializer_class().fields
+    top, nested = set(), defaultdict(set)
+    for name in fields:
+        head, _, rest = name.partition('.')
+        field = available.get(head)
+        if field is None or field.write_only or (
+            rest and not isinstance(field, serializers.Serializer)
+        ):
+            raise ValidationError({'fields': [f'Unknown field: {name}.']})
+        top.add(head)
+        if rest:
+            nested[head].add(rest)
+
+    attrs = {'Meta': type('Meta', (serializer_class.Meta,), {
+        'fields': [name for name in available if name in top],
+    })}
+    for name, field in available.items():
+        if name not in top:
+            # Declared fields must otherwise be listed in Meta.fields
+            attrs[name] = None
+        elif name in nested and name not in fields:
+            narrowed = sparse_serializer(type(field), frozenset(nested[name]))
+            attrs[name] = narrowed(*field._args, **field._kwargs)
+    return type(serializer_class.__name__, (serializer_class,), attrs)
+
+
+class SparseFieldsMixin:
+    """
+    ``?fields=`` and ``?expand=`` on the GET responses of a generic view.
+
+    ``?fields=id,status,vehicle_details.make`` narrows the representation to
+    those fields. Nested serializers listed in the serializer's
+    ``Meta.expandable_fields`` (``{'vehicle': 'vehicle_details'}``) are left
+    out of a narrowed representation unless named in ``fields`` or in
+    ``?expand=vehicle``. Without ``?fields=`` the full representation is
+    served, so ``?expand=`` alone changes nothing. The view's querysets must
+    be built for ``get_serializer_class()`` (see ``eager_queryset``).
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        if self.request is None or self.request.method not in permissions.SAFE_METHODS:
+            return serializer_class
+        params = self.request.query_params
+        expandable = getattr(serializer_class.Meta, 'expandable_fields', {})
+        expand = parse_field_list(params.get(self.expand_query_param, ''))
+        unknown = sorted(expand - expandable.keys())
+        if unknown:
+            raise ValidationError({'expand': [f'Cannot expand: {", ".join(unknown)}.']})
+
+        fields = parse_field_list(params.get(self.fields_query_param, ''))
+        if not fields:
+            return serializer_class
+        return sparse_serializer(serializer_class, fields | {expandable[name] for name in expand})
@@ -13,6 +13,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,15 +48,18 @@ INSTALLED_APPS = [
     'authentication',
     'vehicles',
     'bookings',
+    'analytics',
 ]
 
 MIDDLEWARE = [
+    'one_now_rental.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
      "corsheaders.middleware.CorsMiddleware",
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'one_now_rental.db_router.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -80,14 +86,169 @@ WSGI_APPLICATION = 'one_now_rental.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Read from the environment or a .env file; SQLite unless DB_ENGINE=postgresql.
+
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+# Persistent connections; ignored (0) when the PostgreSQL pool is on
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+
+if DB_ENGINE == 'postgresql':
+    DB_POOL = config('DB_POOL', default=True, cast=bool)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='one_now_rental'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            # Django's native pool (psycopg 3) replaces persistent connections;
+            # the two can't be combined.
+            'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+            # Also makes the pool check each connection it hands out
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                    'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+                    # Seconds a request waits for a free connection
+                    'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+                } if DB_POOL else False,
+            },
+            'TEST': {
+                'NAME': config('DB_TEST_NAME', default='test_one_now_rental'),
+            },
+        }
+    }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                # Take the write lock at BEGIN so check-then-insert transactions
+                # (e.g. booking overlap checks) serialize like SELECT ... FOR UPDATE.
+                'transaction_mode': 'IMMEDIATE',
+                # Seconds a writer waits for the lock (busy_timeout) before failing
+                'timeout': config('DB_BUSY_TIMEOUT', default=20, cast=int),
+                # WAL lets readers run alongside the single writer; NORMAL sync is
+                # durable across crashes of the app in WAL mode.
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA cache_size=-32000;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA mmap_size=134217728;'
+                ),
+            },
+            'TEST': {
+                # A file rather than shared-cache memory, so concurrent test
+                # connections wait on locks the way production connections do.
+                'NAME': config('DB_TEST_NAME', default=str(BASE_DIR / 'test_db.sqlite3')),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgresql', not {DB_ENGINE!r}.")
+
+# Read replicas (one_now_rental.db_router): PostgreSQL hosts, or SQLite files,
+# each served as an alias with the primary's other settings. Tests run them
+# as mirrors of the test database.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(config('DB_REPLICAS', default='', cast=Csv()), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST' if DB_ENGINE == 'postgresql' else 'NAME': replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
 
-DATABASES = {
+DATABASE_ROUTERS = ['one_now_rental.db_router.PrimaryReplicaRouter']
+TEST_RUNNER = 'one_now_rental.test_runner.TestRunner'
+# Seconds a user reads from the primary after a write, so they see it
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Per-user cache of vehicle/booking GET responses (one_now_rental.response_cache).
+# Point ALIAS at a shared backend (e.g. Redis) when running several processes.
+RESPONSE_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+# Per-vehicle occupancy bitmaps behind the availability calendars
+# (bookings.occupancy), dropped when a booking write commits and rebuilt on
+# the next read. Writes from other processes only reach this process's
+# calendars through a shared ALIAS (e.g. Redis): with the local-memory
+# default, run a single process.
+OCCUPANCY_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 3600,
+}
+
+# bookings.lifecycle (the run_booking_lifecycle command): pending bookings
+# are cancelled PENDING_TTL seconds after they were made, and confirmed ones
+# completed once they end, BATCH_SIZE bookings per transaction.
+BOOKING_LIFECYCLE = {
+    'PENDING_TTL': config('BOOKING_PENDING_TTL', default=48 * 3600, cast=int),
+    'BATCH_SIZE': config('BOOKING_LIFECYCLE_BATCH_SIZE', default=1000, cast=int),
+}
+
+# Serve list endpoints through values()-based compiled serializers
+# (one_now_rental.fast_serializers); the JSON is identical either way.
+COMPILED_READ_SERIALIZERS = True
+
+# Per-request timing (one_now_rental.instrumentation): Server-Timing headers,
+# a slow-query log and Prometheus histograms at /metrics/. Set METRICS_TOKEN
+# to require it as a bearer token from scrapers.
+PERFORMANCE_METRICS = {
+    'ENABLED': config('PERFORMANCE_METRICS', default=True, cast=bool),
+    'SERVER_TIMING': True,
+    'SLOW_QUERY_MS': config('SLOW_QUERY_MS', default=200, cast=float),
+    'BUCKETS': (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    'METRICS_TOKEN': config('METRICS_TOKEN', default=''),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'one_now_rental.performance': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+# Hashes with another PBKDF2 iteration count are upgraded on the next login.
+
+PASSWORD_HASHERS = [
+    'authentication.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=1_000_000, cast=int)
+# Threads the ASGI login view hashes passwords on, through aauthenticate()
+PASSWORD_HASH_WORKERS = 4
+AUTHENTICATION_BACKENDS = ['authentication.backends.PooledModelBackend']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -132,8 +293,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'authentication.User'
 
 REST_FRAMEWORK = {
+    # 'authentication.backends.ClaimsJWTAuthentication' authenticates from the
+    # token's claims without a user query per request.
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.backends.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -143,6 +306,36 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Reverse proxies in front of the app whose X-Forwarded-For entries are
+    # trusted to identify clients; unset, throttles use REMOTE_ADDR
+    'NUM_PROXIES': config('NUM_PROXIES', default=None, cast=lambda value: int(value) if value else None),
+    # Token buckets (one_now_rental.throttling): N requests of burst, refilled
+    # evenly over the period. Per user, or per IP when anonymous; auth is per IP.
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': config('THROTTLE_AUTH_RATE', default='10/min'),
+        'search': config('THROTTLE_SEARCH_RATE', default='120/min'),
+        'booking_create': config('THROTTLE_BOOKING_CREATE_RATE', default='30/min'),
+    },
+}
+
+# Where the token buckets live: LocalBucketStore (per process) or
+# CacheBucketStore (shared through the CACHE_ALIAS cache)
+THROTTLING = {
+    'ENABLED': config('THROTTLING', default=True, cast=bool),
+    'STORE': config('THROTTLE_STORE', default='one_now_rental.throttling.LocalBucketStore'),
+    'CACHE_ALIAS': 'default',
+    'MAX_KEYS': 100_000,
+}
+
+# Idempotency-Key records for booking and vehicle creation
+# (one_now_rental.idempotency): responses are replayed for TTL seconds, and a
+# key stays claimed for at most LOCK_TIMEOUT seconds while its request runs.
+IDEMPOTENCY = {
+    'STORE': config('IDEMPOTENCY_STORE', default='one_now_rental.idempotency.LocalIdempotencyStore'),
+    'CACHE_ALIAS': 'default',
+    'TTL': config('IDEMPOTENCY_TTL', default=86400, cast=int),
+    'LOCK_TIMEOUT': 60,
+    'MAX_KEYS': 10_000,
 }
 
 # JWT Settings
@@ -155,6 +348,10 @@ SIMPLE_JWT = {
     'SIGNING_KEY': SECRET_KEY,
 }
 
+# Seconds ClaimsJWTAuthentication caches a user's row once a view reads
+# a field the token does not carry
+CLAIMS_USER_CACHE_TIMEOUT = 60
+
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the suite with replica reads and throttling off. Test replicas
+    mirror the test database but have their own connections, which can't
+    see the rows a TestCase writes inside its transaction. Throttles would
+    trip on the many requests tests send from one client. Tests of either
+    turn them back on with ``override_settings``.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._overrides = override_settings(
+            DATABASE_REPLICAS=[],
+            THROTTLING={**settings.THROTTLING, 'ENABLED': False},
+        )
+        self._overrides.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._overrides.disable()
+        super().teardown_test_environment(**kwargs)
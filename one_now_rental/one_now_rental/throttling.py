@@ -0,0 +1,218 @@
+"""
+Token-bucket request throttling.
+
+A rate of ``N/period`` is a bucket of ``N`` tokens that refills at
+``N / period`` tokens a second; each request takes one token, and is
+throttled with the time until the next token as ``Retry-After`` when the
+bucket is empty. Unlike DRF's ``SimpleRateThrottle``, which keeps every
+request timestamp in the cache, a bucket is two numbers, so a check costs
+the same however high the rate is.
+
+Buckets live in the store named in ``settings.THROTTLING['STORE']``:
+
+* ``LocalBucketStore`` (the default) keeps them in process memory behind a
+  lock. Checks take a few microseconds, but every process has its own
+  buckets, so the effective rate is multiplied by the number of workers.
+* ``CacheBucketStore`` keeps them in the cache named by
+  ``settings.THROTTLING['CACHE_ALIAS']``, shared by every process. A
+  read-then-write per request; concurrent requests for one key in
+  different processes may both take the last token.
+
+Rates are DRF's ``DEFAULT_THROTTLE_RATES``, looked up by scope on every
+request. A scope without a rate, or ``THROTTLING['ENABLED']`` off, is not
+throttled. Clients are told apart by ``REMOTE_ADDR``, or by
+``X-Forwarded-For`` when ``REST_FRAMEWORK['NUM_PROXIES']`` is set.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+def _take(bucket, now, capacity, refill_rate):
+    """
+    Refill ``bucket`` (``[tokens, updated_at]``) up to ``now`` and take one
+    token. Returns the seconds until one is available, 0 if it was taken.
+    """
+    tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+    bucket[1] = now
+    if tokens >= 1:
+        bucket[0] = tokens - 1
+        return 0
+    bucket[0] = tokens
+    return (1 - tokens) / refill_rate
+
+
+class LocalBucketStore:
+    """
+    Buckets in this process, least recently used dropped past
+    ``settings.THROTTLING['MAX_KEYS']``. A dropped bucket comes back full.
+    """
+    timer = time.monotonic
+
+    def __init__(self):
+        self.max_keys = settings.THROTTLING['MAX_KEYS']
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate):
+        """Take a token from ``key``'s bucket; returns the wait in seconds, 0 if allowed."""
+        with self._lock:
+            now = self.timer()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [capacity, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return _take(bucket, now, capacity, refill_rate)
+
+    async def aconsume(self, key, capacity, refill_rate):
+        # Never blocks for longer than the lock is held
+        return self.consume(key, capacity, refill_rate)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets in a Django cache, shared by every process using it."""
+    timer = time.time
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLING['CACHE_ALIAS']]
+
+    def _key(self, key):
+        return f'tokenbucket:{key}'
+
+    def _update(self, bucket, capacity, refill_rate):
+        now = self.timer()
+        bucket = list(bucket) if bucket else [capacity, now]
+        wait = _take(bucket, now, capacity, refill_rate)
+        # Kept until it would have refilled anyway
+        return wait, bucket, int((capacity - bucket[0]) / refill_rate) + 1
+
+    def consume(self, key, capacity, refill_rate):
+        wait, bucket, timeout = self._update(self.cache.get(self._key(key)), capacity, refill_rate)
+        self.cache.set(self._key(key), bucket, timeout)
+        return wait
+
+    async def aconsume(self, key, capacity, refill_rate):
+        wait, bucket, timeout = self._update(await self.cache.aget(self._key(key)), capacity, refill_rate)
+        await self.cache.aset(self._key(key), bucket, timeout)
+        return wait
+
+    def clear(self):
+        self.cache.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.THROTTLING['STORE'])()
+    return _store
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    global _store
+    if setting == 'THROTTLING':
+        _store = None
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token-bucket throttle for ``scope``, per user, or per client IP for
+    anonymous requests. Only requests whose method is in ``methods`` count
+    (all of them when it is None).
+    """
+    methods = None
+
+    def __init__(self):
+        # Rates are read per request in allow_request(), so settings
+        # changes apply without a restart
+        pass
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident(self, request):
+        # Unless REST_FRAMEWORK['NUM_PROXIES'] says how many proxies to trust,
+        # X-Forwarded-For is whatever the client sent, so a new value would
+        # be a new bucket
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get('REMOTE_ADDR')
+        return super().get_ident(request)
+
+    def get_cache_key(self, request, view):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            ident = f'user:{user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'{self.scope}:{ident}'
+
+    def bucket(self, request, view):
+        """``(key, capacity, refill_rate)`` for ``request``, or None if it is not throttled."""
+        if not settings.THROTTLING['ENABLED']:
+            return None
+        if self.methods is not None and request.method not in self.methods:
+            return None
+        rate = self.get_rate()
+        if rate is None:
+            return None
+        capacity, duration = self.parse_rate(rate)
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return None
+        return key, capacity, capacity / duration
+
+    def allow_request(self, request, view):
+        bucket = self.bucket(request, view)
+        self.wait_seconds = get_store().consume(*bucket) if bucket else 0
+        return not self.wait_seconds
+
+    async def aallow_request(self, request, view):
+        """``allow_request()`` for async views."""
+        bucket = self.bucket(request, view)
+        self.wait_seconds = await get_store().aconsume(*bucket) if bucket else 0
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthThrottle(TokenBucketThrottle):
+    """Register and login, per client IP: each attempt costs a password hash."""
+    scope = 'auth'
+
+    def get_cache_key(self, request, view):
+        return f'{self.scope}:ip:{self.get_ident(request)}'
+
+
+class SearchThrottle(TokenBucketThrottle):
+    """Vehicle listing and availability search, which scrapers loop over."""
+    scope = 'search'
+    methods = SAFE_METHODS
+
+
+class BookingCreateThrottle(TokenBucketThrottle):
+    """Single and bulk booking creation, which lock vehicle rows."""
+    scope = 'booking_create'
+    methods = ('POST',)
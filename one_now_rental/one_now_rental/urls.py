@@ -20,6 +20,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from django.conf import settings
+from .instrumentation import metrics_view
+from .views import ResponseCacheStatsView
 
 schema_view = get_schema_view(
    openapi.Info(
@@ -39,6 +41,9 @@ urlpatterns = [
     path('api/auth/', include('authentication.urls')),
     path('api/', include('vehicles.urls')),
     path('api/', include('bookings.urls')),
+    path('api/', include('analytics.urls')),
+    path('api/cache/stats/', ResponseCacheStatsView.as_view(), name='response-cache-stats'),
+    path('metrics/', metrics_view, name='metrics'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
 ]
 
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('vehicles/', async_views.AsyncVehicleListCreateView.as_view(), name='vehicle-list-create'),
+    path('vehicles/<int:pk>/', async_views.AsyncVehicleRetrieveUpdateDestroyView.as_view(), name='vehicle-detail'),
+]
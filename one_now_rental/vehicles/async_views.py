@@ -0,0 +1,20 @@
+"""
+Async vehicle views, served in place of the DRF views under ASGI.
+
+Reads run on the event loop; creates, updates and deletes run the sync
+view's handler on a thread (see ``one_now_rental.async_views``).
+"""
+from one_now_rental.async_views import AsyncListMixin, AsyncRetrieveMixin
+from one_now_rental.db_router import AsyncReplicaReadMixin
+from one_now_rental.response_cache import AsyncCachedResponseMixin
+from .views import VehicleListCreateView, VehicleRetrieveUpdateDestroyView
+
+
+class AsyncVehicleListCreateView(AsyncReplicaReadMixin, AsyncCachedResponseMixin, AsyncListMixin,
+                                 VehicleListCreateView):
+    pass
+
+
+class AsyncVehicleRetrieveUpdateDestroyView(AsyncReplicaReadMixin, AsyncCachedResponseMixin,
+                                            AsyncRetrieveMixin, VehicleRetrieveUpdateDestroyView):
+    pass
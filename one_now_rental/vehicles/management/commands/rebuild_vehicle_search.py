@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from vehicles import search
+
+
+class Command(BaseCommand):
+    help = 'Recreate the vehicle search index from the vehicles table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if connections[using].vendor != 'sqlite':
+            search.install(using)
+            self.stdout.write(self.style.SUCCESS('Search indexes are in place; the database maintains them'))
+            return
+
+        with transaction.atomic(using=using):
+            search.install(using)
+            indexed = search.rebuild(using)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} vehicles for search'))
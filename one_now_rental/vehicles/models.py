@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from datetime import datetime
@@ -16,7 +17,8 @@ class Vehicle(models.Model):
         ('van', 'Van'),
     ]
     
-    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='vehicles')
+    # Indexed through the (owner, ...) composites below
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='vehicles', db_index=False)
     make = models.CharField(max_length=50)
     model = models.CharField(max_length=50)
     year = models.IntegerField(
@@ -25,6 +27,7 @@ class Vehicle(models.Model):
             MaxValueValidator(datetime.now().year + 1)
         ]
     )
+    # Stored upper-cased; the unique index backs the duplicate check
     plate_number = models.CharField(max_length=20, unique=True)
     vehicle_type = models.CharField(max_length=15, choices=VEHICLE_TYPES, default='sedan')
     color = models.CharField(max_length=30, blank=True)
@@ -36,9 +39,21 @@ class Vehicle(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        # Each user's list is read in one of its ordering_fields; these let
+        # every ordering come straight off an index, with no sort step.
+        # Filters on vehicle_type and is_available ride the created_at one.
         indexes = [
-            models.Index(fields=['owner', 'is_available']),
-            models.Index(fields=['plate_number']),
+            # Default ordering, and keyset pagination
+            models.Index(fields=['owner', 'created_at', 'id']),
+            models.Index(fields=['owner', 'daily_rate'], name='vehicle_owner_rate_idx'),
+            # Also serves ?year= with the default ordering
+            models.Index(fields=['owner', 'year', 'created_at'], name='vehicle_owner_year_idx'),
+            # Availability search walks these in daily_rate order and stops
+            # after one page, so it never touches the rest of the fleet.
+            models.Index(fields=['daily_rate'], condition=Q(is_available=True),
+                         name='vehicle_available_rate_idx'),
+            models.Index(fields=['vehicle_type', 'daily_rate'], condition=Q(is_available=True),
+                         name='vehicle_available_type_idx'),
         ]
 
     def __str__(self):
@@ -0,0 +1,242 @@
+"""
+Indexed vehicle search.
+
+``?search=`` terms are matched as word prefixes against make, model,
+description and plate number, all terms required, through an index rather
+than ``icontains`` scans:
+
+* SQLite: the FTS5 table ``vehicles_vehicle_search``, one row per vehicle
+  under the same rowid, kept in step by the signals in ``vehicles.signals``.
+  The owner is indexed as well, so one MATCH finds a user's matching
+  vehicles however large the fleet is. Writes that bypass signals
+  (``bulk_create``, ``update()``) need ``manage.py rebuild_vehicle_search``.
+* PostgreSQL: a GIN index on the ``tsvector`` of the same columns, plus
+  trigram indexes on make and model that back ``icontains`` filters. The
+  document and the query are passed through ``unaccent``, so accents are
+  ignored as FTS5's ``unicode61`` tokenizer ignores them.
+
+``install()`` creates these after every migrate. Other backends fall back
+to ``icontains``.
+
+Results are ranked by where each term matched: make or model first, then
+plate, then description. The score is computed only for matching rows and
+the same way on every backend. FTS5's own ``bm25()`` ranking would need
+the FTS table to drive the whole query, which the owner-scoped querysets,
+and the paginator's ``COUNT(*)`` in particular, do not allow.
+"""
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import BooleanField, Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .models import Vehicle
+
+FTS_TABLE = 'vehicles_vehicle_search'
+COLUMNS = ('make', 'model', 'description', 'plate_number')
+# Prefix lengths FTS5 indexes directly; longer prefixes are expanded at query time
+FTS_PREFIXES = '1 2 3 4 5 6 7 8'
+
+
+# unaccent() is only STABLE, as its dictionary could change; an index
+# expression needs an IMMUTABLE function, with the dictionary pinned
+UNACCENT_FUNCTION = 'vehicle_search_unaccent'
+
+
+def tsvector(table=''):
+    """The indexed document; ``table`` qualifies the columns in queries."""
+    prefix = f'"{table}".' if table else ''
+    document = " || ' ' || ".join(prefix + column for column in COLUMNS)
+    return f"to_tsvector('simple', {UNACCENT_FUNCTION}({document}))"
+
+
+POSTGRES_INDEXES = (
+    # Replaced by vehicle_search_unaccent_idx
+    'DROP INDEX IF EXISTS vehicle_search_idx',
+    f'CREATE INDEX IF NOT EXISTS vehicle_search_unaccent_idx ON vehicles_vehicle USING gin ({tsvector()})',
+    'CREATE INDEX IF NOT EXISTS vehicle_make_trgm_idx ON vehicles_vehicle '
+    'USING gin ((UPPER(make::text)) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS vehicle_model_trgm_idx ON vehicles_vehicle '
+    'USING gin ((UPPER(model::text)) gin_trgm_ops)',
+)
+
+
+def terms(text):
+    """The words of ``text``, split like FTS5's ``unicode61`` tokenizer does."""
+    return re.findall(r'[^\W_]+', text.lower())
+
+
+# Whether each database holds the FTS5 table, by NAME, so writes and
+# searches introspect at most once per process. install() records the
+# table it creates; a database found without one stays on icontains until
+# the next install().
+_fts_databases = {}
+
+
+def _fts_enabled(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _fts_databases:
+        _fts_databases[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_databases[name]
+
+
+def fts_enabled(using='default'):
+    return _fts_enabled(connections[using])
+
+
+async def afts_enabled(using='default'):
+    """``fts_enabled()`` for the event loop: introspects on a thread the first time."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] not in _fts_databases:
+        return await sync_to_async(fts_enabled)(using)
+    return _fts_enabled(connection)
+
+
+def install(using='default'):
+    """Create the search index on ``using`` if it is missing, or repair it if it drifted."""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS unaccent SCHEMA public')
+            cursor.execute(
+                f'CREATE OR REPLACE FUNCTION {UNACCENT_FUNCTION}(text) RETURNS text AS '
+                f"$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$ "
+                f'LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT'
+            )
+            for statement in POSTGRES_INDEXES:
+                cursor.execute(statement)
+    elif connection.vendor == 'sqlite':
+        _fts_databases[connection.settings_dict['NAME']] = True
+        if FTS_TABLE not in connection.introspection.table_names():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    f"{', '.join(COLUMNS)}, owner, prefix='{FTS_PREFIXES}')"
+                )
+            rebuild(using)
+        elif _fts_count(connection) != Vehicle.objects.using(using).count():
+            # After a flush, or rows written around the signals
+            rebuild(using)
+
+
+def _fts_count(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def rebuild(using='default'):
+    """Reindex every vehicle; returns the number of rows indexed."""
+    connection = connections[using]
+    if not _fts_enabled(connection):
+        return 0
+    columns = ', '.join(COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, {columns}, owner) '
+            f'SELECT id, {columns}, owner_id FROM {Vehicle._meta.db_table}'
+        )
+    return _fts_count(connection)
+
+
+def index_vehicle(vehicle, using='default'):
+    connection = connections[using]
+    if _fts_enabled(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {FTS_TABLE}(rowid, {", ".join(COLUMNS)}, owner) '
+                f'VALUES (%s, %s, %s, %s, %s, %s)',
+                [vehicle.pk, *(getattr(vehicle, column) for column in COLUMNS), vehicle.owner_id],
+            )
+
+
+def unindex_vehicle(vehicle, using='default'):
+    connection = connections[using]
+    if _fts_enabled(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [vehicle.pk])
+
+
+def relevance(words):
+    """Per-row score of ``words``: 3 per make/model hit, 2 per plate hit, 1 otherwise."""
+    score = Value(0)
+    for word in words:
+        score += Case(
+            When(Q(make__istartswith=word) | Q(make__icontains=f' {word}') |
+                 Q(model__istartswith=word) | Q(model__icontains=f' {word}'), then=Value(3)),
+            When(plate_number__icontains=word, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    return score
+
+
+def search(queryset, text, owner=None):
+    """
+    ``queryset`` narrowed to the vehicles matching every word of ``text``
+    as a prefix, annotated with its ``search_rank`` (higher is better).
+    ``owner`` scopes the index lookup to that user's vehicles; pass it when
+    ``queryset`` is already limited to them.
+    """
+    words = terms(text)
+    if not words:
+        return queryset
+
+    connection = connections[queryset.db]
+    if _fts_enabled(connection):
+        # Words are letters and digits only, so quoting them is enough
+        expression = '{%s} : (%s)' % (' '.join(COLUMNS), ' '.join(f'"{word}"*' for word in words))
+        if owner is not None:
+            expression = f'owner : "{int(owner)}" AND {expression}'
+        # A subquery, so FTS5 runs once instead of once per candidate row
+        queryset = queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression]
+        ))
+    elif connection.vendor == 'postgresql':
+        query = ' & '.join(f'{word}:*' for word in words)
+        queryset = queryset.filter(RawSQL(
+            f"{tsvector(Vehicle._meta.db_table)} @@ to_tsquery('simple', {UNACCENT_FUNCTION}(%s))", [query],
+            output_field=BooleanField()
+        ))
+    else:
+        for word in words:
+            queryset = queryset.filter(
+                Q(make__icontains=word) | Q(model__icontains=word) |
+                Q(description__icontains=word) | Q(plate_number__icontains=word)
+            )
+    return queryset.annotate(search_rank=relevance(words))
+
+
+class VehicleSearchFilter(SearchFilter):
+    """
+    ``?search=`` through ``search()``, for views listing the user's own
+    vehicles. Results come best match first unless the request picks an
+    ordering or a cursor page, or the view has no ``OrderingFilter``, which
+    must run before this backend.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '')
+        if not terms(text):
+            return queryset
+        queryset = search(queryset, text, owner=request.user.pk)
+
+        paginator = getattr(view, 'paginator', None)
+        explicit = [OrderingFilter.ordering_param, getattr(paginator, 'cursor_query_param', None)]
+        if OrderingFilter in view.filter_backends and not any(
+            param in request.query_params for param in explicit if param
+        ):
+            ordering = queryset.query.order_by or queryset.model._meta.ordering
+            queryset = queryset.order_by('-search_rank', *ordering)
+        return queryset
+
+    async def aprepare(self, request, queryset, view):
+        """Look up what ``filter_queryset()`` needs from the database, off the event loop."""
+        if terms(request.query_params.get(self.search_param, '')):
+            await afts_enabled(queryset.db)
@@ -1,7 +1,17 @@
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
+from one_now_rental.instrumentation import TimedSerializerMixin
 from .models import Vehicle
+from datetime import date, timedelta
 
-class VehicleSerializer(serializers.ModelSerializer):
+PLATE_TAKEN = 'Vehicle with this plate number already exists.'
+
+# Longest range, and most vehicles, one calendar request may ask for
+CALENDAR_MAX_DAYS = 366
+CALENDAR_BATCH_LIMIT = 100
+
+
+class VehicleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     owner = serializers.StringRelatedField(read_only=True)
     
     class Meta:
@@ -10,18 +20,34 @@ class VehicleSerializer(serializers.ModelSerializer):
                  'vehicle_type', 'color', 'daily_rate', 'is_available', 
                  'description', 'created_at', 'updated_at']
         read_only_fields = ['id', 'owner', 'created_at', 'updated_at']
+        extra_kwargs = {
+            # validate_plate_number checks the normalized plate instead
+            'plate_number': {'validators': []},
+        }
 
     def validate_plate_number(self, value):
-        # Check if plate number already exists for other vehicles
+        # Plates are stored upper-cased, so check the normalized value
+        value = value.strip().upper()
+        if self.plate_taken(value):
+            raise serializers.ValidationError(PLATE_TAKEN)
+        return value
+
+    def plate_taken(self, plate_number):
+        others = Vehicle.objects.filter(plate_number=plate_number)
         if self.instance:
-            # Update case - exclude current instance
-            if Vehicle.objects.filter(plate_number=value).exclude(id=self.instance.id).exists():
-                raise serializers.ValidationError('Vehicle with this plate number already exists.')
-        else:
-            # Create case
-            if Vehicle.objects.filter(plate_number=value).exists():
-                raise serializers.ValidationError('Vehicle with this plate number already exists.')
-        return value.upper()
+            others = others.exclude(id=self.instance.id)
+        return others.exists()
+
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            # Lost a race with another write of the same plate
+            plate_number = self.validated_data.get('plate_number')
+            if plate_number is None or not self.plate_taken(plate_number):
+                raise
+            raise serializers.ValidationError({'plate_number': [PLATE_TAKEN]})
 
     def validate_daily_rate(self, value):
         if value < 0:
@@ -31,4 +57,70 @@ class VehicleSerializer(serializers.ModelSerializer):
 class VehicleCreateSerializer(VehicleSerializer):
     class Meta(VehicleSerializer.Meta):
         fields = ['make', 'model', 'year', 'plate_number', 'vehicle_type', 
-                 'color', 'daily_rate', 'description']
\ No newline at end of file
+                 'color', 'daily_rate', 'description']
+
+class AvailabilitySearchSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    vehicle_type = serializers.ChoiceField(choices=Vehicle.VEHICLE_TYPES, required=False)
+    max_rate = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=0, required=False)
+
+    def validate(self, attrs):
+        if attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError({
+                'end': 'End date must be after start date.'
+            })
+
+        if attrs['start'] < date.today():
+            raise serializers.ValidationError({
+                'start': 'Start date cannot be in the past.'
+            })
+
+        return attrs
+
+
+class CalendarRangeSerializer(serializers.Serializer):
+    """``?from=&to=``, a half-open day range defaulting to the next 365 days."""
+
+    def get_fields(self):
+        # 'from' is a keyword, so it cannot be declared as an attribute
+        return {
+            'from': serializers.DateField(required=False),
+            'to': serializers.DateField(required=False),
+        }
+
+    def validate(self, attrs):
+        start = attrs.setdefault('from', date.today())
+        end = attrs.setdefault('to', start + timedelta(days=365))
+        if start >= end:
+            raise serializers.ValidationError({
+                'to': 'End date must be after start date.'
+            })
+
+        if (end - start).days > CALENDAR_MAX_DAYS:
+            raise serializers.ValidationError({
+                'to': f'Calendars cover at most {CALENDAR_MAX_DAYS} days.'
+            })
+
+        return attrs
+
+
+class CalendarBatchSerializer(CalendarRangeSerializer):
+    """``CalendarRangeSerializer`` plus ``?ids=1,2,3``."""
+
+    def get_fields(self):
+        return {
+            **super().get_fields(),
+            'ids': serializers.CharField(),
+        }
+
+    def validate_ids(self, value):
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in value.split(',') if pk.strip()))
+        except ValueError:
+            raise serializers.ValidationError('Expected a comma-separated list of vehicle ids.')
+        if not ids:
+            raise serializers.ValidationError('Expected a comma-separated list of vehicle ids.')
+        if len(ids) > CALENDAR_BATCH_LIMIT:
+            raise serializers.ValidationError(f'At most {CALENDAR_BATCH_LIMIT} vehicles per request.')
+        return ids
@@ -0,0 +1,28 @@
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from one_now_rental import response_cache
+from . import search
+from .models import Vehicle
+
+
+@receiver([post_save, post_delete], sender=Vehicle)
+def invalidate_vehicle_responses(sender, instance, **kwargs):
+    response_cache.invalidate('vehicles', [instance.owner_id])
+
+
+@receiver(post_save, sender=Vehicle)
+def index_vehicle(sender, instance, using, **kwargs):
+    search.index_vehicle(instance, using)
+
+
+@receiver(post_delete, sender=Vehicle)
+def unindex_vehicle(sender, instance, using, **kwargs):
+    search.unindex_vehicle(instance, using)
+
+
+def install_search_index(using, **kwargs):
+    """post_migrate: create the search index, and refill it after a flush."""
+    if router.allow_migrate_model(using, Vehicle):
+        search.install(using)
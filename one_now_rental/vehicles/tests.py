@@ -1,15 +1,46 @@
+import csv
+import io
+import json
+from unittest import mock, skipUnless
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
 from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
-from django.urls import reverse
-from rest_framework.test import APITestCase
+from django.urls import resolve, reverse
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from bookings import occupancy
+from bookings.models import Booking
+from one_now_rental import idempotency
+from one_now_rental.asgi import ASGI_URLCONF
+from one_now_rental.fast_serializers import compile_serializer
+from one_now_rental.instrumentation import metrics
+from one_now_rental.pagination import KeysetPagination
+from one_now_rental.query_plans import QueryPlanAssertionsMixin
+from .async_views import AsyncVehicleListCreateView, AsyncVehicleRetrieveUpdateDestroyView
 from .models import Vehicle
+from . import search
+from .search import terms
+from .serializers import VehicleCreateSerializer, VehicleSerializer
+from .views import VehicleAvailabilityView, VehicleExportView, VehicleListCreateView
 
 User = get_user_model()
 
 class VehicleTestCase(APITestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
@@ -45,12 +76,49 @@ class VehicleTestCase(APITestCase):
         vehicle = Vehicle.objects.get(plate_number='ABC123')
         self.assertEqual(vehicle.owner, self.user)
     
+    def test_create_vehicle_idempotency_key(self):
+        """Test that a retried creation replays the first response instead of failing on the plate"""
+        idempotency.get_store().clear()
+        first = self.client.post(self.vehicles_url, self.vehicle_data, HTTP_IDEMPOTENCY_KEY='add-camry')
+        retry = self.client.post(self.vehicles_url, self.vehicle_data, HTTP_IDEMPOTENCY_KEY='add-camry')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Vehicle.objects.filter(plate_number='ABC123').count(), 1)
+
     def test_create_vehicle_duplicate_plate(self):
         """Test vehicle creation with duplicate plate number"""
         Vehicle.objects.create(owner=self.other_user, **self.vehicle_data)
         response = self.client.post(self.vehicles_url, self.vehicle_data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
+    def test_create_vehicle_duplicate_plate_other_case(self):
+        """Test that plates are upper-cased before the duplicate check"""
+        Vehicle.objects.create(owner=self.other_user, **self.vehicle_data)
+        data = dict(self.vehicle_data, plate_number=' abc123 ')
+        with self.assertNumQueries(1):
+            self.assertFalse(VehicleCreateSerializer(data=data).is_valid())
+        response = self.client.post(self.vehicles_url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['details'], {
+            'plate_number': ['Vehicle with this plate number already exists.']
+        })
+
+        response = self.client.post(self.vehicles_url, dict(data, plate_number='xyz789'))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['vehicle']['plate_number'], 'XYZ789')
+
+    def test_duplicate_plate_race_is_validation_error(self):
+        """Test that a plate taken after validation fails with a validation error"""
+        serializer = VehicleCreateSerializer(data=self.vehicle_data)
+        self.assertTrue(serializer.is_valid())
+        Vehicle.objects.create(owner=self.other_user, **self.vehicle_data)
+        with self.assertRaises(serializers.ValidationError) as raised:
+            serializer.save(owner=self.user)
+        self.assertEqual(raised.exception.detail, {
+            'plate_number': ['Vehicle with this plate number already exists.']
+        })
+
     def test_list_user_vehicles_only(self):
         """Test that users can only see their own vehicles"""
         # Create vehicles for both users
@@ -91,4 +159,891 @@ class VehicleTestCase(APITestCase):
         
         response = self.client.get(detail_url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
-    
\ No newline at end of file
+
+    def test_list_and_detail_query_counts_are_constant(self):
+        """Test that list/detail queries do not grow with the number of rows"""
+        vehicle = Vehicle.objects.create(owner=self.user, **self.vehicle_data)
+        detail_url = reverse('vehicle-detail', kwargs={'pk': vehicle.pk})
+
+        # JWT user lookup, COUNT(*) and one page query
+        with self.assertNumQueries(3):
+            self.client.get(self.vehicles_url)
+        # JWT user lookup and one row query
+        with self.assertNumQueries(2):
+            self.client.get(detail_url)
+
+        for i in range(15):
+            data = dict(self.vehicle_data, plate_number=f'MORE{i}')
+            Vehicle.objects.create(owner=self.user, **data)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.vehicles_url)
+        self.assertEqual(len(response.data['results']), 16)
+        self.assertEqual(response.data['results'][0]['owner'], str(self.user))
+
+
+class VehicleAvailabilityTestCase(APITestCase):
+    def setUp(self):
+        self.renter = User.objects.create_user(
+            username='renter',
+            email='renter@example.com',
+            password='testpass123'
+        )
+        self.host = User.objects.create_user(
+            username='host',
+            email='host@example.com',
+            password='testpass123'
+        )
+
+        refresh = RefreshToken.for_user(self.renter)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        self.sedan = Vehicle.objects.create(
+            owner=self.host, make='Toyota', model='Camry', year=2022,
+            plate_number='SED123', vehicle_type='sedan', daily_rate=50.00
+        )
+        self.suv = Vehicle.objects.create(
+            owner=self.host, make='Honda', model='CR-V', year=2023,
+            plate_number='SUV123', vehicle_type='suv', daily_rate=90.00
+        )
+
+        self.start = date.today() + timedelta(days=10)
+        self.end = date.today() + timedelta(days=13)
+        self.available_url = reverse('vehicle-availability')
+
+    def search(self, **params):
+        params.setdefault('start', self.start.isoformat())
+        params.setdefault('end', self.end.isoformat())
+        return self.client.get(self.available_url, params)
+
+    def book(self, vehicle, start, end, status='confirmed'):
+        return Booking.objects.create(
+            renter=self.renter, vehicle=vehicle,
+            start_date=start, end_date=end, status=status
+        )
+
+    def plates(self, response):
+        return [vehicle['plate_number'] for vehicle in response.data['results']]
+
+    def test_excludes_vehicles_with_overlapping_active_bookings(self):
+        """Test that pending/confirmed overlapping bookings hide a vehicle"""
+        self.book(self.sedan, self.start - timedelta(days=1), self.start + timedelta(days=1))
+
+        response = self.search()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.plates(response), ['SUV123'])
+
+    def test_ignores_cancelled_and_adjacent_bookings(self):
+        """Test that cancelled bookings and back-to-back ranges do not block"""
+        self.book(self.sedan, self.start, self.end, status='cancelled')
+        self.book(self.suv, self.end, self.end + timedelta(days=2))
+        self.book(self.suv, self.start - timedelta(days=2), self.start)
+
+        response = self.search()
+        self.assertEqual(self.plates(response), ['SED123', 'SUV123'])
+
+    def test_filters_by_type_and_rate(self):
+        """Test vehicle_type and max_rate filters"""
+        self.assertEqual(self.plates(self.search(vehicle_type='suv')), ['SUV123'])
+        self.assertEqual(self.plates(self.search(max_rate='60.00')), ['SED123'])
+
+    def test_excludes_own_and_unavailable_vehicles(self):
+        """Test that renters never see their own or disabled vehicles"""
+        Vehicle.objects.create(
+            owner=self.renter, make='Kia', model='Rio', year=2021,
+            plate_number='OWN123', daily_rate=30.00
+        )
+        self.suv.is_available = False
+        self.suv.save()
+
+        self.assertEqual(self.plates(self.search()), ['SED123'])
+
+    def test_search_query_count_is_constant(self):
+        """Test that search results are fetched in one query"""
+        for i in range(10):
+            Vehicle.objects.create(
+                owner=self.host, make='Ford', model='Focus', year=2020,
+                plate_number=f'FOC{i}', daily_rate=40.00
+            )
+
+        # JWT user lookup and one page query
+        with self.assertNumQueries(2):
+            response = self.search()
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_search_is_throttled(self):
+        """Test that searches and listings share the user's search rate"""
+        with override_settings(
+            THROTTLING={**settings.THROTTLING, 'ENABLED': True},
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'search': '2/min'}},
+        ):
+            statuses = [self.search().status_code for _ in range(3)]
+            statuses.append(self.client.get(reverse('vehicle-list-create')).status_code)
+        self.assertEqual(statuses, [200, 200, 429, 429])
+
+    def test_invalid_range(self):
+        """Test that missing or inverted ranges are rejected"""
+        response = self.client.get(self.available_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.search(start=self.end.isoformat(), end=self.start.isoformat())
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('end', response.data['details'])
+        self.assertEqual(response.data['error'], 'Availability search failed')
+
+    def test_queryset_without_list(self):
+        """Test that get_queryset() validates the search itself, for callers other than list()"""
+        request = APIRequestFactory().get(self.available_url, {'start': self.start, 'end': self.end})
+        force_authenticate(request, self.renter)
+        view = VehicleAvailabilityView()
+        view.setup(request)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+        self.assertEqual(sorted(view.get_queryset().values_list('plate_number', flat=True)), ['SED123', 'SUV123'])
+
+        request = APIRequestFactory().get(self.available_url, {'start': self.end, 'end': self.start})
+        force_authenticate(request, self.renter)
+        view.request = view.initialize_request(request)
+        with self.assertRaises(serializers.ValidationError):
+            view.get_queryset()
+
+
+class VehicleResponseCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cached',
+            email='cached@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.vehicle = Vehicle.objects.create(
+            owner=self.user,
+            make='Toyota',
+            model='Camry',
+            year=2020,
+            plate_number='CACHE1',
+            daily_rate=45.00,
+        )
+        self.authenticate(self.user)
+        self.vehicles_url = reverse('vehicle-list-create')
+        self.detail_url = reverse('vehicle-detail', kwargs={'pk': self.vehicle.pk})
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_repeated_reads_are_served_from_cache(self):
+        """Test that a repeated GET is a cache hit that skips the database"""
+        first = self.client.get(self.vehicles_url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        # JWT user lookup only
+        with self.assertNumQueries(1):
+            second = self.client.get(self.vehicles_url)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        self.assertEqual(self.client.get(self.vehicles_url, {'page': 1})['X-Cache'], 'MISS')
+
+    def test_if_none_match_returns_not_modified(self):
+        """Test that a matching ETag is answered with 304"""
+        etag = self.client.get(self.detail_url)['ETag']
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+
+    def test_writes_invalidate_cached_responses(self):
+        """Test that updates and deletes are visible on the next read"""
+        etag = self.client.get(self.detail_url)['ETag']
+        self.client.get(self.vehicles_url)
+
+        self.client.patch(self.detail_url, {'daily_rate': 85.00})
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['daily_rate'], '85.00')
+
+        self.client.delete(self.detail_url)
+        response = self.client.get(self.vehicles_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_cache_is_per_user(self):
+        """Test that users never receive each other's cached responses"""
+        self.client.get(self.vehicles_url)
+        self.authenticate(self.other_user)
+        response = self.client.get(self.vehicles_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_errors_are_not_cached(self):
+        """Test that 404s are recomputed on every request"""
+        url = reverse('vehicle-detail', kwargs={'pk': self.vehicle.pk + 100})
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('X-Cache', response)
+
+    def test_stats_endpoint_requires_admin(self):
+        """Test that cache counters are exposed to staff only"""
+        stats_url = reverse('response-cache-stats')
+        self.assertEqual(self.client.get(stats_url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.get(self.vehicles_url)
+        self.client.get(self.vehicles_url)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(response.data['hits'], 1)
+        self.assertGreaterEqual(response.data['misses'], 1)
+
+
+class VehicleCompiledSerializerTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='fleet',
+            email='fleet@example.com',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        rates = [Decimal('45'), Decimal('45.5'), Decimal('0'), Decimal('999999.99'), Decimal('0.01')]
+        for i, rate in enumerate(rates):
+            Vehicle.objects.create(
+                owner=self.user,
+                make='Škoda' if i % 2 else 'Toyota',
+                model='Octavia "RS"',
+                year=2015 + i,
+                plate_number=f'PAR{i}',
+                vehicle_type=['sedan', 'suv', 'van', 'truck', 'coupe'][i],
+                color='' if i % 2 else 'red',
+                daily_rate=rate,
+                is_available=bool(i % 3),
+                description='Line one\nLine two' if i else '',
+            )
+        self.vehicles_url = reverse('vehicle-list-create')
+
+    def assertSameJSON(self, queryset):
+        compiled = compile_serializer(VehicleSerializer)
+        expected = JSONRenderer().render(VehicleSerializer(queryset, many=True).data)
+        self.assertEqual(JSONRenderer().render(compiled.represent(compiled.values(queryset))), expected)
+
+    def test_compiled_output_matches_serializer(self):
+        """Test that the compiled path renders byte-identical JSON"""
+        self.assertSameJSON(Vehicle.objects.all())
+
+    def test_compiled_output_matches_in_other_timezones(self):
+        """Test that datetimes follow the active timezone like DateTimeField"""
+        for zone in ('Asia/Kolkata', 'America/New_York'):
+            with timezone.override(zone):
+                self.assertSameJSON(Vehicle.objects.all())
+
+    def test_list_endpoint_matches_with_and_without_compiled_path(self):
+        """Test that list responses are identical with the compiled path on and off"""
+        for params in ({}, {'ordering': 'daily_rate'}, {'search': 'Škoda'},
+                       {'count': 'false'}, {'cursor': ''}):
+            cache.clear()
+            compiled = self.client.get(self.vehicles_url, params)
+            cache.clear()
+            with override_settings(COMPILED_READ_SERIALIZERS=False):
+                plain = self.client.get(self.vehicles_url, params)
+            self.assertEqual(compiled.status_code, status.HTTP_200_OK)
+            self.assertEqual(compiled.content, plain.content)
+
+    def test_sparse_fields(self):
+        """Test that ?fields= narrows the list, detail and availability queries alike"""
+        vehicle = Vehicle.objects.create(owner=User.objects.create_user(username='other', email='o@example.com'),
+                                         make='Ford', model='Focus', year=2020, plate_number='SPARSE',
+                                         daily_rate=30, description='Long text')
+        start = date.today() + timedelta(days=10)
+        requests = [
+            (self.vehicles_url, {'fields': 'id,make,daily_rate', 'ordering': 'daily_rate'}),
+            (self.vehicles_url, {'fields': 'make', 'cursor': ''}),
+            (reverse('vehicle-detail', args=[Vehicle.objects.filter(owner=self.user).first().pk]),
+             {'fields': 'plate_number'}),
+            (reverse('vehicle-availability'), {'fields': 'id,make', 'start': start,
+                                               'end': start + timedelta(days=1)}),
+        ]
+        for url, params in requests:
+            with self.subTest(url=url, params=params):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    compiled = self.client.get(url, params)
+                cache.clear()
+                with override_settings(COMPILED_READ_SERIALIZERS=False):
+                    plain = self.client.get(url, params)
+                self.assertEqual(compiled.status_code, status.HTTP_200_OK)
+                self.assertEqual(compiled.content, plain.content)
+                data = compiled.data.get('results', [compiled.data])
+                self.assertEqual(set(data[0]), set(params['fields'].split(',')))
+                self.assertFalse(any('"description"' in query['sql'] for query in queries))
+        self.assertEqual(compiled.data['results'][0]['id'], vehicle.id)
+
+    def test_unsupported_fields_are_rejected(self):
+        """Test that fields the compiled path cannot reproduce fail loudly"""
+        class SlugSerializer(serializers.ModelSerializer):
+            owner = serializers.SlugRelatedField(slug_field='email', read_only=True)
+
+            class Meta:
+                model = Vehicle
+                fields = ['id', 'owner']
+
+        with self.assertRaises(ImproperlyConfigured):
+            compile_serializer(SlugSerializer)
+
+
+class VehicleExportTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='fleetowner',
+            email='fleetowner@example.com',
+            password='testpass123'
+        )
+        other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        for i, (make, model) in enumerate([('Toyota', 'Camry'), ('Honda', 'Civic'), ('Toyota', 'RAV4')]):
+            Vehicle.objects.create(owner=self.user, make=make, model=model, year=2020,
+                                   plate_number=f'FLT{i}', daily_rate='45.50')
+        Vehicle.objects.create(owner=other_user, make='Toyota', model='Camry', year=2020,
+                               plate_number='OTHER1', daily_rate=60)
+        self.export_url = reverse('vehicle-export')
+
+    def test_csv_export_of_own_fleet(self):
+        """Test that the CSV export holds only the user's vehicles, oldest first"""
+        response = self.client.get(self.export_url, {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['plate_number'] for row in rows], ['FLT0', 'FLT1', 'FLT2'])
+        self.assertEqual(rows[0]['daily_rate'], '45.50')
+        self.assertEqual(rows[0]['is_available'], 'True')
+
+    def test_ndjson_export_with_search(self):
+        """Test that NDJSON export applies the list's search"""
+        response = self.client.get(self.export_url, {'format': 'ndjson', 'search': 'toyota'})
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([record['plate_number'] for record in records], ['FLT0', 'FLT2'])
+        self.assertIs(records[0]['is_available'], True)
+
+    def test_export_requires_authentication(self):
+        """Test that anonymous exports are rejected"""
+        self.client.credentials()
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(ROOT_URLCONF=ASGI_URLCONF)
+class VehicleAsyncViewTestCase(APITestCase):
+    """The async views under ASGI answer exactly like the sync DRF views."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='asyncowner', email='asyncowner@example.com',
+                                             password='testpass123')
+        for i, (make, model, vehicle_type) in enumerate((('Toyota', 'Camry', 'sedan'), ('Ford', 'F-150', 'truck'),
+                                                         ('Kia', 'Sportage', 'suv'))):
+            Vehicle.objects.create(owner=self.user, make=make, model=model, year=2018 + i,
+                                   plate_number=f'ASY{i}', vehicle_type=vehicle_type, daily_rate=40 + i)
+        self.vehicle = Vehicle.objects.get(plate_number='ASY0')
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.vehicles_url = reverse('vehicle-list-create')
+        self.detail_url = reverse('vehicle-detail', kwargs={'pk': self.vehicle.pk})
+
+    async def sync_get(self, url, **kwargs):
+        with override_settings(ROOT_URLCONF='one_now_rental.urls'):
+            return await sync_to_async(self.client.get)(url, headers=self.headers, **kwargs)
+
+    def test_asgi_urls_serve_async_views(self):
+        """Test that ASGI requests reach coroutine views for list and detail only"""
+        for url, view_class in ((self.vehicles_url, AsyncVehicleListCreateView),
+                                (self.detail_url, AsyncVehicleRetrieveUpdateDestroyView)):
+            match = resolve(url, urlconf=ASGI_URLCONF)
+            self.assertIs(match.func.view_class, view_class)
+            self.assertTrue(iscoroutinefunction(match.func))
+        self.assertIs(resolve(reverse('vehicle-export'), urlconf=ASGI_URLCONF).func.view_class, VehicleExportView)
+
+    async def test_reads_match_sync_views(self):
+        """Test list pagination modes, filters, detail and errors against the sync views"""
+        queries = ({}, {'page_size': 1}, {'page': 2}, {'page': 9}, {'count': 'false'}, {'cursor': ''},
+                   {'cursor': 'bad'}, {'search': 'kia'}, {'vehicle_type': 'truck'}, {'ordering': 'year'},
+                   {'ordering': 'year', 'cursor': ''})
+        for compiled in (True, False):
+            with override_settings(COMPILED_READ_SERIALIZERS=compiled, RESPONSE_CACHE={**settings.RESPONSE_CACHE,
+                                                                                       'ENABLED': False}):
+                for params in queries:
+                    with self.subTest(compiled=compiled, params=params):
+                        response = await self.async_client.get(self.vehicles_url, params, headers=self.headers)
+                        expected = await self.sync_get(self.vehicles_url, data=params)
+                        self.assertEqual(response.status_code, expected.status_code)
+                        self.assertEqual(response.content, expected.content)
+
+        for url in (self.detail_url, reverse('vehicle-detail', kwargs={'pk': 999999})):
+            response = await self.async_client.get(url, headers=self.headers)
+            expected = await self.sync_get(url)
+            self.assertEqual((response.status_code, response.content), (expected.status_code, expected.content))
+
+        response = await self.async_client.get(self.vehicles_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json(), {'detail': 'Authentication credentials were not provided.'})
+
+    async def test_cached_reads(self):
+        """Test that async reads share the response cache and its invalidation"""
+        first = await self.async_client.get(self.detail_url, headers=self.headers)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        second = await self.async_client.get(self.detail_url, headers=self.headers)
+        self.assertEqual((second['X-Cache'], second.content), ('HIT', first.content))
+        not_modified = await self.async_client.get(self.detail_url, headers={**self.headers,
+                                                                            'If-None-Match': first['ETag']})
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = await self.async_client.patch(self.detail_url, {'daily_rate': '99.00'},
+                                                 content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        third = await self.async_client.get(self.detail_url, headers=self.headers)
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertEqual(third.json()['daily_rate'], '99.00')
+
+    async def test_writes(self):
+        """Test create and delete through the async views"""
+        data = {'make': 'Tesla', 'model': 'Model 3', 'year': 2023, 'plate_number': 'asy9',
+                'vehicle_type': 'sedan', 'daily_rate': '80.00'}
+        response = await self.async_client.post(self.vehicles_url, data, content_type='application/json',
+                                                headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['vehicle']['plate_number'], 'ASY9')
+
+        response = await self.async_client.post(self.vehicles_url, data, content_type='application/json',
+                                                headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['error'], 'Vehicle creation failed')
+
+        response = await self.async_client.delete(self.detail_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Vehicle.objects.filter(pk=self.vehicle.pk).aexists())
+
+    async def test_search_in_fresh_process(self):
+        """Test that the first search of a process looks up the FTS table off the event loop"""
+        with mock.patch.dict(search._fts_databases, clear=True):
+            response = await self.async_client.get(self.vehicles_url, {'search': 'kia'}, headers=self.headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([vehicle['plate_number'] for vehicle in response.json()['results']], ['ASY2'])
+            self.assertEqual(list(search._fts_databases.values()), [connection.vendor == 'sqlite'])
+
+
+class VehicleInstrumentationTestCase(APITestCase):
+    """PerformanceMiddleware timings, slow-query log and metrics."""
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.user = User.objects.create_user(username='timed', email='timed@example.com',
+                                             password='testpass123')
+        self.vehicle = Vehicle.objects.create(owner=self.user, make='Toyota', model='Camry', year=2020,
+                                              plate_number='TIME1', daily_rate=45.00)
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.vehicles_url = reverse('vehicle-list-create')
+        self.detail_url = reverse('vehicle-detail', kwargs={'pk': self.vehicle.pk})
+
+    def server_timing(self, response):
+        return dict(
+            (metric.split(';')[0], metric.split(';', 1)[1])
+            for metric in response['Server-Timing'].split(', ')
+        )
+
+    def test_server_timing_counts_queries(self):
+        """Test that Server-Timing reports the request's queries"""
+        # JWT user lookup, COUNT(*) and one page query
+        with self.assertNumQueries(3):
+            response = self.client.get(self.vehicles_url, headers=self.headers)
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {'app', 'db', 'serialize'})
+        self.assertTrue(timing['db'].endswith(';desc="3 queries"'))
+
+        # A cache hit only authenticates
+        response = self.client.get(self.vehicles_url, headers=self.headers)
+        self.assertTrue(self.server_timing(response)['db'].endswith(';desc="1 queries"'))
+
+    @override_settings(ROOT_URLCONF=ASGI_URLCONF)
+    async def test_server_timing_under_asgi(self):
+        """Test that queries of async views, run on the ORM thread, are counted"""
+        response = await self.async_client.get(self.vehicles_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.server_timing(response)['db'].endswith(';desc="3 queries"'))
+
+    def test_metrics_endpoint(self):
+        """Test the Prometheus histograms per URL name and the cache counters"""
+        self.client.get(self.vehicles_url, headers=self.headers)
+        self.client.get(self.detail_url, headers=self.headers)
+        self.client.get(self.detail_url, headers=self.headers)
+        self.assertGreater(metrics.series[('vehicle-detail', 'GET')]['serialize'].sum, 0)
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_count{endpoint="vehicle-detail",method="GET"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="vehicle-list-create",method="GET",le="+Inf"} 1',
+                      body)
+        self.assertIn('http_db_queries_total{endpoint="vehicle-list-create",method="GET"} 3', body)
+        self.assertIn('response_cache_hits_total ', body)
+
+    def test_metrics_token(self):
+        """Test that a configured METRICS_TOKEN is required from scrapers"""
+        with override_settings(PERFORMANCE_METRICS={**settings.PERFORMANCE_METRICS, 'METRICS_TOKEN': 'scrape'}):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+            response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer scrape'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_slow_query_log(self):
+        """Test that queries over SLOW_QUERY_MS are logged with their SQL"""
+        with override_settings(PERFORMANCE_METRICS={**settings.PERFORMANCE_METRICS, 'SLOW_QUERY_MS': 0}), \
+                self.assertLogs('one_now_rental.performance', 'WARNING') as logs:
+            self.client.get(self.detail_url, headers=self.headers)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn('on GET vehicle-detail: SELECT', logs.output[1])
+
+    def test_disabled(self):
+        """Test that the middleware steps aside when disabled"""
+        with override_settings(PERFORMANCE_METRICS={**settings.PERFORMANCE_METRICS, 'ENABLED': False}):
+            response = self.client.get(self.vehicles_url, headers=self.headers)
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(metrics.series, {})
+
+
+class VehicleSearchTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='searcher', email='searcher@example.com',
+                                             password='testpass123')
+        other_user = User.objects.create_user(username='otheruser', email='other@example.com',
+                                              password='testpass123')
+        self.client.force_authenticate(self.user)
+
+        for make, model, plate, description in [
+            ('Toyota', 'Camry', 'CAM-100', 'Hybrid family sedan'),
+            ('Honda', 'Civic', 'CIV-200', 'Sporty, upgraded from a Toyota dealer'),
+            ('Toyota', 'Land Cruiser', 'LC-300', ''),
+            ('Škoda', 'Octavia', 'OCT-400', 'Estate'),
+        ]:
+            Vehicle.objects.create(owner=self.user, make=make, model=model, year=2022,
+                                   plate_number=plate, description=description, daily_rate=50)
+        Vehicle.objects.create(owner=other_user, make='Toyota', model='Camry', year=2022,
+                               plate_number='OTHER-1', daily_rate=50)
+        self.vehicles_url = reverse('vehicle-list-create')
+
+    def plates(self, **params):
+        response = self.client.get(self.vehicles_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [vehicle['plate_number'] for vehicle in response.data['results']]
+
+    def test_terms_are_word_prefixes(self):
+        """Test prefix matching over make, model, description and plate"""
+        self.assertEqual(self.plates(search='cam'), ['CAM-100'])
+        self.assertEqual(self.plates(search='cruis'), ['LC-300'])
+        self.assertEqual(self.plates(search='hybr'), ['CAM-100'])
+        self.assertEqual(self.plates(search='civ-2'), ['CIV-200'])
+        # Accents are ignored on both backends, in the rows and in the query
+        self.assertEqual(self.plates(search='skoda'), ['OCT-400'])
+        self.assertEqual(self.plates(search='škod'), ['OCT-400'])
+        # Not word prefixes
+        self.assertEqual(self.plates(search='amry'), [])
+        self.assertEqual(self.plates(search='toyota civic'), ['CIV-200'])
+        self.assertEqual(self.plates(search='toyota camry sedan'), ['CAM-100'])
+        self.assertEqual(len(self.plates(search='  ,, ')), 4)
+        self.assertEqual(terms('Land-Cruiser_200 Škoda'), ['land', 'cruiser', '200', 'škoda'])
+
+    def test_results_are_ranked_unless_ordered(self):
+        """Test that make/model matches rank above description matches"""
+        # Newest first among equal ranks, as the list is by default
+        self.assertEqual(self.plates(search='toyota'), ['LC-300', 'CAM-100', 'CIV-200'])
+        self.assertEqual(self.plates(search='toyota', ordering='created_at'),
+                         ['CAM-100', 'CIV-200', 'LC-300'])
+
+        response = self.client.get(self.vehicles_url, {'search': 'toyota', 'cursor': ''})
+        self.assertEqual([vehicle['plate_number'] for vehicle in response.data['results']],
+                         ['LC-300', 'CIV-200', 'CAM-100'])
+
+    def test_index_follows_writes(self):
+        """Test that updates and deletes are reflected in search results"""
+        vehicle = Vehicle.objects.get(plate_number='CAM-100')
+        vehicle.make = 'Lexus'
+        vehicle.save()
+        self.assertEqual(self.plates(search='lexus'), ['CAM-100'])
+        self.assertEqual(self.plates(search='toyota camry'), [])
+
+        Vehicle.objects.get(plate_number='LC-300').delete()
+        self.assertEqual(self.plates(search='cruiser'), [])
+
+    def test_rebuild_indexes_bulk_inserts(self):
+        """Test that rebuild_vehicle_search picks up rows written around the signals"""
+        Vehicle.objects.bulk_create([Vehicle(owner=self.user, make='Mazda', model='MX-5', year=2021,
+                                             plate_number='MX5-1', daily_rate=80)])
+        self.assertEqual(self.plates(search='mazda'), [])
+
+        out = io.StringIO()
+        call_command('rebuild_vehicle_search', stdout=out)
+        self.assertIn('Indexed 6 vehicles', out.getvalue())
+        # bulk_create skipped the response cache invalidation as well
+        cache.clear()
+        self.assertEqual(self.plates(search='mazda'), ['MX5-1'])
+
+    def test_index_lookup_is_cached(self):
+        """Test that whether the FTS table exists is looked up once per database, either way"""
+        with mock.patch.dict(search._fts_databases, clear=True):
+            with mock.patch.object(connection.introspection, 'table_names', return_value=[]) as table_names:
+                # Found missing: icontains, without looking again
+                self.assertEqual(self.plates(search='toy'), ['LC-300', 'CAM-100', 'CIV-200'])
+                self.assertEqual(self.plates(search='camry'), ['CAM-100'])
+            self.assertEqual(table_names.call_count, 1 if connection.vendor == 'sqlite' else 0)
+            self.assertFalse(search.fts_enabled())
+            # Until the next install()
+            search.install()
+            self.assertEqual(search.fts_enabled(), connection.vendor == 'sqlite')
+
+    @skipUnless(connection.vendor == 'postgresql', 'PostgreSQL full-text and trigram indexes')
+    def test_postgresql_indexes(self):
+        """Test that PostgreSQL searches ignore accents through the unaccent GIN index"""
+        self.assertEqual(self.plates(search='skoda'), ['OCT-400'])
+        self.assertEqual(self.plates(search='ŠKOD oct'), ['OCT-400'])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'vehicles_vehicle'")
+            indexes = {row[0] for row in cursor.fetchall()}
+        self.assertTrue({'vehicle_search_unaccent_idx', 'vehicle_make_trgm_idx',
+                         'vehicle_model_trgm_idx'} <= indexes)
+        self.assertNotIn('vehicle_search_idx', indexes)
+
+    def test_search_query_count(self):
+        """Test that searching adds no queries to the list"""
+        # Authentication is forced: COUNT(*) and one page query
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.plates(search='toy')), 3)
+
+    def test_export_applies_search_in_export_order(self):
+        """Test that exports filter by search but keep oldest-first order"""
+        response = self.client.get(reverse('vehicle-export'), {'format': 'ndjson', 'search': 'toyota'})
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([record['plate_number'] for record in records], ['CAM-100', 'CIV-200', 'LC-300'])
+
+
+@override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False})
+class VehicleQueryPlanTestCase(QueryPlanAssertionsMixin, APITestCase):
+    """Every read behind the vehicle endpoints is served by an index, in index order."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='planner', email='planner@example.com',
+                                             password='testpass123')
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            self.vehicle = Vehicle.objects.create(owner=self.user, make='Toyota', model='Camry', year=2020 + i,
+                                                  plate_number=f'PLAN-{i}', daily_rate=40 + i)
+
+    def get(self, url, params=None):
+        def send():
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            return response
+        return send
+
+    def test_list_orderings(self):
+        """Test each ordering_fields ordering, both ways, with and without counts"""
+        url = reverse('vehicle-list-create')
+        self.assertIndexedQueries(self.get(url))
+        for field in VehicleListCreateView.ordering_fields:
+            for ordering in (field, f'-{field}'):
+                with self.subTest(ordering=ordering):
+                    self.assertIndexedQueries(self.get(url, {'ordering': ordering}))
+                    self.assertIndexedQueries(self.get(url, {'ordering': ordering, 'count': 'false'}))
+
+    def test_list_filters(self):
+        """Test each filterset_fields filter in the default ordering"""
+        url = reverse('vehicle-list-create')
+        for params in ({'vehicle_type': 'sedan'}, {'is_available': 'true'}, {'year': 2021}):
+            with self.subTest(params=params):
+                self.assertIndexedQueries(self.get(url, params))
+
+    def test_list_cursor_pages(self):
+        """Test keyset pages both ways"""
+        url = reverse('vehicle-list-create')
+        cursor = KeysetPagination().encode_cursor(self.vehicle)
+        for ordering in ('created_at', '-created_at'):
+            with self.subTest(ordering=ordering):
+                self.assertIndexedQueries(self.get(url, {'cursor': '', 'ordering': ordering}))
+                self.assertIndexedQueries(self.get(url, {'cursor': cursor, 'ordering': ordering}))
+
+    def test_search(self):
+        """Test that search reads the full-text index; only its ranking sorts"""
+        self.assertIndexedQueries(self.get(reverse('vehicle-list-create'), {'search': 'toy'}), allow_sort=True)
+        self.assertIndexedQueries(self.get(reverse('vehicle-list-create'),
+                                           {'search': 'toy', 'ordering': 'daily_rate'}))
+
+    def test_detail_and_export(self):
+        """Test the detail view and the export"""
+        self.assertIndexedQueries(self.get(reverse('vehicle-detail', args=[self.vehicle.pk])))
+        self.assertIndexedQueries(self.get(reverse('vehicle-export'), {'format': 'csv'}))
+        self.assertIndexedQueries(self.get(reverse('vehicle-export'), {'format': 'csv', 'year': 2021}))
+
+    def test_availability(self):
+        """Test the availability search, which walks the available vehicles by rate"""
+        url = reverse('vehicle-availability')
+        start = date.today() + timedelta(days=10)
+        params = {'start': start, 'end': start + timedelta(days=3)}
+        self.assertIndexedQueries(self.get(url, params))
+        self.assertIndexedQueries(self.get(url, {**params, 'vehicle_type': 'suv'}))
+
+
+class VehicleCalendarTestCase(APITestCase):
+    """Calendars are read from occupancy bitmaps that follow booking writes."""
+
+    def setUp(self):
+        cache.clear()
+        self.renter = User.objects.create_user(username='calendar', email='calendar@example.com',
+                                               password='testpass123')
+        owner = User.objects.create_user(username='owner', email='owner@example.com',
+                                         password='testpass123', user_type='host')
+        self.client.force_authenticate(self.renter)
+        self.vehicle, self.other = (
+            Vehicle.objects.create(owner=owner, make='Toyota', model='Camry', year=2020,
+                                   plate_number=plate, daily_rate=50)
+            for plate in ('CAL-1', 'CAL-2')
+        )
+        self.today = date.today()
+        self.book(self.vehicle, 2, 5)
+        self.book(self.vehicle, 7, 8, status='confirmed')
+        self.book(self.vehicle, 10, 12, status='cancelled')
+        self.url = reverse('vehicle-calendar', args=[self.vehicle.pk])
+        self.params = {'from': self.today, 'to': self.today + timedelta(days=14)}
+
+    def book(self, vehicle, start, end, status='pending'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(renter=self.renter, vehicle=vehicle, status=status,
+                                          start_date=self.today + timedelta(days=start),
+                                          end_date=self.today + timedelta(days=end))
+
+    def days(self, vehicle=None):
+        url = self.url if vehicle is None else reverse('vehicle-calendar', args=[vehicle.pk])
+        response = self.client.get(url, self.params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['days']
+
+    def test_calendar_marks_active_bookings(self):
+        """Test that pending and confirmed bookings are booked, cancelled ones are free"""
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.data['days'], '00111001000000')
+        self.assertEqual(response.data['booked'], [
+            {'start': self.today + timedelta(days=2), 'end': self.today + timedelta(days=5)},
+            {'start': self.today + timedelta(days=7), 'end': self.today + timedelta(days=8)},
+        ])
+        self.assertEqual(self.days(self.other), '0' * 14)
+
+        # Defaults to the next 365 days
+        response = self.client.get(self.url)
+        self.assertEqual((response.data['from'], len(response.data['days'])), (self.today, 365))
+
+    def test_writes_replace_the_cached_bitmap(self):
+        """Test that creates, status changes and deletes drop the vehicle's cached bitmap"""
+        self.days()
+        self.days(self.other)
+        booking = self.book(self.vehicle, 12, 14)
+        # The other vehicle's bitmap is still cached; this one is rebuilt
+        with self.assertNumQueries(1):
+            self.days(self.other)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.days(), '00111001000011')
+        with self.assertNumQueries(1):
+            self.days()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'completed'
+            booking.save()
+        self.assertEqual(self.days(), '00111001000000')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.filter(start_date=self.today + timedelta(days=2)).get().delete()
+        self.assertEqual(self.days(), '00000001000000')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('booking-bulk-create'), {'bookings': [
+                {'vehicle': self.vehicle.pk, 'start_date': self.today + timedelta(days=day),
+                 'end_date': self.today + timedelta(days=day + 1)}
+                for day in (0, 13)
+            ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.days(), '10000001000001')
+
+    def test_build_racing_a_commit_is_not_served(self):
+        """Test that a bitmap built from bookings read before a commit is not kept"""
+        build = occupancy._build
+
+        def build_then_commit(vehicle_ids):
+            built = build(vehicle_ids)
+            self.book(self.vehicle, 12, 14)
+            return built
+
+        with mock.patch.object(occupancy, '_build', build_then_commit):
+            self.assertEqual(self.days(), '00111001000000')
+        self.assertEqual(self.days(), '00111001000011')
+
+    def test_freed_days_of_overlapping_bookings_stay_booked(self):
+        """Test that cancelling one of two overlapping bookings keeps the other's days"""
+        overlapping = self.book(self.vehicle, 4, 6)
+        self.assertEqual(self.days(), '00111101000000')
+        with self.captureOnCommitCallbacks(execute=True):
+            overlapping.status = 'cancelled'
+            overlapping.save()
+        self.assertEqual(self.days(), '00111001000000')
+
+    def test_moved_booking_frees_the_old_vehicle(self):
+        """Test that moving a booking to another vehicle refreshes both calendars"""
+        moved = Booking.objects.get(vehicle=self.vehicle, status='confirmed')
+        self.assertEqual((self.days(), self.days(self.other)), ('00111001000000', '0' * 14))
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.vehicle = self.other
+            moved.save()
+        self.assertEqual((self.days(), self.days(self.other)), ('00111000000000', '00000001000000'))
+
+    def test_batch(self):
+        """Test that the batch endpoint builds every missing bitmap in one query"""
+        url = reverse('vehicle-calendar-batch')
+        ids = f'{self.other.pk},999999,{self.vehicle.pk}'
+        # Vehicle ids, then the bookings of both vehicles
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {**self.params, 'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['vehicle'], row['days']) for row in response.data['calendars']], [
+            (self.other.pk, '0' * 14), (self.vehicle.pk, '00111001000000'),
+        ])
+
+    def test_invalid_requests(self):
+        """Test ranges, id lists and unknown vehicles that are rejected"""
+        url = reverse('vehicle-calendar-batch')
+        for target, params in (
+            (self.url, {'from': self.today, 'to': self.today}),
+            (self.url, {'to': self.today + timedelta(days=400)}),
+            (self.url, {'from': 'soon'}),
+            (url, {'ids': ''}),
+            (url, {'ids': '1,x'}),
+            (url, {'ids': ','.join(map(str, range(1, 102)))}),
+        ):
+            with self.subTest(url=target, params=params):
+                response = self.client.get(target, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('vehicle-calendar', args=[999999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -3,5 +3,9 @@ from . import views
 
 urlpatterns = [
     path('vehicles/', views.VehicleListCreateView.as_view(), name='vehicle-list-create'),
+    path('vehicles/export/', views.VehicleExportView.as_view(), name='vehicle-export'),
+    path('vehicles/available/', views.VehicleAvailabilityView.as_view(), name='vehicle-availability'),
+    path('vehicles/calendar/', views.VehicleCalendarBatchView.as_view(), name='vehicle-calendar-batch'),
     path('vehicles/<int:pk>/', views.VehicleRetrieveUpdateDestroyView.as_view(), name='vehicle-detail'),
+    path('vehicles/<int:pk>/calendar/', views.VehicleCalendarView.as_view(), name='vehicle-calendar'),
 ]
\ No newline at end of file
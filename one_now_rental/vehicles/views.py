@@ -1,25 +1,47 @@
-from rest_framework import generics, permissions, status
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
+from django.db.models import Exists, OuterRef
+from django.http import Http404
+from bookings import occupancy
+from bookings.models import Booking
+from one_now_rental.db_router import ReplicaReadMixin
+from one_now_rental.exports import ExportView
+from one_now_rental.fast_serializers import CompiledListMixin
+from one_now_rental.idempotency import IdempotentCreateMixin
+from one_now_rental.pagination import KeysetPagination, UncountedPageNumberPagination
+from one_now_rental.response_cache import CachedResponseMixin
+from one_now_rental.serializers import SparseFieldsMixin, eager_queryset
+from one_now_rental.throttling import SearchThrottle
 from .models import Vehicle
-from .serializers import VehicleSerializer, VehicleCreateSerializer
+from .search import VehicleSearchFilter
+from .serializers import (
+    VehicleSerializer, VehicleCreateSerializer, AvailabilitySearchSerializer,
+    CalendarRangeSerializer, CalendarBatchSerializer,
+)
 
-class VehicleListCreateView(generics.ListCreateAPIView):
+class VehicleListCreateView(ReplicaReadMixin, CachedResponseMixin, CompiledListMixin, SparseFieldsMixin,
+                            IdempotentCreateMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    cache_scope = 'vehicles'
+    serializer_class = VehicleSerializer
+    throttle_classes = [SearchThrottle]
+    pagination_class = KeysetPagination
+    # Search runs last, to rank matches ahead of the default ordering
+    filter_backends = [DjangoFilterBackend, OrderingFilter, VehicleSearchFilter]
     filterset_fields = ['vehicle_type', 'is_available', 'year']
-    search_fields = ['make', 'model', 'plate_number']
     ordering_fields = ['created_at', 'year', 'daily_rate']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        return Vehicle.objects.filter(owner=self.request.user)
+        return eager_queryset(Vehicle.objects.filter(owner=self.request.user), self.get_serializer_class())
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return VehicleCreateSerializer
-        return VehicleSerializer
+        return super().get_serializer_class()
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -40,7 +62,13 @@ class VehicleListCreateView(generics.ListCreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            self.perform_create(serializer)  # This will set the owner
+            try:
+                self.perform_create(serializer)  # This will set the owner
+            except serializers.ValidationError as exc:
+                return Response({
+                    'error': 'Vehicle creation failed',
+                    'details': exc.detail
+                }, status=status.HTTP_400_BAD_REQUEST)
             return Response({
                 'message': 'Vehicle added successfully',
                 'vehicle': VehicleSerializer(serializer.instance).data
@@ -51,19 +79,27 @@ class VehicleListCreateView(generics.ListCreateAPIView):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class VehicleRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class VehicleRetrieveUpdateDestroyView(ReplicaReadMixin, CachedResponseMixin, SparseFieldsMixin,
+                                       generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    cache_scope = 'vehicles'
     serializer_class = VehicleSerializer
 
     def get_queryset(self):
-        return Vehicle.objects.filter(owner=self.request.user)
+        return eager_queryset(Vehicle.objects.filter(owner=self.request.user), self.get_serializer_class())
 
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         if serializer.is_valid():
-            vehicle = serializer.save()
+            try:
+                vehicle = serializer.save()
+            except serializers.ValidationError as exc:
+                return Response({
+                    'error': 'Vehicle update failed',
+                    'details': exc.detail
+                }, status=status.HTTP_400_BAD_REQUEST)
             return Response({
                 'message': 'Vehicle updated successfully',
                 'vehicle': serializer.data
@@ -85,3 +121,120 @@ class VehicleRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         return Response({
             'message': 'Vehicle deleted successfully'
         }, status=status.HTTP_204_NO_CONTENT)
+
+
+class VehicleExportView(ExportView):
+    """The user's whole fleet as CSV or NDJSON, filtered like the list."""
+    filter_backends = [DjangoFilterBackend, VehicleSearchFilter]
+    filterset_fields = VehicleListCreateView.filterset_fields
+    export_name = 'vehicles'
+    export_fields = (
+        ('id', 'id'),
+        ('make', 'make'),
+        ('model', 'model'),
+        ('year', 'year'),
+        ('plate_number', 'plate_number'),
+        ('vehicle_type', 'vehicle_type'),
+        ('color', 'color'),
+        ('daily_rate', 'daily_rate'),
+        ('is_available', 'is_available'),
+        ('description', 'description'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
+
+    def get_queryset(self):
+        return Vehicle.objects.filter(owner=self.request.user).order_by('created_at', 'id')
+
+
+class VehicleAvailabilityView(CompiledListMixin, SparseFieldsMixin, generics.ListAPIView):
+    """Vehicles other users can book for the whole [start, end) range."""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = VehicleSerializer
+    throttle_classes = [SearchThrottle]
+    # Counting every free vehicle costs as much as the search itself
+    pagination_class = UncountedPageNumberPagination
+    filter_backends = [OrderingFilter]
+    ordering_fields = ['created_at', 'year', 'daily_rate']
+    ordering = ['daily_rate', 'id']
+
+    def get_search_params(self):
+        """The request's validated search parameters, validated once per request."""
+        request = self.request
+        if not hasattr(request, '_availability_search'):
+            params = AvailabilitySearchSerializer(data=request.query_params)
+            if not params.is_valid():
+                raise ValidationError({
+                    'error': 'Availability search failed',
+                    'details': params.errors
+                })
+            request._availability_search = params.validated_data
+        return request._availability_search
+
+    def get_queryset(self):
+        search = self.get_search_params()
+        # Anti-join: one NOT EXISTS probe per vehicle on the
+        # (vehicle, status, start_date, end_date) booking index, no Python-side loop.
+        busy = Booking.objects.active().overlapping(
+            search['start'], search['end']
+        ).filter(vehicle=OuterRef('pk'))
+
+        queryset = Vehicle.objects.filter(is_available=True).exclude(
+            owner=self.request.user
+        ).filter(~Exists(busy))
+        queryset = eager_queryset(queryset, self.get_serializer_class())
+
+        if 'vehicle_type' in search:
+            queryset = queryset.filter(vehicle_type=search['vehicle_type'])
+        if 'max_rate' in search:
+            queryset = queryset.filter(daily_rate__lte=search['max_rate'])
+        return queryset
+
+
+class VehicleCalendarView(generics.GenericAPIView):
+    """
+    Which days of ``[from, to)`` a vehicle is booked, read from its
+    occupancy bitmap (see ``bookings.occupancy``) rather than the bookings.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = Vehicle.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        params = CalendarRangeSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({
+                'error': 'Calendar request failed',
+                'details': params.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        start, end = params.validated_data['from'], params.validated_data['to']
+
+        pk = self.kwargs['pk']
+        if not self.get_queryset().filter(pk=pk).exists():
+            raise Http404('No Vehicle matches the given query.')
+        calendar = occupancy.get_occupancies([pk])[pk].calendar(start, end)
+        return Response({'vehicle': pk, 'from': start, 'to': end, **calendar})
+
+
+class VehicleCalendarBatchView(generics.GenericAPIView):
+    """``VehicleCalendarView`` for up to ``CALENDAR_BATCH_LIMIT`` vehicles (``?ids=``) at once."""
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = Vehicle.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        params = CalendarBatchSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({
+                'error': 'Calendar request failed',
+                'details': params.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        start, end = params.validated_data['from'], params.validated_data['to']
+
+        # Unknown ids are left out of the response
+        ids = set(self.get_queryset().filter(pk__in=params.validated_data['ids']).values_list('pk', flat=True))
+        ids = [pk for pk in params.validated_data['ids'] if pk in ids]
+        occupancies = occupancy.get_occupancies(ids)
+        return Response({
+            'from': start,
+            'to': end,
+            'calendars': [{'vehicle': pk, **occupancies[pk].calendar(start, end)} for pk in ids],
+        })